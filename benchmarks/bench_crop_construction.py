@@ -0,0 +1,56 @@
+"""
+Замер скорости создания культур: по одной и пакетно.
+
+Сравнивает создание объектов через конструктор Crop, пакетное
+создание через Crop.from_rows и загрузку в CropTable через
+extend_rows (без создания объектов).
+
+Запуск:
+    python -m benchmarks.bench_crop_construction [количество записей]
+"""
+import sys
+import time
+
+from src.models import Crop, CropTable
+
+CULTURES = ("Пшеница", "Ячмень", "Овес", "Рожь", "Кукуруза")
+
+
+def make_rows(count: int):
+    """Создает тестовые записи (название, площадь, урожайность)."""
+    return [
+        (CULTURES[i % len(CULTURES)], 1.0 + i % 97, 2.0 + (i % 13) / 10)
+        for i in range(count)
+    ]
+
+
+def measure(func, *args) -> float:
+    """Возвращает время выполнения функции в секундах."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    """Запуск замера."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = make_rows(count)
+
+    per_object = measure(lambda: [Crop(name, area, y) for name, area, y in rows])
+    batch = measure(Crop.from_rows, rows)
+    batch_trusted = measure(lambda: Crop.from_rows(rows, validate=False))
+    columnar = measure(lambda: CropTable().extend_rows(rows))
+
+    print(f"Записей: {count}")
+    print(f"  Crop(...) по одной:          {per_object:8.3f} с")
+    for title, elapsed in (
+        ("Crop.from_rows:", batch),
+        ("Crop.from_rows(validate=False):", batch_trusted),
+        ("CropTable.extend_rows:", columnar),
+    ):
+        print(f"  {title:30s} {elapsed:8.3f} с  (x{per_object / elapsed:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
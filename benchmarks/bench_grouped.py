@@ -0,0 +1,63 @@
+"""
+Замер параллельной групповой агрегации истории.
+
+Сворачивает историю по хозяйствам, сезонам и культурам в одном
+процессе и в нескольких, проверяет совпадение итогов и выводит
+ускорение.
+
+Запуск:
+    python -m benchmarks.bench_grouped [количество записей] [количество процессов]
+"""
+import os
+import random
+import sys
+import time
+
+from src.utils.grouped import aggregate_grouped
+
+from .bench_crop_construction import CULTURES
+
+FARMS = tuple(f"Хозяйство {i}" for i in range(40))
+SEASONS = tuple(str(year) for year in range(2000, 2025))
+
+
+def make_history(count: int, seed: int = 1):
+    """Создает тестовую историю (хозяйство, сезон, культура, площадь, урожайность)."""
+    rng = random.Random(seed)
+    return [
+        (rng.choice(FARMS), rng.choice(SEASONS), rng.choice(CULTURES),
+         rng.uniform(0.5, 200.0), rng.uniform(0.5, 9.0))
+        for _ in range(count)
+    ]
+
+
+def main() -> int:
+    """Запуск замера."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    records = make_history(count)
+
+    start = time.perf_counter()
+    single = aggregate_grouped(records, workers=1)
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = aggregate_grouped(records, workers=workers,
+                                 chunk_size=max(1, count // (workers * 4)))
+    parallel_time = time.perf_counter() - start
+
+    same = single.keys() == parallel.keys() and all(
+        (totals.count, totals.area, totals.harvest)
+        == (parallel[key].count, parallel[key].area, parallel[key].harvest)
+        for key, totals in single.items()
+    )
+
+    print(f"Записей: {count}, групп: {len(single)}")
+    print(f"  1 процесс:      {single_time:8.3f} с")
+    print(f"  {workers} процесс(ов): {parallel_time:8.3f} с  (x{single_time / parallel_time:.1f})")
+    print(f"  Итоги совпадают: {'да' if same else 'НЕТ'}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
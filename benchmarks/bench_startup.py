@@ -0,0 +1,126 @@
+"""
+Замер времени холодного запуска.
+
+Каждый замер выполняется в отдельном процессе интерпретатора:
+- время импорта пакетов для консольного и графического режима;
+- полное время работы консольного режима на небольшом файле;
+- время до первого кадра графического окна (если есть дисплей).
+
+Запуск:
+    python -m benchmarks.bench_startup [--repeat N] [--max-import-ms MS] [--json]
+
+С параметром --max-import-ms замер завершается с кодом 1, если
+импорт консольного режима медленнее порога.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Импорт модуля с замером времени внутри нового процесса
+IMPORT_SCRIPT = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+# Время до первого кадра: создание окна и обработка событий отрисовки
+FIRST_FRAME_SCRIPT = """
+import time
+start = time.perf_counter()
+import tkinter
+try:
+    from src.gui import HarvestApp
+    app = HarvestApp(store_path=':memory:')
+except tkinter.TclError:
+    print(-1)
+else:
+    app.update()
+    print((time.perf_counter() - start) * 1000)
+    app.destroy()
+"""
+
+
+def run_python(code: str, *args: str) -> Optional[float]:
+    """Выполняет код в новом процессе и возвращает напечатанное число."""
+    result = subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    value = float(result.stdout.strip().splitlines()[-1])
+    return None if value < 0 else value
+
+
+def process_time(args: List[str]) -> float:
+    """Возвращает полное время работы процесса в миллисекундах."""
+    code = ("import subprocess, sys, time; start = time.perf_counter(); "
+            "subprocess.run([sys.executable] + sys.argv[1:], stdout=subprocess.DEVNULL); "
+            "print((time.perf_counter() - start) * 1000)")
+    return run_python(code, *args)
+
+
+def best_of(repeat: int, func, *args) -> Optional[float]:
+    """Лучший результат из нескольких запусков (None - замер недоступен)."""
+    results = [func(*args) for _ in range(repeat)]
+    results = [value for value in results if value is not None]
+    return min(results) if results else None
+
+
+def measure(repeat: int) -> Dict[str, Optional[float]]:
+    """
+    Выполняет все замеры запуска.
+
+    Args:
+        repeat: Количество повторов каждого замера
+
+    Returns:
+        Dict[str, Optional[float]]: Время в миллисекундах по замерам
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as f:
+        f.write("Пшеница,10,3.5\nЯчмень,5,2.8\n")
+        sample = f.name
+    try:
+        return {
+            "import_src_ms": best_of(repeat, run_python, IMPORT_SCRIPT.format(module="src")),
+            "import_cli_ms": best_of(repeat, run_python, IMPORT_SCRIPT.format(module="src.cli")),
+            "import_gui_ms": best_of(repeat, run_python,
+                                     IMPORT_SCRIPT.format(module="src.gui.main_window")),
+            "batch_run_ms": best_of(repeat, process_time,
+                                    [os.path.join(ROOT, "main.py"), "--batch", sample]),
+            "gui_first_frame_ms": best_of(repeat, run_python, FIRST_FRAME_SCRIPT),
+        }
+    finally:
+        os.remove(sample)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Запуск замера."""
+    parser = argparse.ArgumentParser(description="Замер времени холодного запуска")
+    parser.add_argument("--repeat", type=int, default=5, help="количество повторов")
+    parser.add_argument("--max-import-ms", type=float, default=None,
+                        help="порог времени импорта консольного режима")
+    parser.add_argument("--json", action="store_true", help="вывод в формате JSON")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, value in results.items():
+            shown = "недоступно" if value is None else f"{value:8.1f} мс"
+            print(f"  {name:20s} {shown}")
+
+    if args.max_import_ms is not None:
+        value = results["import_cli_ms"]
+        if value is None or value > args.max_import_ms:
+            print(f"Импорт консольного режима медленнее {args.max_import_ms} мс", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Набор замеров горячих путей модели и расчетов.
+
+Замеры:
+- crop_init: создание культур конструктором Crop по одной;
+- crop_from_rows: пакетное создание через Crop.from_rows;
+- validate_data: проверка данных Crop._validate_data;
+- total_list: calculate_total_season_harvest для списка Crop;
+- total_table: calculate_total_season_harvest для CropTable;
+- load_exact: загрузка в CropTable с точными итогами ExactTotals;
+- total_exact: exact_season_harvest по целочисленной колонке;
+- snapshot_save: сохранение CropTable в двоичный снимок;
+- snapshot_load: загрузка двоичного снимка в CropTable;
+- scenario_simulate: 10 000 прогонов Монте-Карло итога сезона
+  (ScenarioEngine с разбросом по культурам и по участкам);
+- crop_str: форматирование через Crop.__str__;
+- list_format: форматирование строк списка format_crop_row;
+- gui_insert: загрузка строк в VirtualCropList пакетами, как при
+  импорте (требует дисплей, иначе пропускается).
+
+Результаты можно сохранить как базовые (JSON) и сравнить с ними
+последующий запуск: замеры, ставшие медленнее порога, отмечаются
+как регрессии, а код возврата становится равным 1.
+
+Запуск:
+    python -m benchmarks.suite [--sizes 1000 100000] [--save base.json]
+    python -m benchmarks.suite --compare base.json [--tolerance 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.models import Crop, CropTable
+from src.utils import calculate_total_season_harvest
+
+from .bench_crop_construction import make_rows
+
+# Размеры по умолчанию (10^6 и 10^7 задаются явно через --sizes)
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+# Допустимое замедление относительно базового замера
+DEFAULT_TOLERANCE = 0.10
+
+# Замеры короче этого времени не сравниваются (слишком велик шум)
+MIN_COMPARED_TIME = 0.001
+
+# Размер пакета при загрузке в список (как при импорте CSV)
+GUI_CHUNK = 4096
+
+
+def _setup_crop_init(rows) -> Callable[[], object]:
+    return lambda: [Crop(name, area, y) for name, area, y in rows]
+
+
+def _setup_crop_from_rows(rows) -> Callable[[], object]:
+    return lambda: Crop.from_rows(rows)
+
+
+def _setup_validate_data(rows) -> Callable[[], object]:
+    crops = Crop.from_rows(rows, validate=False)[0]
+    return lambda: [crop._validate_data() for crop in crops]
+
+
+def _setup_total_list(rows) -> Callable[[], object]:
+    crops = Crop.from_rows(rows, validate=False)[0]
+    return lambda: calculate_total_season_harvest(crops)
+
+
+def _setup_total_table(rows) -> Callable[[], object]:
+    table = CropTable()
+    table.extend_rows(rows, validate=False)
+    return lambda: calculate_total_season_harvest(table)
+
+
+def _setup_load_exact(rows) -> Callable[[], object]:
+    from src.utils import ExactTotals
+
+    def run():
+        table = CropTable()
+        ExactTotals(table)
+        table.extend_rows(rows, validate=False)
+
+    return run
+
+
+def _setup_total_exact(rows) -> Callable[[], object]:
+    from src.utils import ExactTotals, exact_season_harvest
+
+    table = CropTable()
+    exact = ExactTotals(table)
+    table.extend_rows(rows, validate=False)
+    return lambda: exact_season_harvest(exact)
+
+
+def _setup_snapshot_save(rows) -> Callable[[], object]:
+    from src.storage import save_snapshot
+
+    table = CropTable()
+    table.extend_rows(rows, validate=False)
+    path = os.path.join(tempfile.mkdtemp(), "bench.hrvs")
+    return lambda: save_snapshot(table, path)
+
+
+def _setup_snapshot_load(rows) -> Callable[[], object]:
+    from src.storage import load_snapshot, save_snapshot
+
+    table = CropTable()
+    table.extend_rows(rows, validate=False)
+    path = os.path.join(tempfile.mkdtemp(), "bench.hrvs")
+    save_snapshot(table, path)
+    return lambda: load_snapshot(path)
+
+
+def _setup_scenario_simulate(rows) -> Callable[[], object]:
+    from src.utils.scenarios import ScenarioEngine, YieldDistribution
+
+    table = CropTable()
+    table.extend_rows(rows, validate=False)
+    dist = YieldDistribution(sd=0.1, plot_sd=0.2)
+    return lambda: ScenarioEngine(table).simulate(runs=10_000, default=dist, seed=1)
+
+
+def _setup_crop_str(rows) -> Callable[[], object]:
+    crops = Crop.from_rows(rows, validate=False)[0]
+    return lambda: [str(crop) for crop in crops]
+
+
+def _setup_list_format(rows) -> Callable[[], object]:
+    from src.gui.crop_list import format_crop_row
+
+    crops = Crop.from_rows(rows, validate=False)[0]
+    return lambda: [
+        format_crop_row(crop.name, crop.area, crop.yield_per_hectare, crop.total_harvest)
+        for crop in crops
+    ]
+
+
+def _setup_gui_insert(rows) -> Optional[Callable[[], object]]:
+    try:
+        import tkinter as tk
+    except ImportError:
+        return None
+    from src.gui.crop_list import VirtualCropList
+    from src.gui.main_window import HarvestApp
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        # Нет дисплея
+        return None
+    root.withdraw()
+
+    def run():
+        view = VirtualCropList(root, CropTable(), HarvestApp.COLORS)
+        for start in range(0, len(rows), GUI_CHUNK):
+            view.table.extend_rows(rows[start:start + GUI_CHUNK], validate=False)
+            view.invalidate()
+            view.see(len(view.table) - 1)
+            root.update_idletasks()
+        view.destroy()
+
+    return run
+
+
+# Замеры: название -> подготовка (возвращает замеряемую функцию или None)
+CASES: Dict[str, Callable] = {
+    'crop_init': _setup_crop_init,
+    'crop_from_rows': _setup_crop_from_rows,
+    'validate_data': _setup_validate_data,
+    'total_list': _setup_total_list,
+    'total_table': _setup_total_table,
+    'load_exact': _setup_load_exact,
+    'total_exact': _setup_total_exact,
+    'snapshot_save': _setup_snapshot_save,
+    'snapshot_load': _setup_snapshot_load,
+    'scenario_simulate': _setup_scenario_simulate,
+    'crop_str': _setup_crop_str,
+    'list_format': _setup_list_format,
+    'gui_insert': _setup_gui_insert,
+}
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """Лучшее время из нескольких запусков в секундах."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_suite(sizes: List[int], cases: Optional[List[str]] = None, repeat: int = 3) -> dict:
+    """
+    Выполняет замеры для всех размеров.
+
+    Args:
+        sizes: Количество записей для замеров
+        cases: Названия замеров (None - все)
+        repeat: Количество повторов (берется лучший результат)
+
+    Returns:
+        dict: Результаты {"meta": {...}, "results": {замер: {размер: секунды}}}
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        rows = make_rows(size)
+        for name in cases or CASES:
+            func = CASES[name](rows)
+            if func is None:
+                continue
+            results.setdefault(name, {})[str(size)] = best_time(func, repeat)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Сравнивает результаты с базовыми.
+
+    Args:
+        current: Результаты текущего запуска
+        baseline: Базовые результаты
+        tolerance: Допустимое относительное замедление
+
+    Замеры короче MIN_COMPARED_TIME не сравниваются.
+
+    Returns:
+        List[str]: Описания регрессий (пустой список - регрессий нет)
+    """
+    regressions = []
+    for name, sizes in current["results"].items():
+        base_sizes = baseline["results"].get(name, {})
+        for size, elapsed in sizes.items():
+            base = base_sizes.get(size)
+            if base and base >= MIN_COMPARED_TIME and elapsed > base * (1 + tolerance):
+                regressions.append(
+                    f"{name} [{size}]: {base:.4f} с -> {elapsed:.4f} с "
+                    f"(+{(elapsed / base - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def format_results(current: dict, baseline: Optional[dict] = None) -> str:
+    """Форматирует результаты в виде таблицы (с изменением к базовым)."""
+    lines = []
+    for name, sizes in current["results"].items():
+        for size, elapsed in sizes.items():
+            line = f"  {name:16s} {int(size):>10d} {elapsed:10.4f} с"
+            base = baseline["results"].get(name, {}).get(size) if baseline else None
+            if base:
+                line += f"  ({(elapsed / base - 1) * 100:+.0f}%)"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Запуск набора замеров."""
+    parser = argparse.ArgumentParser(description="Замеры горячих путей модели и расчетов")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="количество записей (например 1000 10000000)")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=None,
+                        help="выполнить только указанные замеры")
+    parser.add_argument("--repeat", type=int, default=3, help="количество повторов")
+    parser.add_argument("--save", metavar="FILE", help="сохранить результаты как базовые")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с базовыми результатами")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="допустимое замедление (0.1 - на 10%%)")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.sizes, args.cases, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(format_results(current, baseline))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print("\nРегрессии:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nРегрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
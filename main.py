@@ -2,29 +2,42 @@
 Главный файл запуска приложения "Учет урожая".
 
 Точка входа в приложение для ведения учета урожая различных культур.
+Без аргументов запускает графический интерфейс, с аргументами
+(например, --batch season.csv) - консольный режим без tkinter.
 """
 import sys
 
-# Проверка наличия tkinter
-try:
-    import tkinter as tk
-except ImportError:
-    print("Ошибка: tkinter не установлен!")
-    print("\nДля установки tkinter на macOS выполните:")
-    print("  brew install python-tk")
-    print("\nИли используйте Python с официального сайта python.org,")
-    print("который включает tkinter по умолчанию.")
-    sys.exit(1)
 
-from src.gui import HarvestApp
+def run_gui() -> int:
+    """Запуск графического интерфейса."""
+    # Проверка наличия tkinter
+    try:
+        import tkinter  # noqa: F401
+    except ImportError:
+        print("Ошибка: tkinter не установлен!")
+        print("\nДля установки tkinter на macOS выполните:")
+        print("  brew install python-tk")
+        print("\nИли используйте Python с официального сайта python.org,")
+        print("который включает tkinter по умолчанию.")
+        print("\nБез графического интерфейса доступен консольный режим:")
+        print("  python main.py --batch season.csv")
+        return 1
 
+    from src.gui import HarvestApp
 
-def main():
-    """Главная функция запуска приложения."""
     app = HarvestApp()
     app.mainloop()
+    return 0
 
 
-if __name__ == "__main__":
-    main()
+def main():
+    """Главная функция запуска приложения."""
+    if len(sys.argv) > 1:
+        # Консольный режим: tkinter не импортируется
+        from src.cli import main as cli_main
+        return cli_main(sys.argv[1:])
+    return run_gui()
+
 
+if __name__ == "__main__":
+    sys.exit(main())
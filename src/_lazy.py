@@ -0,0 +1,41 @@
+"""
+Ленивая загрузка подмодулей пакетов (PEP 562).
+
+Пакеты приложения не импортируют подмодули при загрузке: имя
+загружается из своего подмодуля при первом обращении к нему.
+Это ускоряет запуск и не тянет графический интерфейс и тяжелые
+зависимости туда, где они не нужны (например, в консольный режим).
+"""
+import importlib
+from typing import Callable, Dict, List, Tuple
+
+
+def attach(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable, List[str]]:
+    """
+    Создает __getattr__, __dir__ и __all__ для ленивого пакета.
+
+    Args:
+        package: Имя пакета (__name__)
+        exports: Экспортируемое имя -> относительное имя подмодуля
+
+    Returns:
+        Tuple[Callable, Callable, List[str]]: Функции __getattr__,
+        __dir__ и список __all__
+
+    Example:
+        >>> __getattr__, __dir__, __all__ = attach(__name__, {'Crop': '.crop'})
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, package), name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__, list(exports)
@@ -0,0 +1,317 @@
+"""
+Консольный (пакетный) режим приложения.
+
+Позволяет считать итоги урожая по CSV/TSV файлам без графического
+интерфейса, например на сервере. Модуль не импортирует tkinter.
+
+Пример:
+    python main.py --batch season.csv --report json
+    cat season.csv | python main.py --batch - --report text
+    python main.py --batch season.csv --export season.jsonl.gz
+    python main.py --batch season.csv --metrics metrics.json --profile
+    python main.py --batch season.csv --scenario "засуха: *=-20%" --simulate 10000 --yield-sd 0.1
+"""
+import argparse
+import json
+import sys
+from typing import TYPE_CHECKING, Dict, List, Optional, TextIO
+
+from .models.crop import split_columns
+from .models.totals import RunningTotals
+from .utils.fixed_point import columns_to_units, units_to_kg
+from .utils import metrics
+from .utils.importer import ImportReport, iter_record_chunks, iter_rows
+
+if TYPE_CHECKING:
+    from .utils.export import ExportWriter
+
+# Сколько ошибок выводить в stderr
+SHOWN_ERRORS = 20
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Создает разбор аргументов командной строки.
+
+    Returns:
+        argparse.ArgumentParser: Настроенный разбор аргументов
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Учет урожая: расчет итогов по CSV/TSV файлам без графического интерфейса."
+    )
+    parser.add_argument(
+        "--batch", metavar="FILE", action="append", required=True,
+        help="CSV/TSV файл с колонками name, area, yield_per_hectare ('-' - стандартный ввод); "
+             "можно указать несколько раз"
+    )
+    parser.add_argument(
+        "--report", choices=("text", "json"), default="text",
+        help="формат отчета (по умолчанию text)"
+    )
+    parser.add_argument(
+        "--delimiter", default=None,
+        help="разделитель колонок (по умолчанию определяется автоматически)"
+    )
+    parser.add_argument(
+        "--export", metavar="FILE", default=None,
+        help="выгрузить записи и итоги по культурам в CSV/JSONL/XLSX "
+             "(формат по расширению, .gz - сжатие gzip)"
+    )
+    parser.add_argument(
+        "--exact", action="store_true",
+        help="дополнительно считать урожай точно, в целых килограммах"
+    )
+    parser.add_argument(
+        "--metrics", metavar="FILE", default=None,
+        help="сохранить замеры горячих путей в JSON ('-' - текстом в stderr)"
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="добавить к замерам профиль cProfile и трассировку памяти tracemalloc"
+    )
+    parser.add_argument(
+        "--scenario", metavar="SPEC", action="append", default=[],
+        help="посчитать итог в сценарии «[название:] культура=множитель; ...» "
+             "(множитель 0.8 или -20%%, '*' - остальные культуры); можно указать несколько раз"
+    )
+    parser.add_argument(
+        "--simulate", metavar="RUNS", type=int, default=0,
+        help="оценить итог методом Монте-Карло за RUNS прогонов"
+    )
+    parser.add_argument(
+        "--yield-sd", type=float, default=0.1,
+        help="стандартное отклонение множителя урожайности для --simulate (по умолчанию 0.1)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="начальное значение генератора для --simulate"
+    )
+    parser.add_argument(
+        "--encoding", default="utf-8-sig",
+        help="кодировка входных файлов (по умолчанию utf-8-sig)"
+    )
+    return parser
+
+
+@metrics.timed("cli.accumulate")
+def accumulate(stream: TextIO, totals: RunningTotals, report: ImportReport,
+               delimiter: Optional[str] = None,
+               exact: Optional[Dict[str, int]] = None,
+               writer: Optional['ExportWriter'] = None) -> None:
+    """
+    Потоково учитывает записи из текстового потока в итогах.
+
+    Записи не сохраняются: каждый пакет сразу сворачивается в итоги,
+    поэтому память не зависит от размера входных данных.
+
+    Args:
+        stream: Текстовый поток с CSV/TSV данными
+        totals: Накопитель итогов
+        report: Отчет, в который записываются ошибки
+        delimiter: Разделитель колонок (None - определить автоматически)
+        exact: Точный урожай по культурам в единицах 0.01 кг
+            (None - точный расчет не нужен)
+        writer: Писатель экспорта, в который передаются записи
+            (None - без экспорта)
+    """
+    for chunk in iter_record_chunks(iter_rows(stream, delimiter), report):
+        metrics.count("cli.records", len(chunk))
+        names, areas, yields = split_columns(chunk)
+        harvests = [area * y for area, y in zip(areas, yields)]
+        totals.add_batch(names, areas, harvests)
+        report.imported += len(chunk)
+        if writer is not None:
+            writer.write_crops(names, areas, yields, harvests)
+        if exact is not None:
+            for name, units in zip(names, columns_to_units(areas, yields)[2]):
+                exact[name] = exact.get(name, 0) + units
+
+
+def build_summary(totals: RunningTotals, report: ImportReport,
+                  exact: Optional[Dict[str, int]] = None) -> dict:
+    """
+    Формирует итоговый отчет.
+
+    Args:
+        totals: Накопитель итогов
+        report: Отчет об импорте
+        exact: Точный урожай по культурам в единицах 0.01 кг (None - не считался)
+
+    Returns:
+        dict: Итоги сезона и разбивка по культурам
+    """
+    harvest = totals.harvest_by_name()
+    area = totals.area_by_name()
+    count = totals.count_by_name()
+    cultures = {
+        name: {
+            "count": count[name],
+            "area": area[name],
+            "total_harvest": harvest[name],
+            "yield_per_hectare": harvest[name] / area[name] if area[name] else 0.0,
+        }
+        for name in sorted(harvest, key=harvest.get, reverse=True)
+    }
+    summary = {
+        "count": totals.count,
+        "total_area": totals.total_area,
+        "total_harvest": totals.total_harvest,
+        "yield_per_hectare": totals.total_harvest / totals.total_area if totals.total_area else 0.0,
+        "errors": report.failed,
+        "cultures": cultures,
+    }
+    if exact is not None:
+        summary["total_harvest_kg"] = units_to_kg(sum(exact.values()))
+        for name, culture in cultures.items():
+            culture["total_harvest_kg"] = units_to_kg(exact[name])
+    return summary
+
+
+def add_scenarios(summary: dict, totals: RunningTotals, scenarios: List[str],
+                  runs: int = 0, yield_sd: float = 0.1, seed: Optional[int] = None) -> None:
+    """
+    Добавляет в отчет итоги сценариев и полосы итога по методу Монте-Карло.
+
+    Args:
+        summary: Отчет из build_summary
+        totals: Накопитель итогов
+        scenarios: Записи сценариев (см. parse_scenario)
+        runs: Количество прогонов Монте-Карло (0 - не считать)
+        yield_sd: Стандартное отклонение множителя урожайности
+        seed: Начальное значение генератора
+
+    Raises:
+        ValueError: Если запись сценария не удается разобрать
+    """
+    from .utils.scenarios import ScenarioEngine, YieldDistribution, parse_scenario
+
+    engine = ScenarioEngine(totals)
+    if scenarios:
+        summary["scenarios"] = {
+            scenario.name: engine.evaluate(scenario)
+            for scenario in map(parse_scenario, scenarios)
+        }
+    if runs > 0:
+        result = engine.simulate(runs=runs, default=YieldDistribution(sd=yield_sd), seed=seed)
+        summary["simulation"] = {
+            "runs": result.runs,
+            "seed": result.seed,
+            "mean": result.mean,
+            "sd": result.sd,
+            "percentiles": {str(level): value for level, value in result.bands().items()},
+        }
+
+
+def format_text(summary: dict) -> str:
+    """
+    Форматирует отчет в виде текста.
+
+    Args:
+        summary: Отчет из build_summary
+
+    Returns:
+        str: Текст отчета
+    """
+    lines = [
+        f"Записей: {summary['count']}",
+        f"Общая площадь: {summary['total_area']:.2f} га",
+        f"Общий урожай за сезон: {summary['total_harvest']:.2f} т",
+        f"Средняя урожайность: {summary['yield_per_hectare']:.2f} т/га",
+    ]
+    if 'total_harvest_kg' in summary:
+        lines.append(f"Общий урожай (точно): {summary['total_harvest_kg']} кг")
+    if summary['errors']:
+        lines.append(f"Строк с ошибками: {summary['errors']}")
+    for name, total in summary.get('scenarios', {}).items():
+        lines.append(f"Сценарий «{name}»: {total:.2f} т")
+    if 'simulation' in summary:
+        simulation = summary['simulation']
+        bands = ", ".join(f"P{level}: {value:.2f}" for level, value in simulation['percentiles'].items())
+        lines.append(f"Монте-Карло ({simulation['runs']} прогонов): "
+                     f"{simulation['mean']:.2f} ± {simulation['sd']:.2f} т ({bands})")
+    if summary['cultures']:
+        lines.append("")
+        lines.append("По культурам:")
+        for name, culture in summary['cultures'].items():
+            line = (
+                f"  {name:20s} │ {culture['count']:>8d} зап. │ "
+                f"{culture['area']:>12.2f} га │ {culture['total_harvest']:>14.2f} т"
+            )
+            if 'total_harvest_kg' in culture:
+                line += f" │ {culture['total_harvest_kg']:>14d} кг"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Запуск консольного режима.
+
+    Args:
+        argv: Аргументы командной строки (None - sys.argv[1:])
+
+    Returns:
+        int: Код возврата (0 - успех, 1 - ошибка чтения входных данных)
+    """
+    args = build_parser().parse_args(argv)
+    if args.metrics or args.profile:
+        metrics.enable(profile=args.profile, trace_memory=args.profile)
+    totals = RunningTotals()
+    report = ImportReport(max_errors=SHOWN_ERRORS)
+    exact: Optional[Dict[str, int]] = {} if args.exact else None
+
+    writer = None
+    if args.export:
+        from .utils.export import culture_rows, open_writer
+        try:
+            writer = open_writer(args.export)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка: не удалось создать {args.export}: {e}", file=sys.stderr)
+            return 1
+
+    try:
+        for source in args.batch:
+            try:
+                if source == "-":
+                    accumulate(sys.stdin, totals, report, args.delimiter, exact, writer)
+                else:
+                    with open(source, newline='', encoding=args.encoding) as stream:
+                        accumulate(stream, totals, report, args.delimiter, exact, writer)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Ошибка: не удалось прочитать {source}: {e}", file=sys.stderr)
+                return 1
+        if writer is not None:
+            writer.write_cultures(culture_rows(totals))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    for error in report.errors:
+        print(error, file=sys.stderr)
+    if report.dropped_errors:
+        print(f"... и еще ошибок: {report.dropped_errors}", file=sys.stderr)
+
+    summary = build_summary(totals, report, exact)
+    if args.scenario or args.simulate:
+        try:
+            add_scenarios(summary, totals, args.scenario, args.simulate, args.yield_sd, args.seed)
+        except ValueError as e:
+            print(f"Ошибка: {e}", file=sys.stderr)
+            return 1
+    if args.report == "json":
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print(format_text(summary))
+
+    if args.metrics or args.profile:
+        metrics.disable()
+        if args.metrics and args.metrics != "-":
+            try:
+                metrics.dump_json(args.metrics)
+            except OSError as e:
+                print(f"Ошибка: не удалось сохранить замеры {args.metrics}: {e}", file=sys.stderr)
+                return 1
+        else:
+            print(metrics.format_report(), file=sys.stderr)
+    return 0
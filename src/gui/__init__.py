@@ -1,7 +1,18 @@
 """
 Модуль графического интерфейса приложения.
+
+Подмодули (и сам tkinter) загружаются лениво при первом обращении
+к имени, поэтому импорт пакета src не тянет графический интерфейс.
 """
-from .main_window import HarvestApp
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
 
-__all__ = ['HarvestApp']
+if TYPE_CHECKING:
+    from .crop_list import VirtualCropList
+    from .main_window import HarvestApp
 
+__getattr__, __dir__, __all__ = attach(__name__, {
+    'HarvestApp': '.main_window',
+    'VirtualCropList': '.crop_list',
+})
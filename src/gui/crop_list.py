@@ -0,0 +1,385 @@
+"""
+Виртуализированный список культур.
+
+Содержит виджет, который отображает только видимое окно строк
+таблицы CropTable. Строки форматируются по требованию при прокрутке,
+поэтому скорость работы не зависит от количества культур. Список
+может показывать только строки, отобранные фильтром (например,
+запросом к индексам CropIndex).
+"""
+import tkinter as tk
+import tkinter.font as tkfont
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ..models.crop_table import CropTable
+from ..models.query import CropIndex
+from ..utils import metrics
+
+# Колонки списка: (ключ сортировки, заголовок, ширина в символах)
+COLUMNS = (
+    ('name', "Культура", 23),
+    ('area', "Площадь", 13),
+    ('yield_per_hectare', "Урожайность", 14),
+    ('total_harvest', "Урожай", 11),
+)
+
+ROW_FONT = ("Consolas", 10)
+
+
+def format_crop_row(name: str, area: float, yield_per_hectare: float,
+                    total_harvest: float) -> str:
+    """
+    Форматирует строку списка культур.
+
+    Args:
+        name: Название культуры
+        area: Площадь посева в гектарах
+        yield_per_hectare: Урожайность в тоннах на гектар
+        total_harvest: Общий урожай в тоннах
+
+    Returns:
+        str: Строка для отображения в списке
+    """
+    return (
+        f"{name:20s} │ "
+        f"{area:>7.2f} га × "
+        f"{yield_per_hectare:>6.2f} т/га = "
+        f"{total_harvest:>8.2f} т"
+    )
+
+
+class VirtualCropList(tk.Frame):
+    """
+    Список культур с отрисовкой только видимых строк.
+
+    Listbox содержит ровно столько строк, сколько помещается на экране.
+    При прокрутке строки заново форматируются из колонок таблицы.
+    Щелчок по заголовку колонки сортирует список (повторный щелчок
+    меняет направление сортировки).
+    """
+
+    def __init__(self, parent, table: CropTable, colors: Dict[str, str],
+                 index: Optional[CropIndex] = None):
+        """
+        Инициализация списка.
+
+        Args:
+            parent: Родительский виджет
+            table: Таблица культур, из которой берутся строки
+            colors: Цветовая палитра приложения
+            index: Индексы таблицы для сортировки без полного пересчета
+        """
+        super().__init__(parent, bg=colors['bg_card'])
+        self.table = table
+        self.colors = colors
+        self.index = index
+
+        self._offset = 0                       # Первая видимая позиция
+        self._visible = 12                     # Количество видимых строк
+        self._order: Optional[List[int]] = None  # Порядок строк (None - исходный)
+        self._sort_key: Optional[str] = None
+        self._sort_reverse = False
+        self._order_valid = True
+        self._filter: Optional[Callable[[], Sequence[int]]] = None  # Источник отобранных строк
+        self._selected: Optional[int] = None   # Номер выбранной строки таблицы
+        # Высота строки Listbox: межстрочный интервал шрифта плюс 1 пиксель
+        self._row_height = tkfont.Font(font=ROW_FONT).metrics('linespace') + 1
+
+        self._create_header()
+        self._create_body()
+        table.subscribe(self._on_table_change)
+
+    def destroy(self) -> None:
+        """Отписка от изменений таблицы при закрытии списка."""
+        self.table.unsubscribe(self._on_table_change)
+        super().destroy()
+
+    def _create_header(self) -> None:
+        """Создание строки заголовков с сортировкой по щелчку."""
+        header = tk.Frame(self, bg=self.colors['bg_card'])
+        header.pack(fill=tk.X, pady=(0, 4))
+
+        self._header_labels: Dict[str, tk.Label] = {}
+        for key, title, width in COLUMNS:
+            label = tk.Label(
+                header,
+                text=title,
+                font=(ROW_FONT[0], ROW_FONT[1], "bold"),
+                fg=self.colors['text_secondary'],
+                bg=self.colors['bg_card'],
+                cursor="hand2",
+                width=width,
+                anchor="w",
+                padx=0
+            )
+            label.pack(side=tk.LEFT)
+            label.bind("<Button-1>", lambda e, k=key: self.sort_by(k))
+            self._header_labels[key] = label
+
+    def _create_body(self) -> None:
+        """Создание области строк и полосы прокрутки."""
+        body = tk.Frame(self, bg=self.colors['bg_card'])
+        body.pack(fill=tk.BOTH, expand=True)
+
+        self.scrollbar = tk.Scrollbar(
+            body,
+            command=self._on_scrollbar,
+            bg=self.colors['bg_input'],
+            troughcolor=self.colors['bg_main'],
+            activebackground=self.colors['accent_blue'],
+            width=14,
+            relief=tk.FLAT
+        )
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox = tk.Listbox(
+            body,
+            font=ROW_FONT,
+            height=self._visible,
+            bg=self.colors['bg_input'],
+            fg=self.colors['text_primary'],
+            selectbackground=self.colors['accent_blue'],
+            selectforeground="white",
+            relief=tk.FLAT,
+            bd=1,
+            highlightthickness=1,
+            highlightbackground=self.colors['border'],
+            activestyle='none',
+            exportselection=False
+        )
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(3))
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
+        self.listbox.bind("<Prior>", lambda e: self.scroll(-self._visible))
+        self.listbox.bind("<Next>", lambda e: self.scroll(self._visible))
+
+    # ========== ПОРЯДОК СТРОК ==========
+
+    def _rows(self) -> Sequence[int]:
+        """Номера строк таблицы в порядке отображения."""
+        if self._sort_key is None and self._filter is None:
+            return range(len(self.table))
+        if not self._order_valid or self._order is None:
+            rows = None if self._filter is None else self._filter()
+            if self._sort_key is None:
+                self._order = list(rows)
+            else:
+                self._order = self._sorted_rows(self._sort_key, self._sort_reverse, rows)
+            self._order_valid = True
+        return self._order
+
+    def _sorted_rows(self, key: str, reverse: bool,
+                     rows: Optional[Sequence[int]] = None) -> List[int]:
+        """Сортирует номера строк таблицы (все или отобранные) по колонке."""
+        if rows is None and self.index is not None and key != 'name':
+            # Порядок всей таблицы уже есть в отсортированном индексе
+            order = self.index.ordered(key).tolist()
+            return order[::-1] if reverse else order
+        if key == 'name':
+            getter: Callable[[int], object] = self.table.name_at
+        else:
+            getter = getattr(self.table, key).__getitem__
+        if rows is None:
+            rows = range(len(self.table))
+        return sorted(rows, key=getter, reverse=reverse)
+
+    def set_filter(self, source: Optional[Callable[[], Sequence[int]]]) -> None:
+        """
+        Показывает только отобранные строки.
+
+        Источник вызывается заново после каждого изменения таблицы
+        (invalidate), поэтому отбор остается актуальным.
+
+        Args:
+            source: Функция, возвращающая номера отобранных строк
+                (None - показывать все строки)
+        """
+        self._filter = source
+        self._offset = 0
+        self._order_valid = False
+        self.refresh()
+
+    def visible_count(self) -> int:
+        """
+        Количество строк, показываемых с учетом фильтра.
+
+        Returns:
+            int: Количество строк
+        """
+        return len(self._rows())
+
+    def sort_by(self, key: str) -> None:
+        """
+        Сортирует список по колонке.
+
+        Повторный вызов для той же колонки меняет направление сортировки.
+
+        Args:
+            key: Ключ колонки из COLUMNS
+        """
+        if self._sort_key == key:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_key = key
+            self._sort_reverse = False
+        self._order_valid = False
+
+        for column, title, _ in COLUMNS:
+            arrow = ""
+            if column == key:
+                arrow = " ▼" if self._sort_reverse else " ▲"
+            self._header_labels[column].config(text=title + arrow)
+
+        self.refresh()
+
+    def invalidate(self) -> None:
+        """Сообщает списку, что данные таблицы изменились."""
+        self._order_valid = False
+        if self._selected is not None and self._selected >= len(self.table):
+            self._selected = None
+
+    # ========== ОТРИСОВКА ==========
+
+    @metrics.timed("gui.list_refresh")
+    def refresh(self) -> None:
+        """Перерисовывает видимое окно строк."""
+        rows = self._rows()
+        total = len(rows)
+        self._offset = max(0, min(self._offset, total - self._visible))
+
+        table = self.table
+        names = table.names
+        codes = table.name_codes
+        window = rows[self._offset:self._offset + self._visible]
+        lines = [
+            format_crop_row(names[codes[i]], table.area[i],
+                            table.yield_per_hectare[i], table.total_harvest[i])
+            for i in window
+        ]
+
+        self.listbox.delete(0, tk.END)
+        if lines:
+            self.listbox.insert(0, *lines)
+            metrics.count("gui.list_rows", len(lines))
+        if self._selected is not None and self._selected in window:
+            self.listbox.selection_set(window.index(self._selected))
+
+        if total:
+            first = self._offset / total
+            last = min(1.0, (self._offset + self._visible) / total)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def see(self, index: int) -> None:
+        """
+        Прокручивает список так, чтобы строка таблицы была видна.
+
+        Args:
+            index: Номер строки таблицы
+        """
+        position = self._position_of(index, self._rows())
+        if position < 0:
+            pass  # Строка скрыта фильтром
+        elif position < self._offset:
+            self._offset = position
+        elif position >= self._offset + self._visible:
+            self._offset = position - self._visible + 1
+        self.refresh()
+
+    def scroll(self, delta: int) -> None:
+        """
+        Прокручивает список на заданное количество строк.
+
+        Args:
+            delta: Смещение в строках (отрицательное - вверх)
+        """
+        self._offset += delta
+        self.refresh()
+
+    def selected_index(self) -> Optional[int]:
+        """
+        Возвращает номер выбранной строки таблицы.
+
+        Returns:
+            Optional[int]: Номер строки таблицы или None, если ничего не выбрано
+        """
+        return self._selected
+
+    # ========== ОБРАБОТЧИКИ СОБЫТИЙ ==========
+
+    def _on_table_change(self, event: str, *args) -> None:
+        """Сдвиг выбранной строки вслед за вставкой и удалением строк таблицы."""
+        selected = self._selected
+        if selected is None:
+            return
+        if event == 'insert':
+            start, stop = args
+            if selected >= start:
+                self._selected = selected + stop - start
+        elif event == 'remove':
+            row = args[0]
+            if selected == row:
+                self._selected = None
+            elif selected > row:
+                self._selected = selected - 1
+        elif event == 'clear':
+            self._selected = None
+
+    def _on_scrollbar(self, action: str, value: str, unit: Optional[str] = None) -> None:
+        """Обработка команд полосы прокрутки (moveto / scroll)."""
+        if action == 'moveto':
+            self._offset = int(float(value) * len(self._rows()))
+            self.refresh()
+        elif action == 'scroll':
+            step = self._visible if unit == 'pages' else 1
+            self.scroll(int(value) * step)
+
+    def _on_mousewheel(self, event) -> None:
+        """Прокрутка колесом мыши (Windows, macOS)."""
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_resize(self, event) -> None:
+        """Пересчет количества видимых строк при изменении размера."""
+        inset = 2 * (int(self.listbox['bd']) + int(self.listbox['highlightthickness']))
+        visible = max(1, (event.height - inset) // self._row_height)
+        if visible != self._visible:
+            self._visible = visible
+            self.refresh()
+
+    def _on_select(self, event) -> None:
+        """Запоминание выбранной строки таблицы."""
+        selection = self.listbox.curselection()
+        if selection:
+            rows = self._rows()
+            self._selected = rows[self._offset + selection[0]]
+
+    def _move_selection(self, delta: int) -> str:
+        """Перемещение выбора клавишами со стрелками с прокруткой окна."""
+        rows = self._rows()
+        if not len(rows):
+            return "break"
+        position = -1 if self._selected is None else self._position_of(self._selected, rows)
+        if position < 0:
+            position = self._offset
+        else:
+            position += delta
+        position = max(0, min(position, len(rows) - 1))
+        self._selected = rows[position]
+        self.see(self._selected)
+        return "break"
+
+    def _position_of(self, index: int, rows: Sequence[int]) -> int:
+        """Позиция строки таблицы в порядке отображения (-1, если строка не показана)."""
+        if isinstance(rows, range):
+            return index if index in rows else -1
+        try:
+            return rows.index(index)
+        except ValueError:
+            return -1
@@ -0,0 +1,140 @@
+"""
+Окно диагностики приложения.
+
+Показывает замеры горячих путей (src.utils.metrics): сколько раз
+вызывалась каждая операция и сколько времени она заняла. Из окна
+замеры включаются и выключаются, сбрасываются и сохраняются в JSON;
+дополнительно можно включить профилировщик cProfile и трассировку
+памяти tracemalloc.
+"""
+import tkinter as tk
+from tkinter import filedialog, messagebox
+from typing import Dict
+
+from ..utils import metrics
+
+# Период обновления отчета в миллисекундах
+REFRESH_INTERVAL = 1000
+
+
+class DiagnosticsWindow(tk.Toplevel):
+    """
+    Немодальное окно с отчетом о замерах.
+
+    Отчет обновляется раз в REFRESH_INTERVAL, пока окно открыто.
+    """
+
+    def __init__(self, parent, colors: Dict[str, str]):
+        """
+        Создание окна.
+
+        Args:
+            parent: Главное окно приложения
+            colors: Цветовая палитра приложения
+        """
+        super().__init__(parent)
+        self.colors = colors
+        self.title("Диагностика")
+        self.geometry("760x520")
+        self.configure(bg=colors['bg_main'])
+
+        self.enabled_var = tk.BooleanVar(value=metrics.is_enabled())
+        self.profile_var = tk.BooleanVar(value=False)
+        self.memory_var = tk.BooleanVar(value=False)
+        self._create_widgets()
+        self._refresh_id = None
+        self._refresh()
+
+    def _create_widgets(self) -> None:
+        """Создание переключателей, кнопок и области отчета."""
+        controls = tk.Frame(self, bg=self.colors['bg_main'])
+        controls.pack(fill=tk.X, padx=10, pady=(10, 5))
+
+        for text, variable in (("Замеры", self.enabled_var),
+                               ("Профиль cProfile", self.profile_var),
+                               ("Память tracemalloc", self.memory_var)):
+            tk.Checkbutton(
+                controls,
+                text=text,
+                variable=variable,
+                command=self._apply_mode,
+                font=("Segoe UI", 10),
+                bg=self.colors['bg_main'],
+                fg=self.colors['text_primary'],
+                activebackground=self.colors['bg_main']
+            ).pack(side=tk.LEFT, padx=(0, 10))
+
+        for text, command in (("Сохранить JSON...", self._save_json),
+                              ("Сбросить", self._reset)):
+            tk.Button(
+                controls,
+                text=text,
+                command=command,
+                font=("Segoe UI", 10),
+                relief=tk.FLAT,
+                bg=self.colors['bg_card'],
+                fg=self.colors['text_primary'],
+                cursor="hand2"
+            ).pack(side=tk.RIGHT, padx=(5, 0))
+
+        self.report_text = tk.Text(
+            self,
+            font=("Consolas", 9),
+            wrap=tk.NONE,
+            bg=self.colors['bg_card'],
+            fg=self.colors['text_primary'],
+            relief=tk.FLAT,
+            highlightthickness=1,
+            highlightbackground=self.colors['border']
+        )
+        self.report_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+    def _apply_mode(self) -> None:
+        """Включение и выключение замеров по переключателям."""
+        if self.enabled_var.get():
+            # Профилировщик и трассировка перезапускаются с новыми настройками
+            metrics.disable()
+            metrics.enable(profile=self.profile_var.get(),
+                           trace_memory=self.memory_var.get())
+        else:
+            metrics.disable()
+        self._show_report()
+
+    def _reset(self) -> None:
+        """Сброс накопленных замеров."""
+        metrics.reset()
+        self._show_report()
+
+    def _save_json(self) -> None:
+        """Сохранение замеров в JSON."""
+        path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Сохранить замеры",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            metrics.dump_json(path)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить замеры:\n{e}", parent=self)
+
+    def _show_report(self) -> None:
+        """Вывод текущего отчета с сохранением положения прокрутки."""
+        position = self.report_text.yview()[0]
+        self.report_text.delete("1.0", tk.END)
+        self.report_text.insert("1.0", metrics.format_report())
+        self.report_text.yview_moveto(position)
+
+    def _refresh(self) -> None:
+        """Периодическое обновление отчета."""
+        self._show_report()
+        self._refresh_id = self.after(REFRESH_INTERVAL, self._refresh)
+
+    def destroy(self) -> None:
+        """Закрытие окна (замеры продолжаются)."""
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        super().destroy()
@@ -4,12 +4,27 @@
 Содержит главное окно приложения с полями ввода, кнопками
 и областью отображения результатов.
 """
+import os
 import tkinter as tk
-from tkinter import messagebox, ttk
-from typing import List
+from contextlib import contextmanager
+from tkinter import filedialog, messagebox, simpledialog, ttk
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
 
 from ..models.crop import Crop
-from ..utils.calculations import calculate_total_season_harvest
+from ..models.crop_table import CropTable
+from ..models.history import CommandHistory
+from ..models.query import CropIndex, parse_query
+from ..storage.journal import DEFAULT_JOURNAL_DIR, Journal, JournalLockedError
+from ..utils import metrics
+from ..utils.numparse import AREA_UNITS, YIELD_UNITS, parse_number
+from ..utils.stats_cache import StatsCache
+from ..utils.tasks import TaskCancelled, TaskContext, TaskRunner
+from .crop_list import VirtualCropList
+
+if TYPE_CHECKING:
+    # Хранилище (sqlite3) и импорт (csv) загружаются при первом использовании
+    from ..storage.sqlite_store import SeasonStore
+    from ..utils.importer import ImportReport
 
 
 class HarvestApp(tk.Tk):
@@ -37,14 +52,65 @@ class HarvestApp(tk.Tk):
         'hover_red': '#C82333',
     }
     
-    def __init__(self):
-        """Инициализация главного окна приложения."""
+    def __init__(self, store_path: Optional[str] = None, journal_dir: Optional[str] = None):
+        """
+        Инициализация главного окна приложения.
+        
+        Таблица культур восстанавливается из журнала упреждающей записи,
+        поэтому введенные данные не теряются при аварийном завершении.
+        
+        Args:
+            store_path: Путь к базе сохраненных сезонов
+                (None - DEFAULT_STORE_PATH в домашнем каталоге)
+            journal_dir: Каталог журнала изменений
+                (None - DEFAULT_JOURNAL_DIR в домашнем каталоге)
+        """
         super().__init__()
         
-        self.crops: List[Crop] = []  # Список культур
+        # Журнал изменений: восстановление таблицы после сбоя
+        self.journal: Optional[Journal] = Journal(journal_dir or DEFAULT_JOURNAL_DIR)
+        journal_warning = None
+        try:
+            self.crops = self.journal.recover()  # Колоночное хранилище культур
+            self.journal.attach(self.crops)
+        except OSError as e:
+            # Журнал занят другим окном или каталог недоступен: работа без журнала
+            self.journal.close()
+            self.journal = None
+            self.crops = CropTable()
+            if isinstance(e, JournalLockedError):
+                journal_warning = "Журнал открыт в другом окне: изменения этого окна не журналируются"
+            else:
+                journal_warning = f"Журнал недоступен, изменения не журналируются: {e}"
+        self.stats = StatsCache(self.crops)  # Кэш производных показателей
+        self.query = CropIndex(self.crops)  # Индексы для поиска и сортировки
+        self.history = CommandHistory(self.crops)  # Журнал отмены и повтора
+        self._editing: Optional[int] = None  # Строка, изменяемая через поля ввода
+        self._filter_id = None
+        
+        # Пакетный режим: изменения копятся и отрисовываются один раз за кадр
+        self._redraw_id = None
+        self._see_row: Optional[int] = None
+        self._batch_depth = 0
+        self._batch_added = 0
+        self._batch_pending: list = []  # Культуры для дозаписи в открытый сезон
+        self.tasks = TaskRunner()  # Фоновые задачи (импорт, экспорт)
+        self._current_task = None
+        
+        self.store_path = store_path
+        self._store: Optional['SeasonStore'] = None  # Открывается при первом обращении
+        self.season: Optional[str] = None  # Открытый (сохраненный) сезон
+        self._season_modified = False  # Есть изменения, не записанные в сезон
         
         self._setup_window()
+        self._create_menu()
         self._create_widgets()
+        self._poll_tasks()
+        if journal_warning is not None:
+            self._set_status(journal_warning)
+        elif len(self.crops):
+            self._schedule_redraw()
+            self._set_status(f"Восстановлено из журнала культур: {len(self.crops)}")
     
     def _setup_window(self) -> None:
         """Настройка параметров окна."""
@@ -61,6 +127,42 @@ class HarvestApp(tk.Tk):
         y = (self.winfo_screenheight() // 2) - (height // 2)
         self.geometry(f'{width}x{height}+{x}+{y}')
     
+    def _create_menu(self) -> None:
+        """Создание главного меню."""
+        menubar = tk.Menu(self)
+        
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Импорт CSV...", command=self._import_csv)
+        file_menu.add_separator()
+        file_menu.add_command(label="Открыть сезон...", command=self._open_season)
+        file_menu.add_command(label="Сохранить сезон...", command=self._save_season)
+        file_menu.add_separator()
+        file_menu.add_command(label="Экспорт отчета...", command=self._export_report)
+        file_menu.add_separator()
+        file_menu.add_command(label="Выход", command=self.destroy)
+        menubar.add_cascade(label="Файл", menu=file_menu)
+        
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="Отменить", accelerator="Ctrl+Z", command=self._undo)
+        edit_menu.add_command(label="Повторить", accelerator="Ctrl+Y", command=self._redo)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Изменить культуру", accelerator="Enter",
+                              command=self._edit_selected)
+        edit_menu.add_command(label="Удалить культуру", accelerator="Delete",
+                              command=self._delete_selected)
+        menubar.add_cascade(label="Правка", menu=edit_menu)
+        
+        self.bind("<Control-z>", lambda e: self._undo())
+        self.bind("<Control-y>", lambda e: self._redo())
+        self.bind("<Control-Z>", lambda e: self._redo())
+        self.bind("<Escape>", lambda e: self._cancel_edit())
+        
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu.add_command(label="Диагностика...", command=self._show_diagnostics)
+        menubar.add_cascade(label="Сервис", menu=tools_menu)
+        
+        self.config(menu=menubar)
+    
     def _create_styled_button(self, parent, text, command, color, hover_color):
         """Создание стилизованной кнопки с эффектом hover."""
         btn = tk.Button(
@@ -105,6 +207,19 @@ class HarvestApp(tk.Tk):
     
     def _create_widgets(self) -> None:
         """Создание и размещение виджетов интерфейса."""
+        # Строка состояния (немодальные сообщения) внизу окна
+        self.status_label = tk.Label(
+            self,
+            text="",
+            font=("Segoe UI", 10),
+            fg=self.COLORS['text_secondary'],
+            bg=self.COLORS['bg_card'],
+            anchor="w",
+            padx=12,
+            pady=4
+        )
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # Главный контейнер
         main_container = tk.Frame(self, bg=self.COLORS['bg_main'])
         main_container.pack(fill=tk.BOTH, expand=True, padx=25, pady=25)
@@ -176,14 +291,14 @@ class HarvestApp(tk.Tk):
         button_frame = tk.Frame(main_container, bg=self.COLORS['bg_main'])
         button_frame.pack(pady=20)
         
-        add_btn = self._create_styled_button(
+        self.add_btn = self._create_styled_button(
             button_frame,
             "➕ Добавить культуру",
             self._add_crop,
             self.COLORS['accent_green'],
             self.COLORS['hover_green']
         )
-        add_btn.pack(side=tk.LEFT, padx=8)
+        self.add_btn.pack(side=tk.LEFT, padx=8)
         
         calc_btn = self._create_styled_button(
             button_frame,
@@ -203,6 +318,15 @@ class HarvestApp(tk.Tk):
         )
         clear_btn.pack(side=tk.LEFT, padx=8)
         
+        import_btn = self._create_styled_button(
+            button_frame,
+            "📂 Импорт CSV",
+            self._import_csv,
+            self.COLORS['accent_blue'],
+            self.COLORS['hover_blue']
+        )
+        import_btn.pack(side=tk.LEFT, padx=8)
+        
         # ========== КАРТОЧКА СПИСКА КУЛЬТУР ==========
         list_card = self._create_card(main_container)
         list_card.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
@@ -210,50 +334,52 @@ class HarvestApp(tk.Tk):
         list_inner = tk.Frame(list_card, bg=self.COLORS['bg_card'])
         list_inner.pack(fill=tk.BOTH, expand=True, padx=30, pady=25)
         
-        # Заголовок списка
+        # Заголовок списка и строка поиска
+        list_header = tk.Frame(list_inner, bg=self.COLORS['bg_card'])
+        list_header.pack(fill=tk.X, pady=(0, 15))
+        
         list_title = tk.Label(
-            list_inner,
+            list_header,
             text="Список культур",
             font=("Segoe UI", 14, "bold"),
             fg=self.COLORS['text_primary'],
             bg=self.COLORS['bg_card'],
             anchor="w"
         )
-        list_title.pack(fill=tk.X, pady=(0, 15))
-        
-        # Контейнер для списка
-        listbox_container = tk.Frame(list_inner, bg=self.COLORS['bg_card'])
-        listbox_container.pack(fill=tk.BOTH, expand=True)
+        list_title.pack(side=tk.LEFT)
         
-        # Scrollbar
-        scrollbar = tk.Scrollbar(
-            listbox_container,
-            bg=self.COLORS['bg_input'],
-            troughcolor=self.COLORS['bg_main'],
-            activebackground=self.COLORS['accent_blue'],
-            width=14,
-            relief=tk.FLAT
-        )
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Listbox
-        self.crops_listbox = tk.Listbox(
-            listbox_container,
-            yscrollcommand=scrollbar.set,
-            font=("Consolas", 10),
-            height=12,
-            bg=self.COLORS['bg_input'],
-            fg=self.COLORS['text_primary'],
-            selectbackground=self.COLORS['accent_blue'],
-            selectforeground="white",
+        # Поиск: текст ищется в названии, условия вида «урожайность>3»
+        # отбираются по отсортированным индексам
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self._schedule_filter())
+        search_entry = tk.Entry(
+            list_header,
+            textvariable=self.search_var,
+            font=("Segoe UI", 11),
             relief=tk.FLAT,
             bd=1,
+            bg=self.COLORS['bg_input'],
+            fg=self.COLORS['text_primary'],
             highlightthickness=1,
             highlightbackground=self.COLORS['border'],
-            activestyle='none'
+            highlightcolor=self.COLORS['accent_blue'],
+            insertbackground=self.COLORS['accent_blue'],
+            width=28
         )
-        self.crops_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.crops_listbox.yview)
+        search_entry.pack(side=tk.RIGHT, ipadx=8, ipady=4)
+        tk.Label(
+            list_header,
+            text="🔍",
+            font=("Segoe UI", 11),
+            bg=self.COLORS['bg_card']
+        ).pack(side=tk.RIGHT, padx=(0, 6))
+        
+        # Виртуализированный список: отрисовываются только видимые строки
+        self.crops_view = VirtualCropList(list_inner, self.crops, self.COLORS, self.query)
+        self.crops_view.pack(fill=tk.BOTH, expand=True)
+        self.crops_view.listbox.bind("<Double-Button-1>", lambda e: self._edit_selected())
+        self.crops_view.listbox.bind("<Return>", lambda e: self._edit_selected())
+        self.crops_view.listbox.bind("<Delete>", lambda e: self._delete_selected())
         
         # ========== ИТОГОВАЯ ИНФОРМАЦИЯ ==========
         total_frame = tk.Frame(main_container, bg=self.COLORS['bg_main'])
@@ -268,6 +394,35 @@ class HarvestApp(tk.Tk):
             pady=8
         )
         self.total_label.pack()
+        
+        # Скрытые элементы создаются после отрисовки первого кадра
+        self.after_idle(self._create_progress_panel, main_container)
+    
+    def _create_progress_panel(self, parent) -> None:
+        """Создание панели прогресса фоновой задачи (показывается только во время задачи)."""
+        self.progress_frame = tk.Frame(parent, bg=self.COLORS['bg_main'])
+        
+        self.progress_label = tk.Label(
+            self.progress_frame,
+            text="",
+            font=("Segoe UI", 10),
+            fg=self.COLORS['text_secondary'],
+            bg=self.COLORS['bg_main'],
+            anchor="w"
+        )
+        self.progress_label.pack(fill=tk.X)
+        
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode='determinate', maximum=100)
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, pady=5)
+        
+        cancel_btn = self._create_styled_button(
+            self.progress_frame,
+            "✖ Отмена",
+            self._cancel_task,
+            self.COLORS['accent_red'],
+            self.COLORS['hover_red']
+        )
+        cancel_btn.pack(side=tk.LEFT, padx=(10, 0))
     
     def _create_input_field(self, parent, label_text, entry_attr):
         """Создание поля ввода с меткой."""
@@ -304,6 +459,7 @@ class HarvestApp(tk.Tk):
         # Сохранение ссылки на поле ввода
         setattr(self, entry_attr, entry)
     
+    @metrics.timed("gui.validate_input")
     def _validate_input(self) -> tuple[bool, str, float, float]:
         """
         Валидация введенных пользователем данных.
@@ -320,63 +476,523 @@ class HarvestApp(tk.Tk):
             messagebox.showerror("Ошибка", "Введите название культуры!")
             return False, "", 0.0, 0.0
         
-        # Проверка площади
-        try:
-            area = float(area_str)
-            if area <= 0:
-                messagebox.showerror("Ошибка", "Площадь посева должна быть положительным числом!")
-                return False, "", 0.0, 0.0
-        except ValueError:
-            messagebox.showerror("Ошибка", "Площадь посева должна быть числом!")
+        # Проверка площади (десятичная запятая и единицы: «12,5 га», «40 сот»)
+        area = parse_number(area_str, AREA_UNITS)
+        if area is None:
+            messagebox.showerror("Ошибка", "Площадь посева должна быть числом (например, 12,5 или 12,5 га)!")
+            return False, "", 0.0, 0.0
+        if area <= 0:
+            messagebox.showerror("Ошибка", "Площадь посева должна быть положительным числом!")
             return False, "", 0.0, 0.0
         
-        # Проверка урожайности
-        try:
-            yield_per_hectare = float(yield_str)
-            if yield_per_hectare <= 0:
-                messagebox.showerror("Ошибка", "Урожайность должна быть положительным числом!")
-                return False, "", 0.0, 0.0
-        except ValueError:
-            messagebox.showerror("Ошибка", "Урожайность должна быть числом!")
+        # Проверка урожайности («3,5», «35 ц/га»)
+        yield_per_hectare = parse_number(yield_str, YIELD_UNITS)
+        if yield_per_hectare is None:
+            messagebox.showerror("Ошибка", "Урожайность должна быть числом (например, 3,5 или 35 ц/га)!")
+            return False, "", 0.0, 0.0
+        if yield_per_hectare <= 0:
+            messagebox.showerror("Ошибка", "Урожайность должна быть положительным числом!")
             return False, "", 0.0, 0.0
         
         return True, name, area, yield_per_hectare
     
     def _add_crop(self) -> None:
-        """Добавление новой культуры в список."""
+        """Добавление новой культуры в список (или сохранение изменяемой строки)."""
         is_valid, name, area, yield_per_hectare = self._validate_input()
         
         if not is_valid:
             return
         
         try:
-            # Создание объекта культуры
-            crop = Crop(name=name, area=area, yield_per_hectare=yield_per_hectare)
+            # Создание объекта культуры и добавление в таблицу
+            with metrics.timer("crop.construct"):
+                crop = Crop(name=name, area=area, yield_per_hectare=yield_per_hectare)
+            if self._editing is not None:
+                self.edit_crop(self._editing, crop)
+                self._cancel_edit()
+                self._set_status(f"Культура '{name}' изменена (Ctrl+Z - отменить)")
+                return
+            self.add_crop(crop)
             
-            # Добавление в список
-            self.crops.append(crop)
+            self._clear_inputs()
+            self._notify("Успех", f"Культура '{name}' успешно добавлена!")
             
-            # Форматирование для отображения
-            crop_info = (
-                f"{crop.name:20s} │ "
-                f"{crop.area:>7.2f} га × "
-                f"{crop.yield_per_hectare:>6.2f} т/га = "
-                f"{crop.total_harvest:>8.2f} т"
+        except ValueError as e:
+            self._notify("Ошибка", str(e), error=True)
+    
+    def _clear_inputs(self) -> None:
+        """Очистка полей ввода и фокус на первое поле."""
+        self.name_entry.delete(0, tk.END)
+        self.area_entry.delete(0, tk.END)
+        self.yield_entry.delete(0, tk.END)
+        self.name_entry.focus()
+    
+    # ========== ИЗМЕНЕНИЕ, УДАЛЕНИЕ, ОТМЕНА ==========
+    
+    def edit_crop(self, index: int, crop: Crop) -> None:
+        """
+        Замена строки таблицы с записью в журнал отмены.
+        
+        Итоги и индексы обновляются только по изменившейся строке,
+        на экране перерисовываются видимые строки.
+        
+        Args:
+            index: Номер строки
+            crop: Новое содержимое строки
+        """
+        self.history.edit(index, crop)
+        self._mark_modified()
+        self._schedule_redraw(see=index)
+    
+    def delete_crop(self, index: int) -> None:
+        """
+        Удаление строки таблицы с записью в журнал отмены.
+        
+        Args:
+            index: Номер строки
+        """
+        self.history.remove(index)
+        self._mark_modified()
+        self._schedule_redraw()
+    
+    def _edit_selected(self) -> None:
+        """Перенос выбранной строки в поля ввода для изменения."""
+        index = self.crops_view.selected_index()
+        if index is None or index >= len(self.crops):
+            self._set_status("Выберите культуру в списке")
+            return
+        crop = self.crops[index]
+        for entry, value in ((self.name_entry, crop.name),
+                             (self.area_entry, f"{crop.area:g}"),
+                             (self.yield_entry, f"{crop.yield_per_hectare:g}")):
+            entry.delete(0, tk.END)
+            entry.insert(0, value)
+        self._editing = index
+        self.add_btn.config(text="✔ Сохранить изменения")
+        self._set_status(f"Изменение культуры '{crop.name}' (Esc - отмена)")
+        self.name_entry.focus()
+    
+    def _cancel_edit(self) -> None:
+        """Выход из режима изменения строки."""
+        if self._editing is None:
+            return
+        self._editing = None
+        self.add_btn.config(text="➕ Добавить культуру")
+        self._clear_inputs()
+    
+    def _delete_selected(self) -> None:
+        """Удаление выбранной строки (без подтверждения: удаление можно отменить)."""
+        index = self.crops_view.selected_index()
+        if index is None or index >= len(self.crops):
+            self._set_status("Выберите культуру в списке")
+            return
+        self._cancel_edit()
+        name = self.crops.name_at(index)
+        self.delete_crop(index)
+        self._set_status(f"Культура '{name}' удалена (Ctrl+Z - отменить)")
+    
+    def _undo(self) -> None:
+        """Отмена последнего изменения."""
+        self._cancel_edit()
+        command = self.history.undo()
+        if command is None:
+            self._set_status("Нечего отменять")
+            return
+        self._mark_modified()
+        self._schedule_redraw(see=min(command.index, len(self.crops) - 1))
+        self._set_status(f"Отменено: {command.description}")
+    
+    def _redo(self) -> None:
+        """Повтор отмененного изменения."""
+        self._cancel_edit()
+        command = self.history.redo()
+        if command is None:
+            self._set_status("Нечего повторять")
+            return
+        self._mark_modified()
+        self._schedule_redraw(see=min(command.index, len(self.crops) - 1))
+        self._set_status(f"Повторено: {command.description}")
+    
+    def _mark_modified(self) -> None:
+        """
+        Отметка, что открытый сезон изменен не только дозаписью.
+        
+        Измененные и удаленные строки не переносятся в базу по одной:
+        сезон нужно сохранить целиком, до этого новые культуры тоже
+        не дописываются в базу.
+        """
+        if self.season is not None and not self._season_modified:
+            self._season_modified = True
+            self.title(f"🌾 Учет урожая — {self.season} *")
+    
+    # ========== ПАКЕТНЫЕ ИЗМЕНЕНИЯ ==========
+    
+    def add_crop(self, crop: Crop) -> None:
+        """
+        Добавление культуры в таблицу (в том числе программное).
+        
+        Список на экране и итог перерисовываются один раз при простое
+        цикла Tk, сколько бы культур ни было добавлено до этого.
+        
+        Args:
+            crop: Культура
+        """
+        self.history.add(crop)
+        if self.season is not None and not self._season_modified:
+            if self._batch_depth:
+                self._batch_pending.append(crop)
+            else:
+                # Открытый сезон дописывается одной строкой, без пересохранения
+                self._get_store().append(self.season, crop)
+        if self._batch_depth:
+            self._batch_added += 1
+        self._schedule_redraw(see=len(self.crops) - 1)
+    
+    def add_crops(self, crops: Iterable[Crop]) -> int:
+        """
+        Пакетное добавление культур без диалогов.
+        
+        Args:
+            crops: Культуры
+        
+        Returns:
+            int: Количество добавленных культур
+        """
+        count = len(self.crops)
+        with self.batch():
+            for crop in crops:
+                self.add_crop(crop)
+        return len(self.crops) - count
+    
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Пакетный режим: сообщения выводятся в строку состояния, а не
+        в диалоги, дозапись в открытый сезон выполняется одной транзакцией.
+        
+        Example:
+            >>> with app.batch():
+            ...     for crop in crops:
+            ...         app.add_crop(crop)
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush_batch()
+    
+    def _flush_batch(self) -> None:
+        """Завершение пакета: дозапись в сезон и итоговое сообщение."""
+        pending, self._batch_pending = self._batch_pending, []
+        if pending and self.season is not None:
+            self._get_store().extend(self.season, pending)
+        if self._batch_added:
+            self._set_status(f"Добавлено культур: {self._batch_added}")
+        self._batch_added = 0
+    
+    def _schedule_redraw(self, see: Optional[int] = None) -> None:
+        """
+        Откладывает перерисовку списка и итога до простоя цикла Tk.
+        
+        Args:
+            see: Номер строки, которую нужно показать после перерисовки
+        """
+        if see is not None:
+            self._see_row = see
+        if self._redraw_id is None:
+            self._redraw_id = self.after_idle(self._redraw)
+    
+    @metrics.timed("gui.redraw")
+    def _redraw(self) -> None:
+        """Однократная перерисовка списка и итога по накопленным изменениям."""
+        self._redraw_id = None
+        self.crops_view.invalidate()
+        if self._see_row is not None and self._see_row < len(self.crops):
+            self.crops_view.see(self._see_row)
+        else:
+            self.crops_view.refresh()
+        self._see_row = None
+        self._update_total_label()
+    
+    def _notify(self, title: str, message: str, error: bool = False) -> None:
+        """Сообщение пользователю: диалог, а в пакетном режиме - строка состояния."""
+        if self._batch_depth:
+            self._set_status(f"{title}: {message}")
+        elif error:
+            messagebox.showerror(title, message)
+        else:
+            messagebox.showinfo(title, message)
+    
+    def _set_status(self, text: str) -> None:
+        """Вывод сообщения в строку состояния."""
+        self.status_label.config(text=text)
+    
+    def _import_csv(self) -> None:
+        """Импорт культур из CSV/TSV файла в фоновом потоке."""
+        if self.tasks.busy:
+            messagebox.showwarning("Предупреждение", "Дождитесь завершения текущей операции!")
+            return
+        
+        path = filedialog.askopenfilename(
+            title="Импорт культур",
+            filetypes=[("CSV/TSV", "*.csv *.tsv *.txt"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+        
+        self._start_task(
+            _import_job, path,
+            name="Импорт",
+            on_data=self._on_import_chunk,
+            on_result=self._on_import_done,
+            on_error=lambda e: self._finish_task(
+                lambda: messagebox.showerror("Ошибка", f"Не удалось прочитать файл: {e}")
+            ),
+            on_cancel=lambda: self._finish_task(
+                lambda: messagebox.showinfo(
+                    "Импорт", f"Импорт отменен. Загружено культур: {len(self.crops)}"
+                )
             )
-            self.crops_listbox.insert(tk.END, crop_info)
-            
-            # Очистка полей ввода
-            self.name_entry.delete(0, tk.END)
-            self.area_entry.delete(0, tk.END)
-            self.yield_entry.delete(0, tk.END)
-            
-            # Фокус на первое поле
-            self.name_entry.focus()
+        )
+    
+    def _on_import_chunk(self, chunk) -> None:
+        """
+        Добавление пакета импортированных записей (в главном потоке).
+        
+        Как и в add_crops, открытый и не измененный сезон дописывается
+        пакетом. Если дозапись не удалась, сезон отмечается измененным,
+        чтобы пакет попал в базу при сохранении сезона целиком.
+        """
+        with metrics.timer("table.extend_rows"):
+            self.crops.extend_rows(chunk, validate=False)
+        if self.season is not None and not self._season_modified:
+            import sqlite3
             
-            messagebox.showinfo("Успех", f"Культура '{name}' успешно добавлена!")
+            try:
+                self._get_store().extend_rows(self.season, chunk)
+            except sqlite3.Error as e:
+                self._mark_modified()
+                self._set_status(f"Не удалось дописать сезон, сохраните его: {e}")
+        # Пакеты, пришедшие за один опрос задач, отрисовываются вместе
+        self._schedule_redraw()
+    
+    def _on_season_chunk(self, chunk) -> None:
+        """Загрузка пакета строк открываемого сезона (строки уже есть в базе)."""
+        with metrics.timer("table.extend_rows"):
+            self.crops.extend_rows(chunk, validate=False)
+        self._schedule_redraw()
+    
+    def _on_import_done(self, report: 'ImportReport') -> None:
+        """Отображение итога импорта."""
+        message = f"Импортировано культур: {report.imported}"
+        if report.failed:
+            shown = "\n".join(str(error) for error in report.errors[:10])
+            message += f"\nСтрок с ошибками: {report.failed}\n\n{shown}"
+            self._finish_task(lambda: messagebox.showwarning("Импорт", message))
+        else:
+            self._finish_task(lambda: messagebox.showinfo("Импорт", message))
+    
+    def _export_report(self) -> None:
+        """Экспорт списка культур и итогов по культурам в фоновом потоке."""
+        if self.tasks.busy:
+            messagebox.showwarning("Предупреждение", "Дождитесь завершения текущей операции!")
+            return
+        if not self.crops:
+            messagebox.showwarning("Предупреждение", "Список культур пуст!")
+            return
+        
+        path = filedialog.asksaveasfilename(
+            title="Экспорт отчета",
+            defaultextension=".xlsx",
+            filetypes=[
+                ("Excel", "*.xlsx"),
+                ("CSV", "*.csv"),
+                ("CSV (gzip)", "*.csv.gz"),
+                ("JSON Lines", "*.jsonl"),
+                ("JSON Lines (gzip)", "*.jsonl.gz"),
+            ]
+        )
+        if not path:
+            return
+        
+        self._start_task(
+            _export_job, self.crops.copy(), path,
+            name="Экспорт",
+            on_result=lambda count: self._finish_task(
+                lambda: self._set_status(f"Экспортировано культур: {count} → {path}")
+            ),
+            on_error=lambda e: self._finish_task(
+                lambda: messagebox.showerror("Ошибка", f"Не удалось выполнить экспорт: {e}")
+            ),
+            on_cancel=self._finish_task
+        )
+    
+    # ========== СОХРАНЕНИЕ СЕЗОНОВ ==========
+    
+    def _get_store(self) -> 'SeasonStore':
+        """Хранилище сезонов главного потока (открывается при первом обращении)."""
+        if self._store is None:
+            from ..storage.sqlite_store import DEFAULT_STORE_PATH, SeasonStore
             
-        except ValueError as e:
-            messagebox.showerror("Ошибка", str(e))
+            if self.store_path is None:
+                self.store_path = DEFAULT_STORE_PATH
+            self._store = SeasonStore(self.store_path)
+        return self._store
+    
+    def _set_season(self, season: Optional[str]) -> None:
+        """Запоминание открытого сезона и обновление заголовка окна."""
+        self.season = season
+        self._season_modified = False
+        self.title("🌾 Учет урожая" if season is None else f"🌾 Учет урожая — {season}")
+    
+    def _save_season(self) -> None:
+        """Сохранение текущего списка как сезона в фоновом потоке."""
+        if self.tasks.busy:
+            messagebox.showwarning("Предупреждение", "Дождитесь завершения текущей операции!")
+            return
+        
+        season = simpledialog.askstring(
+            "Сохранение сезона", "Название сезона:",
+            initialvalue=self.season or "", parent=self
+        )
+        if not season or not season.strip():
+            return
+        season = season.strip()
+        
+        # Изменения, сделанные во время сохранения, в копию не попадут
+        version = self.crops.version
+        self._start_task(
+            _save_job, self._get_store().path, season, self.crops.copy(),
+            name="Сохранение",
+            on_result=lambda count: self._finish_task(
+                lambda: self._on_season_saved(season, count, version)
+            ),
+            on_error=lambda e: self._finish_task(
+                lambda: messagebox.showerror("Ошибка", f"Не удалось сохранить сезон: {e}")
+            ),
+            on_cancel=self._finish_task
+        )
+    
+    def _on_season_saved(self, season: str, count: int, version: int) -> None:
+        """
+        Уведомление о сохранении сезона.
+        
+        Если таблица менялась, пока сезон сохранялся, сезон остается
+        отмеченным измененным: эти изменения еще не записаны в базу.
+        """
+        self._set_season(season)
+        if self.crops.version != version:
+            self._mark_modified()
+        messagebox.showinfo("Сохранение", f"Сезон '{season}' сохранен ({count} культур)")
+    
+    def _open_season(self) -> None:
+        """Открытие сохраненного сезона с загрузкой строк в фоне."""
+        if self.tasks.busy:
+            messagebox.showwarning("Предупреждение", "Дождитесь завершения текущей операции!")
+            return
+        
+        import sqlite3
+        
+        try:
+            seasons = self._get_store().seasons()
+        except sqlite3.Error as e:
+            messagebox.showerror("Ошибка", f"Не удалось открыть базу сезонов: {e}")
+            return
+        if not seasons:
+            messagebox.showinfo("Информация", "Сохраненных сезонов нет!")
+            return
+        
+        season = simpledialog.askstring(
+            "Открытие сезона",
+            "Сохраненные сезоны:\n" + "\n".join(seasons) + "\n\nНазвание сезона:",
+            initialvalue=seasons[-1], parent=self
+        )
+        if not season:
+            return
+        if season not in seasons:
+            messagebox.showerror("Ошибка", f"Сезон '{season}' не найден!")
+            return
+        
+        # Текущий список заменяется содержимым сезона
+        self._cancel_edit()
+        self.crops.clear()
+        self._set_season(season)
+        self._schedule_redraw()
+        
+        self._start_task(
+            _open_job, self._get_store().path, season,
+            name="Открытие сезона",
+            on_data=self._on_season_chunk,
+            on_result=lambda count: self._finish_task(),
+            on_error=lambda e: self._finish_task(
+                lambda: messagebox.showerror("Ошибка", f"Не удалось открыть сезон: {e}")
+            ),
+            on_cancel=lambda: self._finish_task(lambda: self._set_season(None))
+        )
+    
+    # ========== ФОНОВЫЕ ЗАДАЧИ ==========
+    
+    def _start_task(self, func, *args, name: str, **handlers) -> None:
+        """Запуск фоновой задачи с отображением панели прогресса."""
+        self.progress_bar['value'] = 0
+        self.progress_label.config(text=f"{name}...")
+        self.progress_frame.pack(fill=tk.X, pady=(0, 10))
+        self._current_task = self.tasks.submit(
+            func, *args,
+            name=name,
+            on_progress=self._on_task_progress,
+            **handlers
+        )
+    
+    def _on_task_progress(self, done: float, total, message: str) -> None:
+        """Обновление панели прогресса."""
+        if total:
+            self.progress_bar['value'] = 100.0 * done / total
+        if message:
+            self.progress_label.config(text=message)
+    
+    def _finish_task(self, notify=None) -> None:
+        """Скрытие панели прогресса и уведомление пользователя."""
+        self._current_task = None
+        self.progress_frame.pack_forget()
+        if notify is not None:
+            notify()
+    
+    def _cancel_task(self) -> None:
+        """Отмена текущей фоновой задачи."""
+        if self._current_task is not None:
+            self._current_task.cancel()
+            self.progress_label.config(text="Отмена...")
+    
+    def _poll_tasks(self) -> None:
+        """Периодическая обработка событий фоновых задач в цикле Tk."""
+        self.tasks.poll()
+        self._poll_id = self.after(50, self._poll_tasks)
+    
+    def destroy(self) -> None:
+        """Закрытие окна с отменой фоновых задач."""
+        self.after_cancel(self._poll_id)
+        for after_id in (self._filter_id, self._redraw_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self.tasks.shutdown()
+        if self.journal is not None:
+            self.journal.close()
+        if self._store is not None:
+            self._store.close()
+        super().destroy()
+    
+    def _show_diagnostics(self) -> None:
+        """Открытие окна диагностики (замеры горячих путей)."""
+        from .diagnostics import DiagnosticsWindow
+        
+        window = getattr(self, '_diagnostics', None)
+        if window is not None and window.winfo_exists():
+            window.lift()
+            return
+        self._diagnostics = DiagnosticsWindow(self, self.COLORS)
     
     def _calculate_total(self) -> None:
         """Расчет и отображение общего урожая за сезон."""
@@ -384,17 +1000,20 @@ class HarvestApp(tk.Tk):
             messagebox.showwarning("Предупреждение", "Список культур пуст!")
             return
         
-        # Использование цикла для расчета общего урожая
-        total_harvest = calculate_total_season_harvest(self.crops)
+        # Итог поддерживается таблицей инкрементально, пересчет не нужен
+        total_harvest = self.crops.totals.total_harvest
+        self._update_total_label()
         
-        # Обновление метки
-        self.total_label.config(
-            text=f"🌾 Общий урожай за сезон: {total_harvest:.2f} т"
+        # Показатели по культурам берутся из кэша, пока таблица не изменилась
+        yields = self.stats.mean_yield_by_culture()
+        top = "\n".join(
+            f"  {name}: {harvest:.2f} т ({yields.get(name, 0.0):.2f} т/га)"
+            for name, harvest in self.stats.top_cultures(3)
         )
-        
         messagebox.showinfo(
             "Результат",
-            f"Общий урожай за сезон составляет {total_harvest:.2f} тонн"
+            f"Общий урожай за сезон составляет {total_harvest:.2f} тонн\n\n"
+            f"Лидеры по урожаю:\n{top}"
         )
     
     def _clear_list(self) -> None:
@@ -405,7 +1024,133 @@ class HarvestApp(tk.Tk):
         
         # Подтверждение очистки
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите очистить весь список?"):
+            self._cancel_edit()
             self.crops.clear()
-            self.crops_listbox.delete(0, tk.END)
-            self.total_label.config(text="🌾 Общий урожай за сезон: 0.00 т")
-            messagebox.showinfo("Успех", "Список очищен!")
+            self._set_season(None)
+            self._schedule_redraw()
+            self._notify("Успех", "Список очищен!")
+    
+    def _schedule_filter(self) -> None:
+        """Откладывает применение поиска, пока пользователь печатает."""
+        if self._filter_id is not None:
+            self.after_cancel(self._filter_id)
+        self._filter_id = self.after(200, self._apply_filter)
+    
+    def _apply_filter(self) -> None:
+        """Применение строки поиска к списку культур."""
+        self._filter_id = None
+        text = self.search_var.get().strip()
+        if not text:
+            self.crops_view.set_filter(None)
+            return
+        name, ranges = parse_query(text)
+        self.crops_view.set_filter(lambda: self.query.query(name or None, ranges))
+    
+    def _update_total_label(self) -> None:
+        """Обновление метки общего урожая по текущим итогам таблицы."""
+        self.total_label.config(
+            text=f"🌾 Общий урожай за сезон: {self.crops.totals.total_harvest:.2f} т"
+        )
+
+
+def _import_job(context: TaskContext, path: str) -> 'ImportReport':
+    """
+    Фоновая задача импорта: чтение и проверка файла пакетами.
+    
+    Выполняется в рабочем потоке, поэтому не обращается к виджетам
+    и таблице. Пакеты передаются в главный поток через context.post.
+    
+    Args:
+        context: Контекст фоновой задачи
+        path: Путь к импортируемому файлу
+    
+    Returns:
+        ImportReport: Итог импорта с ошибками по строкам
+    """
+    from ..utils.importer import ImportReport, iter_file_chunks
+    
+    report = ImportReport()
+    for chunk, done, total in iter_file_chunks(path, report):
+        context.post(chunk)
+        context.progress(done, total, f"Импорт: загружено записей {report.imported}")
+    return report
+
+
+def _export_job(context: TaskContext, table: CropTable, path: str) -> int:
+    """
+    Фоновая задача экспорта отчета.
+    
+    При отмене недописанный файл удаляется.
+    
+    Args:
+        context: Контекст фоновой задачи
+        table: Копия таблицы культур
+        path: Путь к файлу отчета
+    
+    Returns:
+        int: Количество выгруженных культур
+    """
+    from ..utils.export import export_table
+    
+    def progress(done: int, total: int) -> None:
+        context.check()
+        context.progress(done, total, f"Экспорт: {done} из {total}")
+    
+    try:
+        return export_table(table, path, progress=progress)
+    except TaskCancelled:
+        os.remove(path)
+        raise
+
+
+def _save_job(context: TaskContext, store_path: str, season: str, table: CropTable) -> int:
+    """
+    Фоновая задача сохранения сезона.
+    
+    Сезон записывается одной транзакцией, поэтому при отмене
+    прежнее содержимое сезона в базе не меняется.
+    
+    Args:
+        context: Контекст фоновой задачи
+        store_path: Путь к базе сезонов
+        season: Название сезона
+        table: Копия таблицы культур
+    
+    Returns:
+        int: Количество сохраненных культур
+    """
+    from ..storage.sqlite_store import SeasonStore
+    
+    def progress(done: int, total: int) -> None:
+        context.check()
+        context.progress(done, total, f"Сохранение сезона '{season}': {done} из {total}")
+    
+    context.progress(0, None, f"Сохранение сезона '{season}'...")
+    with SeasonStore(store_path) as store:
+        store.save_season(season, table, progress=progress)
+    return len(table)
+
+
+def _open_job(context: TaskContext, store_path: str, season: str) -> int:
+    """
+    Фоновая задача открытия сезона: чтение строк пакетами.
+    
+    Args:
+        context: Контекст фоновой задачи
+        store_path: Путь к базе сезонов
+        season: Название сезона
+    
+    Returns:
+        int: Количество загруженных культур
+    """
+    from ..storage.sqlite_store import SeasonStore
+    
+    loaded = 0
+    with SeasonStore(store_path) as store:
+        view = store.open_season(season)
+        total = len(view)
+        for chunk in view.iter_chunks():
+            context.post(chunk)
+            loaded += len(chunk)
+            context.progress(loaded, total, f"Открытие сезона: {loaded} из {total}")
+    return loaded
@@ -1,7 +1,29 @@
 """
 Модуль моделей данных приложения.
+
+Подмодули загружаются лениво при первом обращении к имени.
 """
-from .crop import Crop
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
 
-__all__ = ['Crop']
+if TYPE_CHECKING:
+    from .crop import Crop, FrozenCrop, RowError, intern_name
+    from .crop_table import CropTable
+    from .history import CommandHistory
+    from .query import CropIndex, Range, parse_query
+    from .totals import RunningSum, RunningTotals
 
+__getattr__, __dir__, __all__ = attach(__name__, {
+    'Crop': '.crop',
+    'FrozenCrop': '.crop',
+    'RowError': '.crop',
+    'intern_name': '.crop',
+    'CropTable': '.crop_table',
+    'CommandHistory': '.history',
+    'CropIndex': '.query',
+    'Range': '.query',
+    'parse_query': '.query',
+    'RunningSum': '.totals',
+    'RunningTotals': '.totals',
+})
@@ -2,16 +2,110 @@
 Модель данных для культуры.
 
 Содержит структуру данных для хранения информации о культуре:
-название, площадь посева, урожайность и общий объем урожая.
+название, площадь посева, урожайность и общий объем урожая,
+а также пакетное создание культур с проверкой данных по колонкам.
+
+Экземпляры хранятся в __slots__ (без __dict__), а одинаковые названия
+культур интернируются, поэтому тысячи записей «Пшеница» ссылаются
+на одну строку.
 """
+import math
+import sys
 from dataclasses import dataclass
+from numbers import Real
+from operator import itemgetter
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Сообщения об ошибках валидации (общие для одиночной и пакетной проверки)
+AREA_ERROR = "Площадь посева должна быть положительным числом"
+YIELD_ERROR = "Урожайность должна быть положительным числом"
+NAME_ERROR = "Название культуры не может быть пустым"
 
 
 @dataclass
+class RowError:
+    """
+    Ошибка в одной записи при пакетной загрузке.
+    
+    Attributes:
+        line: Номер записи (строки файла или индекса в пакете)
+        field: Название поля с ошибкой (или 'row' для записи целиком)
+        reason: Описание ошибки
+        source: Файл, в котором найдена ошибка (None - единственный источник)
+    """
+    line: int
+    field: str
+    reason: str
+    source: Optional[str] = None
+    
+    def __str__(self) -> str:
+        text = f"Строка {self.line}, поле {self.field}: {self.reason}"
+        return text if self.source is None else f"{self.source}: {text}"
+
+
+# Типы числовых колонок, которые проверяются на быстром пути
+_NUMBER_TYPES = frozenset((float, int))
+
+
+def is_positive_number(value) -> bool:
+    """
+    Проверяет, что значение - конечное положительное число.
+    
+    Args:
+        value: Значение поля площади или урожайности
+    
+    Returns:
+        bool: True для действительного числа больше нуля (не NaN и не
+        бесконечность); bool и строки числами не считаются
+    """
+    if type(value) not in _NUMBER_TYPES and (not isinstance(value, Real) or isinstance(value, bool)):
+        return False
+    return 0.0 < value < math.inf
+
+
+def _positive_column(values: Sequence) -> bool:
+    """Все значения колонки - конечные положительные числа (проверка на уровне C)."""
+    return (set(map(type, values)) <= _NUMBER_TYPES
+            and all(map((0.0).__lt__, values))
+            and math.isfinite(sum(values)))
+
+
+def intern_name(name: str) -> str:
+    """
+    Возвращает интернированное название культуры.
+    
+    Args:
+        name: Название культуры
+    
+    Returns:
+        str: Единственный экземпляр строки с таким значением
+    """
+    return sys.intern(name) if type(name) is str else name
+
+
+def split_columns(rows: Sequence[Tuple[str, float, float]]) -> Tuple[list, list, list]:
+    """
+    Разбивает записи (название, площадь, урожайность) на три колонки.
+    
+    Args:
+        rows: Записи вида (название, площадь, урожайность)
+    
+    Returns:
+        Tuple[list, list, list]: Колонки названий, площадей и урожайности
+    """
+    return (list(map(itemgetter(0), rows)),
+            list(map(itemgetter(1), rows)),
+            list(map(itemgetter(2), rows)))
+
+
+@dataclass(slots=True)
 class Crop:
     """
     Структура данных для хранения информации о культуре.
     
+    Для неизменяемых и хешируемых записей используется FrozenCrop
+    с тем же конструктором, проверками и строковым представлением.
+    
     Attributes:
         name: Название культуры
         area: Площадь посева в гектарах
@@ -31,6 +125,7 @@ class Crop:
             ValueError: Если площадь или урожайность отрицательные или равны нулю
         """
         self._validate_data()
+        self.name = intern_name(self.name)
         self.total_harvest = self.calculate_total_harvest()
     
     def _validate_data(self) -> None:
@@ -40,12 +135,12 @@ class Crop:
         Raises:
             ValueError: Если данные некорректны
         """
-        if self.area <= 0:
-            raise ValueError("Площадь посева должна быть положительным числом")
-        if self.yield_per_hectare <= 0:
-            raise ValueError("Урожайность должна быть положительным числом")
-        if not self.name or not self.name.strip():
-            raise ValueError("Название культуры не может быть пустым")
+        if not is_positive_number(self.area):
+            raise ValueError(AREA_ERROR)
+        if not is_positive_number(self.yield_per_hectare):
+            raise ValueError(YIELD_ERROR)
+        if not isinstance(self.name, str) or not self.name.strip():
+            raise ValueError(NAME_ERROR)
     
     def calculate_total_harvest(self) -> float:
         """
@@ -58,6 +153,96 @@ class Crop:
         """
         return self.area * self.yield_per_hectare
     
+    @staticmethod
+    def validate_columns(names: Sequence[str], areas: Sequence[float],
+                         yields: Sequence[float], start: int = 0) -> List[RowError]:
+        """
+        Проверяет колонки данных целиком, без создания объектов.
+        
+        Сначала колонки целиком проверяются встроенными all/map; только
+        если в них есть ошибки, выполняется поиск конкретных записей.
+        Возвращаются все найденные ошибки, упорядоченные по номеру записи.
+        
+        Args:
+            names: Колонка названий культур
+            areas: Колонка площадей посева (числа)
+            yields: Колонка урожайности (числа)
+            start: Номер первой записи в отчете об ошибках
+        
+        Returns:
+            List[RowError]: Ошибки по записям (пустой список, если все верно)
+        """
+        unique_names = set(names)
+        
+        # Быстрый путь: все колонки корректны (проверка на уровне C)
+        if (_positive_column(areas) and _positive_column(yields)
+                and set(map(type, unique_names)) == {str}
+                and all(unique_names) and not any(map(str.isspace, unique_names))):
+            return []
+        
+        errors = [RowError(start + i, 'area', AREA_ERROR)
+                  for i, value in enumerate(areas) if not is_positive_number(value)]
+        errors += [RowError(start + i, 'yield_per_hectare', YIELD_ERROR)
+                   for i, value in enumerate(yields) if not is_positive_number(value)]
+        errors += [RowError(start + i, 'name', NAME_ERROR)
+                   for i, value in enumerate(names)
+                   if not isinstance(value, str) or not value.strip()]
+        errors.sort(key=lambda error: error.line)
+        return errors
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, float, float]], validate: bool = True,
+                  start: int = 0) -> Tuple[List['Crop'], List[RowError]]:
+        """
+        Пакетно создает культуры из записей (название, площадь, урожайность).
+        
+        Проверка выполняется по колонкам через validate_columns, после
+        чего объекты создаются без повторного вызова __post_init__.
+        Записи с ошибками пропускаются и попадают в отчет. Метод
+        работает и для неизменяемого варианта FrozenCrop.
+        
+        Args:
+            rows: Записи вида (название, площадь, урожайность)
+            validate: Проверять ли данные (False - записи уже проверены)
+            start: Номер первой записи в отчете об ошибках
+        
+        Returns:
+            Tuple[List[Crop], List[RowError]]: Созданные культуры и ошибки
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        errors: List[RowError] = []
+        
+        if validate and rows:
+            errors = cls.validate_columns(*split_columns(rows), start=start)
+            if errors:
+                invalid = {error.line - start for error in errors}
+                rows = [row for i, row in enumerate(rows) if i not in invalid]
+        
+        new = cls.__new__
+        crops = []
+        append = crops.append
+        if cls.__dataclass_params__.frozen:
+            # Неизменяемые объекты заполняются в обход __setattr__
+            setter = object.__setattr__
+            for name, area, yield_per_hectare in rows:
+                crop = new(cls)
+                setter(crop, 'name', intern_name(name))
+                setter(crop, 'area', area)
+                setter(crop, 'yield_per_hectare', yield_per_hectare)
+                setter(crop, 'total_harvest', area * yield_per_hectare)
+                append(crop)
+            return crops, errors
+        
+        for name, area, yield_per_hectare in rows:
+            crop = new(cls)
+            crop.name = intern_name(name)
+            crop.area = area
+            crop.yield_per_hectare = yield_per_hectare
+            crop.total_harvest = area * yield_per_hectare
+            append(crop)
+        
+        return crops, errors
+    
     def __str__(self) -> str:
         """
         Строковое представление объекта для удобного вывода.
@@ -70,3 +255,39 @@ class Crop:
                 f"Урожайность: {self.yield_per_hectare} т/га, "
                 f"Общий урожай: {self.total_harvest:.2f} т")
 
+
+@dataclass(frozen=True, slots=True)
+class FrozenCrop:
+    """
+    Неизменяемый хешируемый вариант Crop.
+    
+    Конструктор, проверка данных и строковое представление совпадают
+    с Crop. Подходит для использования в множествах и как ключ словаря.
+    
+    Attributes:
+        name: Название культуры
+        area: Площадь посева в гектарах
+        yield_per_hectare: Урожайность в тоннах на гектар
+        total_harvest: Общий объем урожая в тоннах (рассчитывается автоматически)
+    """
+    name: str
+    area: float
+    yield_per_hectare: float
+    total_harvest: float = 0.0
+    
+    def __post_init__(self):
+        """
+        Валидация данных и расчет общего урожая после инициализации.
+        
+        Raises:
+            ValueError: Если площадь или урожайность отрицательные или равны нулю
+        """
+        self._validate_data()
+        object.__setattr__(self, 'name', intern_name(self.name))
+        object.__setattr__(self, 'total_harvest', self.calculate_total_harvest())
+    
+    _validate_data = Crop._validate_data
+    calculate_total_harvest = Crop.calculate_total_harvest
+    validate_columns = staticmethod(Crop.validate_columns)
+    from_rows = classmethod(Crop.from_rows.__func__)
+    __str__ = Crop.__str__
@@ -0,0 +1,373 @@
+"""
+Колоночное хранилище культур.
+
+Содержит контейнер CropTable, который хранит данные о культурах
+не списком объектов Crop, а отдельными колонками на базе array:
+коды названий, площадь, урожайность и общий урожай. Итоги таблицы
+поддерживаются инкрементально при каждом изменении, а счетчики версий
+позволяют кэшам определять, изменились ли данные. Подписчики
+(например, индексы запросов) получают уведомление о каждом изменении.
+"""
+import copy
+import math
+from array import array
+from operator import mul
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .crop import Crop, RowError, intern_name, split_columns
+from .totals import RunningTotals
+
+
+class CropTable:
+    """
+    Колоночный контейнер для большого числа культур.
+
+    Названия культур хранятся один раз в таблице строк, а в колонке
+    хранится только целочисленный код названия. Числовые колонки
+    хранятся в array('d') без отдельного объекта на каждую строку.
+    Объекты Crop создаются только по запросу (индексация, итерация).
+
+    Attributes:
+        names: Таблица строк с уникальными названиями культур
+        name_codes: Колонка кодов названий (индексы в names)
+        area: Колонка площадей посева в гектарах
+        yield_per_hectare: Колонка урожайности в тоннах на гектар
+        total_harvest: Колонка общего урожая в тоннах
+        totals: Итоги таблицы, обновляемые при каждом изменении
+        version: Счетчик версий, увеличивается при каждом изменении
+    """
+
+    def __init__(self, crops: Optional[Iterable[Crop]] = None,
+                 compensated: bool = True):
+        """
+        Инициализация таблицы.
+
+        Args:
+            crops: Необязательный набор культур для начального заполнения
+            compensated: Использовать компенсированное суммирование в итогах
+        """
+        self.names: List[str] = []
+        self._name_index: Dict[str, int] = {}
+        self.name_codes = array('l')
+        self.area = array('d')
+        self.yield_per_hectare = array('d')
+        self.total_harvest = array('d')
+        self.totals = RunningTotals(compensated)
+        self.version = 0
+        # Версия последнего изменения строк каждой культуры (по коду названия)
+        self._code_versions: List[int] = []
+        self._listeners: List[Callable[..., None]] = []
+
+        if crops is not None:
+            self.extend(crops)
+
+    def _code_for(self, name: str) -> int:
+        """Возвращает код названия, добавляя его в таблицу строк при необходимости."""
+        code = self._name_index.get(name)
+        if code is None:
+            name = intern_name(name)
+            code = len(self.names)
+            self.names.append(name)
+            self._name_index[name] = code
+            self._code_versions.append(self.version)
+        return code
+
+    def _touch(self, *codes: int) -> None:
+        """Увеличивает версию таблицы и отмечает изменение культур с кодами codes."""
+        self.version += 1
+        for code in codes:
+            self._code_versions[code] = self.version
+
+    def subscribe(self, listener: Callable[..., None]) -> None:
+        """
+        Подписывает обработчик на изменения таблицы.
+
+        Обработчик вызывается после изменения с аргументами события:
+        ('insert', start, stop) - добавлены строки start..stop-1
+        (при вставке в середину следующие строки сдвинуты);
+        ('update', index, old) - строка index заменена, old - прежняя Crop;
+        ('remove', index, old) - строка index удалена, следующие сдвинуты;
+        ('clear',) - таблица очищена.
+
+        Args:
+            listener: Обработчик изменений
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[..., None]) -> None:
+        """
+        Отписывает обработчик от изменений таблицы.
+
+        Args:
+            listener: Ранее подписанный обработчик
+        """
+        self._listeners.remove(listener)
+
+    def _notify(self, event: str, *args) -> None:
+        """Сообщает подписчикам об изменении."""
+        for listener in self._listeners:
+            listener(event, *args)
+
+    def culture_version(self, name: str) -> int:
+        """
+        Возвращает версию данных одной культуры.
+
+        Версия меняется только при изменении строк этой культуры,
+        поэтому по ней можно точно инвалидировать кэш по культуре.
+
+        Args:
+            name: Название культуры
+
+        Returns:
+            int: Версия (-1, если культуры нет в таблице)
+        """
+        code = self._name_index.get(name)
+        return -1 if code is None else self._code_versions[code]
+
+    def append(self, crop: Crop) -> None:
+        """
+        Добавляет культуру в конец таблицы.
+
+        Args:
+            crop: Объект Crop с уже проверенными данными
+        """
+        code = self._code_for(crop.name)
+        self.name_codes.append(code)
+        self.area.append(crop.area)
+        self.yield_per_hectare.append(crop.yield_per_hectare)
+        self.total_harvest.append(crop.total_harvest)
+        self.totals.add(crop.name, crop.area, crop.total_harvest)
+        self._touch(code)
+        self._notify('insert', len(self) - 1, len(self))
+
+    def insert(self, index: int, crop: Crop) -> None:
+        """
+        Вставляет культуру перед строкой index (следующие строки сдвигаются).
+
+        Args:
+            index: Номер строки (len(table) - добавление в конец)
+            crop: Объект Crop с уже проверенными данными
+        """
+        if index < 0:
+            index += len(self)
+        index = max(0, min(index, len(self)))
+        code = self._code_for(crop.name)
+        self.name_codes.insert(index, code)
+        self.area.insert(index, crop.area)
+        self.yield_per_hectare.insert(index, crop.yield_per_hectare)
+        self.total_harvest.insert(index, crop.total_harvest)
+        self.totals.add(crop.name, crop.area, crop.total_harvest)
+        self._touch(code)
+        self._notify('insert', index, index + 1)
+
+    def extend(self, crops: Iterable[Crop]) -> None:
+        """
+        Добавляет несколько культур в конец таблицы.
+
+        Args:
+            crops: Набор объектов Crop
+        """
+        for crop in crops:
+            self.append(crop)
+
+    def extend_rows(self, rows: Iterable[Tuple[str, float, float]], validate: bool = True,
+                    start: int = 0) -> List[RowError]:
+        """
+        Добавляет записи (название, площадь, урожайность) без создания объектов Crop.
+
+        Данные проверяются по колонкам (Crop.validate_columns) и
+        дописываются в колонки таблицы целиком. Записи с ошибками
+        пропускаются.
+
+        Args:
+            rows: Записи вида (название, площадь, урожайность)
+            validate: Проверять ли данные (False - записи уже проверены)
+            start: Номер первой записи в отчете об ошибках
+
+        Returns:
+            List[RowError]: Ошибки по записям (пустой список, если все верно)
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows:
+            return []
+
+        names, areas, yields = split_columns(rows)
+        errors: List[RowError] = []
+        if validate:
+            errors = Crop.validate_columns(names, areas, yields, start)
+            if errors:
+                invalid = {error.line - start for error in errors}
+                valid = [row for i, row in enumerate(rows) if i not in invalid]
+                if not valid:
+                    return errors
+                names, areas, yields = split_columns(valid)
+
+        harvests = list(map(mul, areas, yields))
+        first = len(self)
+        for name in dict.fromkeys(names):
+            self._code_for(name)
+        self.name_codes.fromlist(list(map(self._name_index.__getitem__, names)))
+        self.area.fromlist(areas)
+        self.yield_per_hectare.fromlist(yields)
+        self.total_harvest.fromlist(harvests)
+        self.totals.add_batch(names, areas, harvests)
+        self._touch(*map(self._name_index.__getitem__, dict.fromkeys(names)))
+        self._notify('insert', first, len(self))
+        return errors
+
+    def update(self, index: int, crop: Crop) -> Crop:
+        """
+        Заменяет строку таблицы новыми данными.
+
+        Args:
+            index: Номер строки
+            crop: Объект Crop с новыми данными
+
+        Returns:
+            Crop: Прежнее содержимое строки
+        """
+        if index < 0:
+            index += len(self)
+        old = self[index]
+        self.totals.update(old.name, self.area[index], self.total_harvest[index],
+                           crop.name, crop.area, crop.total_harvest)
+        old_code = self.name_codes[index]
+        self.name_codes[index] = self._code_for(crop.name)
+        self._touch(old_code, self.name_codes[index])
+        self.area[index] = crop.area
+        self.yield_per_hectare[index] = crop.yield_per_hectare
+        self.total_harvest[index] = crop.total_harvest
+        self._notify('update', index, old)
+        return old
+
+    def remove(self, index: int) -> Crop:
+        """
+        Удаляет строку таблицы.
+
+        Args:
+            index: Номер строки
+
+        Returns:
+            Crop: Удаленное содержимое строки
+        """
+        if index < 0:
+            index += len(self)
+        old = self[index]
+        self.totals.remove(old.name, self.area[index], self.total_harvest[index])
+        self._touch(self.name_codes[index])
+        del self.name_codes[index]
+        del self.area[index]
+        del self.yield_per_hectare[index]
+        del self.total_harvest[index]
+        self._notify('remove', index, old)
+        return old
+
+    def clear(self) -> None:
+        """Удаляет все строки и таблицу названий."""
+        self.names.clear()
+        self._name_index.clear()
+        del self.name_codes[:]
+        del self.area[:]
+        del self.yield_per_hectare[:]
+        del self.total_harvest[:]
+        self.totals.clear()
+        self._code_versions.clear()
+        self._touch()
+        self._notify('clear')
+
+    def copy(self) -> 'CropTable':
+        """
+        Создает независимую копию таблицы.
+
+        Колонки копируются целиком (без создания объектов Crop), поэтому
+        копию можно передать в фоновый поток, пока исходная таблица
+        продолжает изменяться.
+
+        Returns:
+            CropTable: Копия таблицы
+        """
+        table = CropTable(compensated=self.totals.compensated)
+        table.names = list(self.names)
+        table._name_index = dict(self._name_index)
+        table.version = self.version
+        table._code_versions = list(self._code_versions)
+        table.name_codes = array(self.name_codes.typecode, self.name_codes)
+        table.area = array('d', self.area)
+        table.yield_per_hectare = array('d', self.yield_per_hectare)
+        table.total_harvest = array('d', self.total_harvest)
+        table.totals = copy.deepcopy(self.totals)
+        return table
+
+    @classmethod
+    def from_columns(cls, names: List[str], name_codes: array, area: array,
+                     yield_per_hectare: array, total_harvest: array,
+                     totals: Optional[RunningTotals] = None) -> 'CropTable':
+        """
+        Создает таблицу из готовых колонок без копирования и проверки.
+
+        Колонки становятся колонками таблицы как есть, поэтому после
+        вызова их нельзя изменять в обход таблицы.
+
+        Args:
+            names: Таблица строк с уникальными названиями культур
+            name_codes: Колонка кодов названий (индексы в names)
+            area: Колонка площадей посева
+            yield_per_hectare: Колонка урожайности
+            total_harvest: Колонка общего урожая
+            totals: Готовые итоги колонок (None - посчитать по колонкам)
+
+        Returns:
+            CropTable: Таблица с переданными колонками
+        """
+        table = cls(compensated=True if totals is None else totals.compensated)
+        table.names = [intern_name(name) for name in names]
+        table._name_index = {name: code for code, name in enumerate(table.names)}
+        table._code_versions = [0] * len(table.names)
+        table.name_codes = name_codes
+        table.area = area
+        table.yield_per_hectare = yield_per_hectare
+        table.total_harvest = total_harvest
+        if totals is None:
+            areas: List[List[float]] = [[] for _ in table.names]
+            harvests: List[List[float]] = [[] for _ in table.names]
+            for code, row_area, harvest in zip(name_codes, area, total_harvest):
+                areas[code].append(row_area)
+                harvests[code].append(harvest)
+            totals = RunningTotals()
+            for name, group_areas, group_harvests in zip(table.names, areas, harvests):
+                totals.add_group(name, len(group_harvests),
+                                 math.fsum(group_areas), math.fsum(group_harvests))
+        table.totals = totals
+        return table
+
+    def name_at(self, index: int) -> str:
+        """
+        Возвращает название культуры в строке без создания объекта Crop.
+
+        Args:
+            index: Номер строки
+
+        Returns:
+            str: Название культуры
+        """
+        return self.names[self.name_codes[index]]
+
+    def __len__(self) -> int:
+        return len(self.total_harvest)
+
+    def __getitem__(self, index: int) -> Crop:
+        """
+        Возвращает представление строки в виде объекта Crop.
+
+        Объект создается заново при каждом обращении, поэтому его
+        изменение не влияет на данные таблицы.
+        """
+        return Crop(
+            name=self.names[self.name_codes[index]],
+            area=self.area[index],
+            yield_per_hectare=self.yield_per_hectare[index]
+        )
+
+    def __iter__(self) -> Iterator[Crop]:
+        for index in range(len(self)):
+            yield self[index]
@@ -0,0 +1,248 @@
+"""
+Журнал команд для отмены и повтора изменений таблицы культур.
+
+Каждое изменение таблицы (добавление, изменение, удаление строки)
+записывается командой, которая хранит только разницу: номер строки
+и прежнее и новое содержимое строки, а не копию всей таблицы. Отмена
+и повтор применяют обратное или прямое изменение к одной строке;
+итоги таблицы и подписанные на нее индексы обновляются тем же путем,
+что и при обычном изменении.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Union
+
+from .crop import Crop, FrozenCrop
+from .crop_table import CropTable
+
+# Количество команд, которые можно отменить, по умолчанию
+DEFAULT_LIMIT = 1000
+
+
+def _freeze(crop: Crop) -> FrozenCrop:
+    """Неизменяемая копия строки для хранения в журнале."""
+    if isinstance(crop, FrozenCrop):
+        return crop
+    return FrozenCrop(crop.name, crop.area, crop.yield_per_hectare)
+
+
+@dataclass(frozen=True)
+class AddCrop:
+    """
+    Добавление строки.
+
+    Attributes:
+        index: Номер добавленной строки
+        crop: Содержимое строки
+    """
+    index: int
+    crop: FrozenCrop
+
+    def apply(self, table: CropTable) -> None:
+        """Выполняет команду."""
+        table.insert(self.index, self.crop)
+
+    def revert(self, table: CropTable) -> None:
+        """Отменяет команду."""
+        table.remove(self.index)
+
+    @property
+    def description(self) -> str:
+        """Описание команды для пользователя."""
+        return f"добавление «{self.crop.name}»"
+
+
+@dataclass(frozen=True)
+class EditCrop:
+    """
+    Изменение строки.
+
+    Attributes:
+        index: Номер строки
+        old: Прежнее содержимое строки
+        new: Новое содержимое строки
+    """
+    index: int
+    old: FrozenCrop
+    new: FrozenCrop
+
+    def apply(self, table: CropTable) -> None:
+        """Выполняет команду."""
+        table.update(self.index, self.new)
+
+    def revert(self, table: CropTable) -> None:
+        """Отменяет команду."""
+        table.update(self.index, self.old)
+
+    @property
+    def description(self) -> str:
+        """Описание команды для пользователя."""
+        return f"изменение «{self.old.name}»"
+
+
+@dataclass(frozen=True)
+class RemoveCrop:
+    """
+    Удаление строки.
+
+    Attributes:
+        index: Номер удаленной строки
+        crop: Содержимое удаленной строки
+    """
+    index: int
+    crop: FrozenCrop
+
+    def apply(self, table: CropTable) -> None:
+        """Выполняет команду."""
+        table.remove(self.index)
+
+    def revert(self, table: CropTable) -> None:
+        """Отменяет команду."""
+        table.insert(self.index, self.crop)
+
+    @property
+    def description(self) -> str:
+        """Описание команды для пользователя."""
+        return f"удаление «{self.crop.name}»"
+
+
+# Команда журнала
+Command = Union[AddCrop, EditCrop, RemoveCrop]
+
+
+class CommandHistory:
+    """
+    Журнал отмены и повтора изменений таблицы.
+
+    Хранит не более limit последних команд. Новая команда очищает
+    список повтора. Очистка таблицы очищает журнал, так как номера
+    строк в командах перестают соответствовать таблице.
+
+    Attributes:
+        table: Таблица культур
+        limit: Максимальное количество команд для отмены
+    """
+
+    def __init__(self, table: CropTable, limit: int = DEFAULT_LIMIT):
+        """
+        Инициализация журнала и подписка на очистку таблицы.
+
+        Args:
+            table: Таблица культур
+            limit: Максимальное количество команд для отмены
+        """
+        self.table = table
+        self.limit = limit
+        self._undo: Deque[Command] = deque(maxlen=limit)
+        self._redo: List[Command] = []
+        table.subscribe(self._on_change)
+
+    def close(self) -> None:
+        """Отписывает журнал от изменений таблицы."""
+        self.table.unsubscribe(self._on_change)
+
+    def _on_change(self, event: str, *args) -> None:
+        """Очистка журнала при очистке таблицы."""
+        if event == 'clear':
+            self.clear()
+
+    def clear(self) -> None:
+        """Удаляет все команды."""
+        self._undo.clear()
+        self._redo.clear()
+
+    @property
+    def can_undo(self) -> bool:
+        """Есть ли команда для отмены."""
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        """Есть ли команда для повтора."""
+        return bool(self._redo)
+
+    def execute(self, command: Command) -> None:
+        """
+        Выполняет команду и записывает ее в журнал.
+
+        Args:
+            command: Команда (AddCrop, EditCrop, RemoveCrop)
+        """
+        command.apply(self.table)
+        self._undo.append(command)
+        self._redo.clear()
+
+    def add(self, crop: Crop) -> AddCrop:
+        """
+        Добавляет строку в конец таблицы.
+
+        Args:
+            crop: Культура
+
+        Returns:
+            AddCrop: Выполненная команда
+        """
+        command = AddCrop(len(self.table), _freeze(crop))
+        self.execute(command)
+        return command
+
+    def edit(self, index: int, crop: Crop) -> EditCrop:
+        """
+        Заменяет содержимое строки.
+
+        Args:
+            index: Номер строки
+            crop: Новое содержимое строки
+
+        Returns:
+            EditCrop: Выполненная команда
+        """
+        if index < 0:
+            index += len(self.table)
+        command = EditCrop(index, _freeze(self.table[index]), _freeze(crop))
+        self.execute(command)
+        return command
+
+    def remove(self, index: int) -> RemoveCrop:
+        """
+        Удаляет строку.
+
+        Args:
+            index: Номер строки
+
+        Returns:
+            RemoveCrop: Выполненная команда
+        """
+        if index < 0:
+            index += len(self.table)
+        command = RemoveCrop(index, _freeze(self.table[index]))
+        self.execute(command)
+        return command
+
+    def undo(self) -> Optional[Command]:
+        """
+        Отменяет последнюю команду.
+
+        Returns:
+            Optional[Command]: Отмененная команда или None, если отменять нечего
+        """
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        command.revert(self.table)
+        self._redo.append(command)
+        return command
+
+    def redo(self) -> Optional[Command]:
+        """
+        Повторяет последнюю отмененную команду.
+
+        Returns:
+            Optional[Command]: Повторенная команда или None, если повторять нечего
+        """
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        command.apply(self.table)
+        self._undo.append(command)
+        return command
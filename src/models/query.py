@@ -0,0 +1,531 @@
+"""
+Индексированные запросы к таблице культур.
+
+Содержит индексы над CropTable: хеш-индекс строк по названию культуры
+и отсортированные индексы по площади, урожайности и общему урожаю.
+Индексы позволяют выбирать строки по культуре, по диапазону значений
+и находить первые K строк без полного просмотра таблицы.
+
+Индексы подписаны на изменения таблицы: строки, добавленные в конец,
+включаются в индекс при следующем запросе, замена строки обновляет
+индекс точечно. Вставка в середину и удаление только записываются в
+журнал сдвигов (за постоянное время); при следующем запросе все
+накопленные сдвиги применяются к индексам за один проход, без
+сортировки заново. Очистка таблицы (или слишком длинный журнал
+сдвигов) приводит к перестроению индексов при следующем запросе.
+"""
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from itertools import compress
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .crop import Crop
+from .crop_table import CropTable
+
+# Колонки с отсортированными индексами
+INDEXED_COLUMNS = ('area', 'yield_per_hectare', 'total_harvest')
+
+# Сколько добавленных строк вставляется в индекс по одной; при большем
+# количестве (или больше 1/16 индекса) индекс перестраивается целиком
+INSERT_LIMIT = 1024
+
+# Сколько вставок и удалений в середине таблицы откладывается до запроса;
+# при большем количестве индексы перестраиваются целиком
+EDIT_LIMIT = 1024
+
+# Названия полей в строке поиска
+QUERY_FIELDS = {
+    'площадь': 'area',
+    'area': 'area',
+    'урожайность': 'yield_per_hectare',
+    'yield': 'yield_per_hectare',
+    'урожай': 'total_harvest',
+    'harvest': 'total_harvest',
+}
+
+_CONDITION = re.compile(r'^(\w+)\s*(<=|>=|<|>|=)\s*(-?\d+(?:[.,]\d+)?)$')
+
+
+@dataclass(frozen=True)
+class Range:
+    """
+    Диапазон значений колонки.
+
+    Attributes:
+        low: Нижняя граница (None - без ограничения)
+        high: Верхняя граница (None - без ограничения)
+        include_low: Включать ли нижнюю границу
+        include_high: Включать ли верхнюю границу
+    """
+    low: Optional[float] = None
+    high: Optional[float] = None
+    include_low: bool = True
+    include_high: bool = True
+
+    def __contains__(self, value: float) -> bool:
+        if self.low is not None:
+            if value < self.low or (value == self.low and not self.include_low):
+                return False
+        if self.high is not None:
+            if value > self.high or (value == self.high and not self.include_high):
+                return False
+        return True
+
+
+class SortedIndex:
+    """
+    Отсортированный индекс по числовой колонке таблицы.
+
+    Значения и номера строк хранятся в двух параллельных array,
+    упорядоченных по значению.
+
+    Attributes:
+        column: Название колонки таблицы
+    """
+
+    __slots__ = ('table', 'column', '_keys', '_rows', '_count', '_valid')
+
+    def __init__(self, table: CropTable, column: str):
+        self.table = table
+        self.column = column
+        self._keys = array('d')
+        self._rows = array('l')
+        self._count = 0        # Сколько первых строк таблицы учтено в индексе
+        self._valid = False
+
+    def invalidate(self) -> None:
+        """Помечает индекс для перестроения при следующем запросе."""
+        self._valid = False
+
+    def rebuild(self) -> None:
+        """Строит индекс заново по всей колонке."""
+        values = getattr(self.table, self.column)
+        order = sorted(range(len(values)), key=values.__getitem__)
+        self._rows = array('l', order)
+        self._keys = array('d', map(values.__getitem__, order))
+        self._count = len(values)
+        self._valid = True
+
+    def _sync(self) -> None:
+        """Включает в индекс строки, добавленные после последнего запроса."""
+        values = getattr(self.table, self.column)
+        added = len(values) - self._count
+        if not self._valid or added > max(INSERT_LIMIT, self._count // 16):
+            self.rebuild()
+            return
+        for row in range(self._count, len(values)):
+            self._insert(row, values[row])
+        self._count = len(values)
+
+    def _insert(self, row: int, value: float) -> None:
+        position = bisect_right(self._keys, value)
+        self._keys.insert(position, value)
+        self._rows.insert(position, row)
+
+    def update(self, row: int, old_value: float) -> None:
+        """
+        Обновляет индекс после замены значения в строке.
+
+        Args:
+            row: Номер строки таблицы
+            old_value: Прежнее значение колонки в строке
+        """
+        if not self._valid or row >= self._count:
+            return
+        low = bisect_left(self._keys, old_value)
+        high = bisect_right(self._keys, old_value)
+        position = self._rows.index(row, low, high)
+        del self._keys[position]
+        del self._rows[position]
+        self._insert(row, getattr(self.table, self.column)[row])
+
+    def remap(self, rows: List[int], moved: array) -> None:
+        """
+        Переносит индекс на новые номера строк после вставок и удалений.
+
+        Значения удаленных строк убираются, номера остальных строк
+        заменяются новыми, вставленные строки добавляются по одной.
+
+        Args:
+            rows: Прежний номер строки на каждой новой позиции (-1 - новая строка)
+            moved: Новый номер строки по прежнему номеру (-1 - строка удалена)
+        """
+        if not self._valid:
+            return
+        count = self._count
+        mapped = list(map(moved.__getitem__, self._rows))
+        if -1 in mapped:
+            keep = [row >= 0 for row in mapped]
+            self._keys = array('d', compress(self._keys, keep))
+            mapped = list(compress(mapped, keep))
+        self._rows = array('l', mapped)
+        self._count = len(rows)
+        added = [new for new, old in enumerate(rows) if old < 0 or old >= count]
+        if len(added) > max(INSERT_LIMIT, self._count // 16):
+            self.rebuild()
+            return
+        values = getattr(self.table, self.column)
+        for row in added:
+            self._insert(row, values[row])
+
+    def range(self, value_range: Range) -> Sequence[int]:
+        """
+        Строки, значения которых попадают в диапазон.
+
+        Args:
+            value_range: Диапазон значений
+
+        Returns:
+            Sequence[int]: Номера строк в порядке возрастания значений
+        """
+        self._sync()
+        keys = self._keys
+        start, stop = 0, len(keys)
+        if value_range.low is not None:
+            bound = bisect_left if value_range.include_low else bisect_right
+            start = bound(keys, value_range.low)
+        if value_range.high is not None:
+            bound = bisect_right if value_range.include_high else bisect_left
+            stop = bound(keys, value_range.high)
+        return self._rows[start:max(start, stop)]
+
+    def ordered(self) -> Sequence[int]:
+        """
+        Все строки в порядке возрастания значений.
+
+        Returns:
+            Sequence[int]: Номера строк
+        """
+        self._sync()
+        return self._rows
+
+    def top(self, k: int, largest: bool = True) -> List[int]:
+        """
+        Первые K строк с наибольшими (или наименьшими) значениями.
+
+        Args:
+            k: Количество строк
+            largest: True - наибольшие значения, False - наименьшие
+
+        Returns:
+            List[int]: Номера строк в порядке убывания (возрастания) значений
+        """
+        self._sync()
+        if k <= 0:
+            return []
+        if largest:
+            return self._rows[-k:].tolist()[::-1]
+        return self._rows[:k].tolist()
+
+
+class CropIndex:
+    """
+    Набор индексов для запросов к таблице культур.
+
+    Attributes:
+        table: Таблица культур
+        sorted_indexes: Отсортированные индексы по колонкам INDEXED_COLUMNS
+    """
+
+    def __init__(self, table: CropTable):
+        """
+        Создание индексов и подписка на изменения таблицы.
+
+        Индексы строятся при первом запросе.
+
+        Args:
+            table: Таблица культур
+        """
+        self.table = table
+        self.sorted_indexes: Dict[str, SortedIndex] = {
+            column: SortedIndex(table, column) for column in INDEXED_COLUMNS
+        }
+        self._by_code: List[array] = []   # Номера строк по коду названия
+        self._count = 0
+        self._valid = False
+        # Отложенные сдвиги строк (позиция, удалено, вставлено) и длина таблицы до первого из них
+        self._edits: List[Tuple[int, int, int]] = []
+        self._edit_base = 0
+        table.subscribe(self._on_change)
+
+    def close(self) -> None:
+        """Отписывает индексы от изменений таблицы."""
+        self.table.unsubscribe(self._on_change)
+
+    # ========== ПОДДЕРЖКА ИНДЕКСОВ ==========
+
+    def _on_change(self, event: str, *args) -> None:
+        """Обработка изменения таблицы."""
+        if event == 'insert' and args[1] == len(self.table):
+            return  # Строки в конце учитываются при следующем запросе
+        length = len(self.table)
+        if event == 'update':
+            row, old = args
+            if self._edits:
+                # Номера строк в индексах еще прежние: замена откладывается как удаление и вставка
+                self._record_edit(row, 1, 1, length)
+                return
+            self._update_name(row, old)
+            for column, index in self.sorted_indexes.items():
+                index.update(row, getattr(old, column))
+        elif event == 'insert':
+            start, stop = args
+            self._record_edit(start, 0, stop - start, length - (stop - start))
+        elif event == 'remove':
+            self._record_edit(args[0], 1, 0, length + 1)
+        else:
+            # Очистка удаляет и таблицу названий
+            self._invalidate()
+
+    def _sync_names(self) -> None:
+        """Включает в хеш-индекс строки, добавленные после последнего запроса."""
+        self._apply_edits()
+        codes = self.table.name_codes
+        if not self._valid:
+            self._by_code, self._count, self._valid = [], 0, True
+        by_code = self._by_code
+        while len(by_code) < len(self.table.names):
+            by_code.append(array('l'))
+        for row in range(self._count, len(codes)):
+            by_code[codes[row]].append(row)
+        self._count = len(codes)
+
+    def _update_name(self, row: int, old: Crop) -> None:
+        """Переносит строку между культурами в хеш-индексе."""
+        if not self._valid or row >= self._count:
+            return
+        new_code = self.table.name_codes[row]
+        old_code = self.table._name_index[old.name]
+        if new_code == old_code:
+            return
+        rows = self._by_code[old_code]
+        del rows[bisect_left(rows, row)]
+        while len(self._by_code) <= new_code:
+            self._by_code.append(array('l'))
+        insort(self._by_code[new_code], row)
+
+    def _record_edit(self, position: int, removed: int, inserted: int, before: int) -> None:
+        """
+        Откладывает сдвиг номеров строк до следующего запроса.
+
+        Args:
+            position: Номер первой затронутой строки
+            removed: Сколько строк удалено с этой позиции
+            inserted: Сколько строк вставлено на их место
+            before: Длина таблицы до изменения
+        """
+        if not self._valid and not any(index._valid for index in self.sorted_indexes.values()):
+            return  # Индексы и так будут построены заново
+        if not self._edits:
+            self._edit_base = before
+        elif len(self._edits) >= EDIT_LIMIT:
+            self._invalidate()
+            return
+        self._edits.append((position, removed, inserted))
+
+    def _invalidate(self) -> None:
+        """Помечает все индексы для перестроения при следующем запросе."""
+        self._edits = []
+        self._valid = False
+        for index in self.sorted_indexes.values():
+            index.invalidate()
+
+    def _apply_edits(self) -> None:
+        """Применяет отложенные вставки и удаления ко всем индексам за один проход."""
+        if not self._edits:
+            return
+        edits, self._edits = self._edits, []
+        rows = list(range(self._edit_base))  # Прежний номер строки на каждой позиции
+        for position, removed, inserted in edits:
+            if position <= len(rows):  # Дальше - еще не учтенные строки в конце таблицы
+                rows[position:position + removed] = [-1] * inserted
+        moved = array('l', [-1]) * self._edit_base
+        for new, old in enumerate(rows):
+            if old >= 0:
+                moved[old] = new
+        self._remap_names(rows, moved)
+        for index in self.sorted_indexes.values():
+            index.remap(rows, moved)
+
+    def _remap_names(self, rows: List[int], moved: array) -> None:
+        """Переносит хеш-индекс на новые номера строк (см. SortedIndex.remap)."""
+        if not self._valid:
+            return
+        count = self._count
+        self._by_code = [
+            array('l', [row for row in map(moved.__getitem__, group) if row >= 0])
+            for group in self._by_code
+        ]
+        self._count = len(rows)
+        added = [new for new, old in enumerate(rows) if old < 0 or old >= count]
+        if len(added) > max(INSERT_LIMIT, self._count // 16):
+            self._valid = False
+            return
+        codes = self.table.name_codes
+        while len(self._by_code) < len(self.table.names):
+            self._by_code.append(array('l'))
+        for row in added:
+            insort(self._by_code[codes[row]], row)
+
+    # ========== ЗАПРОСЫ ==========
+
+    def by_name(self, name: str) -> Sequence[int]:
+        """
+        Строки культуры с заданным названием.
+
+        Args:
+            name: Название культуры (точное совпадение)
+
+        Returns:
+            Sequence[int]: Номера строк в порядке таблицы
+        """
+        self._sync_names()
+        code = self.table._name_index.get(name)
+        if code is None:
+            return array('l')
+        return self._by_code[code]
+
+    def matching(self, text: str) -> List[int]:
+        """
+        Строки культур, в названии которых встречается текст (без учета регистра).
+
+        Просматривается только таблица названий, а не строки.
+
+        Args:
+            text: Искомый текст
+
+        Returns:
+            List[int]: Номера строк в порядке таблицы
+        """
+        self._sync_names()
+        needle = text.casefold()
+        groups = [
+            self._by_code[code] for code, name in enumerate(self.table.names)
+            if needle in name.casefold()
+        ]
+        if len(groups) == 1:
+            return groups[0].tolist()
+        return list(heapq.merge(*groups))
+
+    def range(self, column: str, value_range: Range) -> Sequence[int]:
+        """
+        Строки, значения колонки которых попадают в диапазон.
+
+        Args:
+            column: Колонка из INDEXED_COLUMNS
+            value_range: Диапазон значений
+
+        Returns:
+            Sequence[int]: Номера строк в порядке возрастания значений
+        """
+        self._apply_edits()
+        return self.sorted_indexes[column].range(value_range)
+
+    def top(self, column: str, k: int, largest: bool = True) -> List[int]:
+        """
+        Первые K строк по значению колонки.
+
+        Args:
+            column: Колонка из INDEXED_COLUMNS
+            k: Количество строк
+            largest: True - наибольшие значения, False - наименьшие
+
+        Returns:
+            List[int]: Номера строк
+        """
+        self._apply_edits()
+        return self.sorted_indexes[column].top(k, largest)
+
+    def ordered(self, column: str) -> Sequence[int]:
+        """
+        Все строки в порядке возрастания значений колонки.
+
+        Args:
+            column: Колонка из INDEXED_COLUMNS
+
+        Returns:
+            Sequence[int]: Номера строк
+        """
+        self._apply_edits()
+        return self.sorted_indexes[column].ordered()
+
+    def query(self, text: Optional[str] = None,
+              ranges: Optional[Dict[str, Range]] = None) -> List[int]:
+        """
+        Строки, удовлетворяющие всем условиям.
+
+        Сначала выбирается самое узкое условие по индексу, остальные
+        проверяются только для отобранных строк.
+
+        Args:
+            text: Текст для поиска в названии культуры (None - любая культура)
+            ranges: Диапазоны значений по колонкам из INDEXED_COLUMNS
+
+        Returns:
+            List[int]: Номера строк в порядке таблицы
+        """
+        candidates: List[Sequence[int]] = []
+        if text:
+            candidates.append(self.matching(text))
+        for column, value_range in (ranges or {}).items():
+            candidates.append(self.range(column, value_range))
+        if not candidates:
+            return list(range(len(self.table)))
+
+        rows = min(candidates, key=len)
+        checks = [(getattr(self.table, column), value_range)
+                  for column, value_range in (ranges or {}).items()]
+        if text:
+            names, codes = self.table.names, self.table.name_codes
+            needle = text.casefold()
+            allowed = {code for code, name in enumerate(names) if needle in name.casefold()}
+        selected = []
+        for row in rows:
+            if text and codes[row] not in allowed:
+                continue
+            if all(values[row] in value_range for values, value_range in checks):
+                selected.append(row)
+        selected.sort()
+        return selected
+
+
+def parse_query(text: str) -> Tuple[str, Dict[str, Range]]:
+    """
+    Разбирает строку поиска на текст названия и условия по колонкам.
+
+    Условия записываются как «поле оператор число», например
+    «урожайность>3» или «площадь<=10,5». Поля: площадь (area),
+    урожайность (yield), урожай (harvest). Остальные слова считаются
+    текстом для поиска в названии культуры.
+
+    Args:
+        text: Строка поиска
+
+    Returns:
+        Tuple[str, Dict[str, Range]]: Текст названия и диапазоны по колонкам
+
+    Example:
+        >>> parse_query("пшен урожайность>3")
+        ('пшен', {'yield_per_hectare': Range(low=3.0, high=None, include_low=False, include_high=True)})
+    """
+    words = []
+    ranges: Dict[str, Range] = {}
+    for token in text.split():
+        match = _CONDITION.match(token)
+        column = QUERY_FIELDS.get(match.group(1).casefold()) if match else None
+        if column is None:
+            words.append(token)
+            continue
+        operator, value = match.group(2), float(match.group(3).replace(',', '.'))
+        current = ranges.get(column, Range())
+        if operator in ('>', '>='):
+            current = Range(value, current.high, operator == '>=', current.include_high)
+        elif operator in ('<', '<='):
+            current = Range(current.low, value, current.include_low, operator == '<=')
+        else:
+            current = Range(value, value)
+        ranges[column] = current
+    return " ".join(words), ranges
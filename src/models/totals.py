@@ -0,0 +1,283 @@
+"""
+Инкрементально поддерживаемые итоги сезона.
+
+Содержит накопители, которые обновляются при добавлении, изменении
+и удалении культур, чтобы итоговые значения были доступны за O(1)
+без повторного суммирования всего списка.
+"""
+import math
+from typing import Dict, Sequence
+
+
+class RunningSum:
+    """
+    Накопитель суммы чисел с плавающей точкой.
+
+    В компенсированном режиме используется суммирование Ноймайера:
+    ошибка округления каждой операции копится отдельно, поэтому
+    результат не «уплывает» от полного пересчета даже после
+    миллионов добавлений и вычитаний.
+
+    Attributes:
+        compensated: Использовать ли компенсированное суммирование
+    """
+
+    __slots__ = ('compensated', '_sum', '_compensation')
+
+    def __init__(self, compensated: bool = True):
+        """
+        Инициализация накопителя.
+
+        Args:
+            compensated: Использовать ли компенсированное суммирование
+        """
+        self.compensated = compensated
+        self._sum = 0.0
+        self._compensation = 0.0
+
+    def add(self, value: float) -> None:
+        """Прибавляет значение к сумме."""
+        if not self.compensated:
+            self._sum += value
+            return
+
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._compensation += (self._sum - total) + value
+        else:
+            self._compensation += (value - total) + self._sum
+        self._sum = total
+
+    def subtract(self, value: float) -> None:
+        """Вычитает значение из суммы."""
+        self.add(-value)
+
+    def reset(self) -> None:
+        """Обнуляет сумму."""
+        self._sum = 0.0
+        self._compensation = 0.0
+
+    @property
+    def value(self) -> float:
+        """Текущее значение суммы."""
+        return self._sum + self._compensation
+
+
+class CultureTotals:
+    """
+    Итоги по одной культуре.
+
+    Attributes:
+        count: Количество записей
+        area: Суммарная площадь посева в гектарах
+        harvest: Суммарный урожай в тоннах
+    """
+
+    __slots__ = ('count', 'area', 'harvest')
+
+    def __init__(self, compensated: bool = True):
+        self.count = 0
+        self.area = RunningSum(compensated)
+        self.harvest = RunningSum(compensated)
+
+
+class RunningTotals:
+    """
+    Итоги сезона, обновляемые по одной записи.
+
+    Хранит общий урожай, общую площадь и промежуточные итоги по
+    каждой культуре. Все операции выполняются за O(1).
+
+    Attributes:
+        compensated: Использовать ли компенсированное суммирование
+        count: Количество учтенных записей
+    """
+
+    def __init__(self, compensated: bool = True):
+        """
+        Инициализация итогов.
+
+        Args:
+            compensated: Использовать ли компенсированное суммирование
+        """
+        self.compensated = compensated
+        self.count = 0
+        self._harvest = RunningSum(compensated)
+        self._area = RunningSum(compensated)
+        self._cultures: Dict[str, CultureTotals] = {}
+
+    def add(self, name: str, area: float, harvest: float) -> None:
+        """
+        Учитывает новую запись.
+
+        Args:
+            name: Название культуры
+            area: Площадь посева в гектарах
+            harvest: Общий урожай в тоннах
+        """
+        culture = self._cultures.get(name)
+        if culture is None:
+            culture = self._cultures[name] = CultureTotals(self.compensated)
+        culture.count += 1
+        culture.area.add(area)
+        culture.harvest.add(harvest)
+
+        self.count += 1
+        self._area.add(area)
+        self._harvest.add(harvest)
+
+    def add_batch(self, names: Sequence[str], areas: Sequence[float],
+                  harvests: Sequence[float]) -> None:
+        """
+        Учитывает пакет записей.
+
+        Суммы пакета считаются точно через math.fsum (по группам
+        культур) и прибавляются к накопителям одной операцией на
+        группу, а не на каждую запись.
+
+        Args:
+            names: Колонка названий культур
+            areas: Колонка площадей посева
+            harvests: Колонка общего урожая
+        """
+        unique = {name: code for code, name in enumerate(dict.fromkeys(names))}
+        if len(unique) == 1:
+            # Весь пакет по одной культуре: группы совпадают с колонками
+            area_groups, harvest_groups = [areas], [harvests]
+        else:
+            area_groups = [[] for _ in unique]
+            harvest_groups = [[] for _ in unique]
+            add_area = [group.append for group in area_groups]
+            add_harvest = [group.append for group in harvest_groups]
+
+            # Один проход: раскладка значений по группам культур
+            for code, area, harvest in zip(map(unique.__getitem__, names), areas, harvests):
+                add_area[code](area)
+                add_harvest[code](harvest)
+
+        for name, group_areas, group_harvests in zip(unique, area_groups, harvest_groups):
+            culture = self._cultures.get(name)
+            if culture is None:
+                culture = self._cultures[name] = CultureTotals(self.compensated)
+            culture.count += len(group_harvests)
+            culture.area.add(math.fsum(group_areas))
+            culture.harvest.add(math.fsum(group_harvests))
+
+        self.count += len(harvests)
+        self._area.add(math.fsum(areas))
+        self._harvest.add(math.fsum(harvests))
+
+    def add_group(self, name: str, count: int, area: float, harvest: float) -> None:
+        """
+        Учитывает группу записей одной культуры по готовым суммам.
+
+        Используется при загрузке сохраненных итогов, чтобы не
+        суммировать строки заново.
+
+        Args:
+            name: Название культуры
+            count: Количество записей группы
+            area: Суммарная площадь посева группы
+            harvest: Суммарный урожай группы
+        """
+        if not count:
+            return
+        culture = self._cultures.get(name)
+        if culture is None:
+            culture = self._cultures[name] = CultureTotals(self.compensated)
+        culture.count += count
+        culture.area.add(area)
+        culture.harvest.add(harvest)
+
+        self.count += count
+        self._area.add(area)
+        self._harvest.add(harvest)
+
+    def remove(self, name: str, area: float, harvest: float) -> None:
+        """
+        Исключает ранее учтенную запись.
+
+        Args:
+            name: Название культуры
+            area: Площадь посева в гектарах
+            harvest: Общий урожай в тоннах
+
+        Raises:
+            KeyError: Если по культуре нет учтенных записей
+        """
+        culture = self._cultures[name]
+        culture.count -= 1
+        if culture.count:
+            culture.area.subtract(area)
+            culture.harvest.subtract(harvest)
+        else:
+            # Последняя запись культуры: итог ровно нулевой
+            del self._cultures[name]
+
+        self.count -= 1
+        if self.count:
+            self._area.subtract(area)
+            self._harvest.subtract(harvest)
+        else:
+            self._area.reset()
+            self._harvest.reset()
+
+    def update(self, old_name: str, old_area: float, old_harvest: float,
+               name: str, area: float, harvest: float) -> None:
+        """
+        Заменяет значения ранее учтенной записи.
+
+        Args:
+            old_name: Прежнее название культуры
+            old_area: Прежняя площадь посева
+            old_harvest: Прежний общий урожай
+            name: Новое название культуры
+            area: Новая площадь посева
+            harvest: Новый общий урожай
+        """
+        self.remove(old_name, old_area, old_harvest)
+        self.add(name, area, harvest)
+
+    def clear(self) -> None:
+        """Обнуляет все итоги."""
+        self.count = 0
+        self._area.reset()
+        self._harvest.reset()
+        self._cultures.clear()
+
+    @property
+    def total_harvest(self) -> float:
+        """Общий урожай за сезон в тоннах."""
+        return self._harvest.value
+
+    @property
+    def total_area(self) -> float:
+        """Общая площадь посева в гектарах."""
+        return self._area.value
+
+    def harvest_by_name(self) -> Dict[str, float]:
+        """
+        Возвращает промежуточные итоги урожая по культурам.
+
+        Returns:
+            Dict[str, float]: Суммарный урожай по названиям культур
+        """
+        return {name: culture.harvest.value for name, culture in self._cultures.items()}
+
+    def area_by_name(self) -> Dict[str, float]:
+        """
+        Возвращает промежуточные итоги площади по культурам.
+
+        Returns:
+            Dict[str, float]: Суммарная площадь по названиям культур
+        """
+        return {name: culture.area.value for name, culture in self._cultures.items()}
+
+    def count_by_name(self) -> Dict[str, int]:
+        """
+        Возвращает количество записей по культурам.
+
+        Returns:
+            Dict[str, int]: Количество записей по названиям культур
+        """
+        return {name: culture.count for name, culture in self._cultures.items()}
@@ -0,0 +1,20 @@
+"""
+Модуль сетевого приема данных от полевых терминалов.
+
+Подмодули загружаются лениво при первом обращении к имени.
+"""
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
+
+if TYPE_CHECKING:
+    from .client import IngestClient, LoadReport, run_load
+    from .server import IngestServer, IngestStats
+
+__getattr__, __dir__, __all__ = attach(__name__, {
+    'IngestClient': '.client',
+    'LoadReport': '.client',
+    'run_load': '.client',
+    'IngestServer': '.server',
+    'IngestStats': '.server',
+})
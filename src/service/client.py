@@ -0,0 +1,274 @@
+"""
+Клиент сервера приема записей и генератор нагрузки.
+
+IngestClient отправляет пакеты записей по протоколу кадров сервера
+(см. src.service.server). run_load имитирует несколько терминалов
+сразу: каждое соединение отправляет свою долю записей пакетами и
+ждет ответа на каждый пакет. Используется вместо настоящих
+терминалов в тестах и замерах пропускной способности.
+
+Запуск:
+    python -m src.service.client [--port 8765] [--records 100000]
+        [--connections 8] [--batch 500] [--format json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from .server import DEFAULT_HOST, DEFAULT_PORT
+
+# Культуры в генерируемых записях
+CULTURES = ("Пшеница", "Ячмень", "Овес", "Рожь", "Кукуруза", "Подсолнечник")
+
+# Размер пакета по умолчанию
+DEFAULT_BATCH = 500
+
+Record = Tuple[str, float, float]
+
+
+def encode_batch(records: Sequence[Record], fmt: str = 'json') -> bytes:
+    """
+    Кодирует пакет записей в кадр протокола.
+
+    Args:
+        records: Записи (название, площадь, урожайность)
+        fmt: Формат тела: 'json' или 'csv'
+
+    Returns:
+        bytes: Кадр (заголовок и тело)
+    """
+    if fmt == 'json':
+        body = json.dumps([list(record) for record in records], ensure_ascii=False)
+    elif fmt == 'csv':
+        body = "name,area,yield_per_hectare\n" + "".join(
+            f"{name},{area!r},{yield_per_hectare!r}\n"
+            for name, area, yield_per_hectare in records
+        )
+    else:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+    payload = body.encode('utf-8')
+    return f"{fmt.upper()} {len(payload)}\n".encode('ascii') + payload
+
+
+def make_records(count: int, seed: int = 1, invalid_share: float = 0.0) -> List[Record]:
+    """
+    Создает тестовые записи терминала.
+
+    Args:
+        count: Количество записей
+        seed: Начальное значение генератора случайных чисел
+        invalid_share: Доля некорректных записей (отрицательная площадь)
+
+    Returns:
+        List[Record]: Записи (название, площадь, урожайность)
+    """
+    rng = random.Random(seed)
+    return [
+        (rng.choice(CULTURES),
+         -1.0 if rng.random() < invalid_share else round(rng.uniform(0.5, 200.0), 2),
+         round(rng.uniform(0.5, 9.0), 3))
+        for _ in range(count)
+    ]
+
+
+class IngestClient:
+    """
+    Соединение терминала с сервером приема.
+
+    Example:
+        >>> async with IngestClient(host, port) as client:
+        ...     response = await client.send(records)
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Args:
+            host: Адрес сервера
+            port: Порт сервера
+        """
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self) -> None:
+        """Открывает соединение."""
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self) -> None:
+        """Закрывает соединение."""
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
+
+    async def __aenter__(self) -> 'IngestClient':
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def send_frame(self, frame: bytes) -> dict:
+        """
+        Отправляет готовый кадр и ждет ответа.
+
+        Args:
+            frame: Кадр (заголовок и тело)
+
+        Returns:
+            dict: Ответ сервера
+
+        Raises:
+            ConnectionError: Если сервер закрыл соединение без ответа
+        """
+        self._writer.write(frame)
+        await self._writer.drain()
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Сервер закрыл соединение")
+        return json.loads(line)
+
+    async def send(self, records: Sequence[Record], fmt: str = 'json') -> dict:
+        """
+        Отправляет пакет записей и ждет ответа.
+
+        Args:
+            records: Записи (название, площадь, урожайность)
+            fmt: Формат тела: 'json' или 'csv'
+
+        Returns:
+            dict: Ответ сервера {"accepted", "rejected", "errors"}
+        """
+        return await self.send_frame(encode_batch(records, fmt))
+
+
+@dataclass
+class LoadReport:
+    """
+    Итог нагрузочного прогона.
+
+    Attributes:
+        sent: Количество отправленных записей
+        accepted: Количество записей, принятых сервером
+        rejected: Количество записей, отклоненных сервером
+        batches: Количество отправленных пакетов
+        seconds: Длительность прогона
+    """
+    sent: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Принятых записей в секунду."""
+        return self.accepted / self.seconds if self.seconds else 0.0
+
+
+async def run_load(host: str, port: int, records: int, connections: int = 8,
+                   batch_size: int = DEFAULT_BATCH, fmt: str = 'json',
+                   invalid_share: float = 0.0, seed: int = 1) -> LoadReport:
+    """
+    Отправляет записи с нескольких соединений одновременно.
+
+    Кадры кодируются до начала замера, поэтому время прогона
+    отражает работу сервера, а не генератора.
+
+    Args:
+        host: Адрес сервера
+        port: Порт сервера
+        records: Общее количество записей
+        connections: Количество одновременных соединений (терминалов)
+        batch_size: Количество записей в пакете
+        fmt: Формат тела: 'json' или 'csv'
+        invalid_share: Доля некорректных записей
+        seed: Начальное значение генератора случайных чисел
+
+    Returns:
+        LoadReport: Итог прогона
+    """
+    data = make_records(records, seed, invalid_share)
+    shares = [data[i::connections] for i in range(connections)]
+    frames = [
+        [encode_batch(share[start:start + batch_size], fmt)
+         for start in range(0, len(share), batch_size)]
+        for share in shares
+    ]
+    report = LoadReport(sent=records)
+
+    async def terminal(terminal_frames: List[bytes]) -> None:
+        async with IngestClient(host, port) as client:
+            for frame in terminal_frames:
+                response = await client.send_frame(frame)
+                if "error" in response:
+                    raise ConnectionError(response["error"])
+                report.accepted += response["accepted"]
+                report.rejected += response["rejected"]
+                report.batches += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(terminal(terminal_frames) for terminal_frames in frames if terminal_frames))
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Создает разбор аргументов командной строки генератора нагрузки.
+
+    Returns:
+        argparse.ArgumentParser: Настроенный разбор аргументов
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.service.client",
+        description="Генератор нагрузки для сервера приема записей."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="адрес сервера")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="порт сервера")
+    parser.add_argument("--records", type=int, default=100_000, help="количество записей")
+    parser.add_argument("--connections", type=int, default=8, help="количество соединений")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="записей в пакете")
+    parser.add_argument("--format", choices=("json", "csv"), default="json",
+                        help="формат пакетов")
+    parser.add_argument("--invalid", type=float, default=0.0,
+                        help="доля некорректных записей")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Запуск генератора нагрузки из командной строки.
+
+    Args:
+        argv: Аргументы командной строки (None - sys.argv[1:])
+
+    Returns:
+        int: Код возврата
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        report = asyncio.run(run_load(
+            args.host, args.port, args.records, args.connections,
+            args.batch, args.format, args.invalid
+        ))
+    except OSError as e:
+        print(f"Ошибка: нет соединения с {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+    print(f"Отправлено: {report.sent}, принято: {report.accepted}, "
+          f"отклонено: {report.rejected}, пакетов: {report.batches}")
+    print(f"Время: {report.seconds:.3f} с, {report.rate:,.0f} записей/с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
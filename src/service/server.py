@@ -0,0 +1,390 @@
+"""
+Сервер приема записей от полевых терминалов (asyncio, TCP).
+
+Терминалы (комбайны, весовые) подключаются к серверу на localhost и
+присылают пакеты записей в JSON или CSV. Каждый пакет - это кадр:
+
+    строка заголовка  "<ФОРМАТ> <размер в байтах>\\n", где ФОРМАТ -
+                      JSON или CSV;
+    тело              ровно указанное количество байт UTF-8.
+
+Тело JSON - массив записей: объектов {"name", "area",
+"yield_per_hectare"} или массивов [название, площадь, урожайность].
+Тело CSV - строки с теми же колонками (заголовок и разделитель
+распознаются, как при импорте файла).
+
+На каждый кадр сервер отвечает одной строкой JSON:
+{"accepted": N, "rejected": M, "errors": [...]} после того, как
+принятые записи учтены в общей таблице сезона, или {"error": "..."}
+при нарушении протокола (соединение после этого закрывается).
+
+Записи проверяются теми же правилами, что и при импорте файла
+(parse_rows, совпадает с Crop._validate_data). Проверенные пакеты
+проходят через ограниченную очередь к единственной задаче, которая
+дописывает их в CropTable. Когда очередь заполнена, обработчики
+соединений перестают читать сокеты и терминалы притормаживаются
+механизмом окна TCP (обратное давление).
+
+Запуск:
+    python -m src.service.server [--host 127.0.0.1] [--port 8765]
+"""
+import argparse
+import asyncio
+import io
+import json
+import sys
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import List, Optional, Set, Tuple
+
+from ..models.crop import RowError
+from ..models.crop_table import CropTable
+from ..utils import metrics
+from ..utils.importer import FIELDS, ImportReport, iter_record_chunks, iter_rows, parse_rows
+
+# Адрес и порт по умолчанию
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Форматы тела кадра
+FRAME_FORMATS = ('JSON', 'CSV')
+
+# Максимальный размер тела одного кадра
+MAX_FRAME_BYTES = 8 * 1024 * 1024
+
+# Сколько проверенных пакетов может ждать записи в таблицу
+MAX_PENDING = 64
+
+# Сколько ошибок по записям возвращается в ответе на пакет
+SHOWN_ERRORS = 20
+
+Record = Tuple[str, float, float]
+
+
+class ProtocolError(Exception):
+    """Нарушение протокола кадров."""
+
+
+@dataclass
+class IngestStats:
+    """
+    Счетчики сервера.
+
+    Attributes:
+        connections: Количество принятых соединений
+        active: Количество открытых соединений
+        batches: Количество обработанных пакетов
+        accepted: Количество принятых записей
+        rejected: Количество отклоненных записей
+        bytes: Объем принятых тел кадров в байтах
+    """
+    connections: int = 0
+    active: int = 0
+    batches: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    bytes: int = 0
+
+
+def parse_json_batch(payload: bytes, report: ImportReport) -> List[Record]:
+    """
+    Разбирает и проверяет пакет записей JSON.
+
+    Args:
+        payload: Тело кадра
+        report: Отчет, в который записываются ошибки по записям
+
+    Returns:
+        List[Record]: Проверенные записи (название, площадь, урожайность)
+
+    Raises:
+        ProtocolError: Если тело не является массивом JSON
+    """
+    try:
+        items = json.loads(payload)
+    except ValueError as e:
+        raise ProtocolError(f"некорректный JSON: {e}") from None
+    if not isinstance(items, list):
+        raise ProtocolError("тело JSON должно быть массивом записей")
+
+    rows = []
+    errors: List[RowError] = []
+    for line, item in enumerate(items, start=1):
+        if isinstance(item, dict):
+            item = [item.get(name) for name in FIELDS]
+        elif not isinstance(item, list):
+            errors.append(RowError(line, 'row', "запись должна быть объектом или массивом"))
+            continue
+        rows.append((line, ["" if value is None else str(value) for value in item]))
+    records, row_errors = parse_rows(rows)
+    errors.extend(row_errors)
+    errors.sort(key=attrgetter('line'))
+    for error in errors:
+        report.add_error(error)
+    return records
+
+
+def parse_csv_batch(payload: bytes, report: ImportReport) -> List[Record]:
+    """
+    Разбирает и проверяет пакет записей CSV/TSV.
+
+    Args:
+        payload: Тело кадра
+        report: Отчет, в который записываются ошибки по записям
+
+    Returns:
+        List[Record]: Проверенные записи (название, площадь, урожайность)
+
+    Raises:
+        ProtocolError: Если тело не в кодировке UTF-8
+    """
+    try:
+        text = payload.decode('utf-8-sig')
+    except UnicodeDecodeError as e:
+        raise ProtocolError(f"тело CSV не в кодировке UTF-8: {e}") from None
+    records: List[Record] = []
+    for chunk in iter_record_chunks(iter_rows(io.StringIO(text, newline='')), report):
+        records.extend(chunk)
+    return records
+
+
+class IngestServer:
+    """
+    Асинхронный сервер приема пакетов записей в общую таблицу сезона.
+
+    Attributes:
+        table: Таблица сезона, в которую дописываются принятые записи
+        host: Адрес прослушивания
+        port: Порт прослушивания (после start - фактический порт)
+        stats: Счетчики сервера
+
+    Example:
+        >>> async with IngestServer(table, port=0) as server:
+        ...     report = await run_load(server.host, server.port, 10_000)
+    """
+
+    def __init__(self, table: Optional[CropTable] = None, host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT, max_pending: int = MAX_PENDING,
+                 max_frame_bytes: int = MAX_FRAME_BYTES):
+        """
+        Инициализация сервера (прослушивание начинается в start).
+
+        Args:
+            table: Таблица сезона (None - новая пустая таблица)
+            host: Адрес прослушивания
+            port: Порт прослушивания (0 - выбрать свободный)
+            max_pending: Размер очереди пакетов, ожидающих записи в таблицу
+            max_frame_bytes: Максимальный размер тела одного кадра
+        """
+        self.table = CropTable() if table is None else table
+        self.host = host
+        self.port = port
+        self.max_frame_bytes = max_frame_bytes
+        self.stats = IngestStats()
+        self._max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._applier: Optional[asyncio.Task] = None
+        self._handlers: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Начинает прослушивание порта и запись пакетов в таблицу."""
+        self._queue = asyncio.Queue(self._max_pending)
+        self._applier = asyncio.create_task(self._apply_loop())
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Закрывает соединения и дописывает уже принятые пакеты."""
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        await self._queue.join()
+        self._applier.cancel()
+        await asyncio.gather(self._applier, return_exceptions=True)
+        self._server = None
+
+    async def __aenter__(self) -> 'IngestServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def serve_forever(self) -> None:
+        """Обслуживает соединения до отмены задачи."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    # ========== СОЕДИНЕНИЯ ==========
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обслуживание одного терминала: кадр - проверка - очередь - ответ."""
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        self.stats.connections += 1
+        self.stats.active += 1
+        try:
+            while True:
+                try:
+                    frame = await self._read_frame(reader)
+                except ProtocolError as e:
+                    await self._respond(writer, {"error": str(e)})
+                    break
+                if frame is None:
+                    break
+                fmt, payload = frame
+                try:
+                    response = await self._process(fmt, payload)
+                except ProtocolError as e:
+                    response = {"error": str(e)}
+                await self._respond(writer, response)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Терминал отключился посреди кадра
+        except asyncio.CancelledError:
+            pass  # Остановка сервера
+        finally:
+            self.stats.active -= 1
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _read_frame(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, bytes]]:
+        """Читает один кадр (None - соединение закрыто терминалом)."""
+        header = await reader.readline()
+        if not header:
+            return None
+        parts = header.decode('ascii', 'replace').split()
+        if len(parts) != 2 or parts[0].upper() not in FRAME_FORMATS or not parts[1].isdigit():
+            raise ProtocolError("ожидается заголовок кадра '<JSON|CSV> <размер>'")
+        size = int(parts[1])
+        if size > self.max_frame_bytes:
+            raise ProtocolError(f"кадр больше {self.max_frame_bytes} байт")
+        payload = await reader.readexactly(size)
+        self.stats.bytes += size
+        return parts[0].upper(), payload
+
+    async def _process(self, fmt: str, payload: bytes) -> dict:
+        """Проверяет пакет и ждет его записи в таблицу."""
+        report = ImportReport(max_errors=SHOWN_ERRORS)
+        with metrics.timer("service.parse"):
+            if fmt == 'JSON':
+                records = parse_json_batch(payload, report)
+            else:
+                records = parse_csv_batch(payload, report)
+
+        if records:
+            # Ожидание места в очереди - обратное давление на терминал
+            done = asyncio.get_running_loop().create_future()
+            await self._queue.put((records, done))
+            await done
+
+        self.stats.batches += 1
+        self.stats.accepted += len(records)
+        self.stats.rejected += report.failed
+        return {
+            "accepted": len(records),
+            "rejected": report.failed,
+            "errors": [str(error) for error in report.errors],
+        }
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, response: dict) -> None:
+        """Отправляет ответ строкой JSON."""
+        writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    # ========== ЗАПИСЬ В ТАБЛИЦУ ==========
+
+    async def _apply_loop(self) -> None:
+        """
+        Единственный писатель таблицы.
+
+        Пакеты, накопившиеся в очереди, дописываются одним вызовом
+        extend_rows, чтобы подписчики таблицы получали одно событие.
+        """
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            rows = [record for records, _ in batch for record in records]
+            try:
+                with metrics.timer("service.apply"):
+                    self.table.extend_rows(rows, validate=False)
+                for _, done in batch:
+                    if not done.done():
+                        done.set_result(None)
+            except Exception as e:
+                for _, done in batch:
+                    if not done.done():
+                        done.set_exception(e)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Создает разбор аргументов командной строки сервера.
+
+    Returns:
+        argparse.ArgumentParser: Настроенный разбор аргументов
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.service.server",
+        description="Прием пакетов записей урожая от полевых терминалов."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="адрес прослушивания")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="порт прослушивания")
+    parser.add_argument("--interval", type=float, default=5.0,
+                        help="период вывода итогов в секундах")
+    return parser
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Работа сервера с периодическим выводом итогов."""
+    server = IngestServer(host=args.host, port=args.port)
+    await server.start()
+    print(f"Прием записей на {server.host}:{server.port} (Ctrl+C - остановка)")
+    try:
+        while True:
+            await asyncio.sleep(args.interval)
+            stats = server.stats
+            print(f"Соединений: {stats.active}, записей: {stats.accepted} "
+                  f"(отклонено {stats.rejected}), "
+                  f"общий урожай: {server.table.totals.total_harvest:.2f} т")
+    finally:
+        await server.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Запуск сервера из командной строки.
+
+    Args:
+        argv: Аргументы командной строки (None - sys.argv[1:])
+
+    Returns:
+        int: Код возврата
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Ошибка: не удалось открыть порт {args.port}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
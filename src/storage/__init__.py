@@ -0,0 +1,26 @@
+"""
+Модуль хранения данных приложения.
+
+Подмодули загружаются лениво при первом обращении к имени.
+"""
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
+
+if TYPE_CHECKING:
+    from .binary import SnapshotView, load_snapshot, save_snapshot
+    from .journal import DEFAULT_JOURNAL_DIR, Journal, JournalLockedError, JournalStats
+    from .sqlite_store import DEFAULT_STORE_PATH, SeasonStore, SeasonView
+
+__getattr__, __dir__, __all__ = attach(__name__, {
+    'SnapshotView': '.binary',
+    'load_snapshot': '.binary',
+    'save_snapshot': '.binary',
+    'DEFAULT_JOURNAL_DIR': '.journal',
+    'Journal': '.journal',
+    'JournalLockedError': '.journal',
+    'JournalStats': '.journal',
+    'DEFAULT_STORE_PATH': '.sqlite_store',
+    'SeasonStore': '.sqlite_store',
+    'SeasonView': '.sqlite_store',
+})
@@ -0,0 +1,318 @@
+"""
+Двоичные снимки таблицы культур.
+
+Снимок - файл фиксированной структуры (все числа little-endian):
+
+    заголовок     SNAPSHOT_HEADER: сигнатура, версия формата, флаги,
+                  количество строк, количество названий, размер
+                  таблицы строк в байтах;
+    названия      смещения array('I') (количество названий + 1)
+                  и названия в UTF-8 подряд, выравнивание до 8 байт;
+    итоги         по культурам: количество записей int64, площадь
+                  и урожай float64 (три блока по количеству названий);
+    колонки       коды названий int64, площадь, урожайность и урожай
+                  float64 (четыре блока по количеству строк).
+
+Каждое поле записи имеет фиксированную ширину, а записи хранятся
+по колонкам, поэтому блок колонки целиком совпадает с содержимым
+array колоночной модели: при чтении через mmap блок становится
+memoryview без копирования (SnapshotView) или копируется в array
+одной операцией (load_snapshot). Итоги по культурам сохраняются
+вместе со строками и не пересчитываются при загрузке.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List
+
+from ..models.crop import Crop
+from ..models.crop_table import CropTable
+from ..models.totals import RunningTotals
+from ..utils.metrics import timed
+
+# Сигнатура файла снимка
+SNAPSHOT_MAGIC = b'HRVS'
+
+# Версия формата снимка
+SNAPSHOT_VERSION = 1
+
+# Заголовок: сигнатура, версия, флаги, строки, названия, размер названий
+SNAPSHOT_HEADER = struct.Struct('<4sHHQII')
+
+# Расширение файлов снимков
+SNAPSHOT_EXTENSION = '.hrvs'
+
+# Тип array для кодов названий шириной 8 байт
+_CODE_TYPE = 'l' if array('l').itemsize == 8 else 'q'
+
+# Колонки можно отдавать без копирования только на little-endian платформе
+_NATIVE = sys.byteorder == 'little'
+
+
+def _padding(size: int) -> int:
+    """Количество байт выравнивания блока до 8."""
+    return -size % 8
+
+
+def _to_file(values: array) -> bytes:
+    """Байты колонки в порядке little-endian."""
+    if _NATIVE:
+        return values.tobytes()
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+@timed("snapshot.save")
+def save_snapshot(table: CropTable, path: str, durable: bool = True) -> int:
+    """
+    Сохраняет таблицу культур в двоичный снимок.
+
+    Файл записывается во временный файл рядом с целевым и заменяет
+    его только после успешной записи и fsync, поэтому после замены
+    на диске всегда целый снимок.
+
+    Args:
+        table: Таблица культур
+        path: Путь к файлу снимка
+        durable: Вызывать ли fsync перед заменой (False - только для тестов)
+
+    Returns:
+        int: Размер снимка в байтах
+    """
+    encoded = [name.encode('utf-8') for name in table.names]
+    offsets = array('I', [0])
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+    strings = b''.join(encoded)
+
+    counts = table.totals.count_by_name()
+    areas = table.totals.area_by_name()
+    harvests = table.totals.harvest_by_name()
+    codes = table.name_codes
+    if codes.itemsize != 8:
+        codes = array(_CODE_TYPE, codes)
+
+    blocks = [
+        SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(table),
+                             len(table.names), len(strings)),
+        _to_file(offsets),
+        strings,
+        bytes(_padding(SNAPSHOT_HEADER.size + offsets.itemsize * len(offsets) + len(strings))),
+        _to_file(array('q', [counts.get(name, 0) for name in table.names])),
+        _to_file(array('d', [areas.get(name, 0.0) for name in table.names])),
+        _to_file(array('d', [harvests.get(name, 0.0) for name in table.names])),
+        _to_file(codes),
+        _to_file(table.area),
+        _to_file(table.yield_per_hectare),
+        _to_file(table.total_harvest),
+    ]
+
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            for block in blocks:
+                f.write(block)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return sum(map(len, blocks))
+
+
+class SnapshotView:
+    """
+    Представление двоичного снимка без копирования данных.
+
+    Файл отображается в память через mmap, а колонки - это memoryview
+    над отображением: страницы файла читаются операционной системой
+    по мере обращения к строкам. Представление нужно закрыть (close
+    или with), после закрытия колонки недоступны.
+
+    Attributes:
+        path: Путь к файлу снимка
+        names: Таблица строк с названиями культур
+        name_codes: Колонка кодов названий
+        area: Колонка площадей посева в гектарах
+        yield_per_hectare: Колонка урожайности в тоннах на гектар
+        total_harvest: Колонка общего урожая в тоннах
+    """
+
+    def __init__(self, path: str):
+        """
+        Открытие снимка и проверка его структуры.
+
+        Args:
+            path: Путь к файлу снимка
+
+        Raises:
+            ValueError: Если файл не является снимком, версия формата
+                не поддерживается или файл поврежден
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < SNAPSHOT_HEADER.size:
+                raise ValueError(f"Файл '{path}' не является снимком таблицы культур")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+        try:
+            self._open(size)
+        except BaseException:
+            self.close()
+            raise
+
+    def _block(self, offset: int, count: int, typecode: str) -> memoryview:
+        """Колонка из count значений типа typecode, начиная со смещения offset."""
+        raw = memoryview(self._mmap)[offset:offset + count * array(typecode).itemsize]
+        view = raw.cast(typecode)
+        self._views.extend((raw, view))
+        return view
+
+    def _open(self, size: int) -> None:
+        """Разбирает заголовок и размечает блоки снимка."""
+        magic, version, _flags, rows, name_count, strings_size = \
+            SNAPSHOT_HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Файл '{self.path}' не является снимком таблицы культур")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Версия снимка {version} не поддерживается (ожидается {SNAPSHOT_VERSION})"
+            )
+
+        names_end = SNAPSHOT_HEADER.size + 4 * (name_count + 1) + strings_size
+        totals_start = names_end + _padding(names_end)
+        columns_start = totals_start + 24 * name_count
+        if size != columns_start + 32 * rows:
+            raise ValueError(f"Снимок '{self.path}' поврежден: неверный размер файла")
+
+        offsets = self._load(SNAPSHOT_HEADER.size, name_count + 1, 'I')
+        strings = self._mmap[names_end - strings_size:names_end]
+        self.names: List[str] = [
+            strings[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(name_count)
+        ]
+
+        self._counts = self._load(totals_start, name_count, 'q')
+        self._areas = self._load(totals_start + 8 * name_count, name_count, 'd')
+        self._harvests = self._load(totals_start + 16 * name_count, name_count, 'd')
+
+        self._rows = rows
+        self._columns_start = columns_start
+        if _NATIVE:
+            self.name_codes = self._block(columns_start, rows, 'q')
+            self.area = self._block(columns_start + 8 * rows, rows, 'd')
+            self.yield_per_hectare = self._block(columns_start + 16 * rows, rows, 'd')
+            self.total_harvest = self._block(columns_start + 24 * rows, rows, 'd')
+        else:
+            self.name_codes = self._load(columns_start, rows, _CODE_TYPE)
+            self.area = self._load(columns_start + 8 * rows, rows, 'd')
+            self.yield_per_hectare = self._load(columns_start + 16 * rows, rows, 'd')
+            self.total_harvest = self._load(columns_start + 24 * rows, rows, 'd')
+
+    def _load(self, offset: int, count: int, typecode: str) -> array:
+        """Копирует блок снимка в array (с учетом порядка байт)."""
+        values = array(typecode)
+        with memoryview(self._mmap) as raw:
+            values.frombytes(raw[offset:offset + count * values.itemsize])
+        if not _NATIVE:
+            values.byteswap()
+        return values
+
+    def totals(self) -> RunningTotals:
+        """
+        Сохраненные итоги снимка.
+
+        Returns:
+            RunningTotals: Итоги по культурам и общие итоги
+        """
+        totals = RunningTotals()
+        for name, count, area, harvest in zip(self.names, self._counts,
+                                              self._areas, self._harvests):
+            totals.add_group(name, count, area, harvest)
+        return totals
+
+    def harvest_by_name(self) -> Dict[str, float]:
+        """
+        Сохраненный урожай по культурам.
+
+        Returns:
+            Dict[str, float]: Суммарный урожай по названиям культур
+        """
+        return {
+            name: harvest
+            for name, count, harvest in zip(self.names, self._counts, self._harvests)
+            if count
+        }
+
+    def to_table(self) -> CropTable:
+        """
+        Загружает снимок в таблицу культур.
+
+        Каждая колонка копируется в array одной операцией, итоги
+        восстанавливаются из снимка без пересчета строк.
+
+        Returns:
+            CropTable: Независимая от файла таблица культур
+        """
+        start, rows = self._columns_start, self._rows
+        return CropTable.from_columns(
+            self.names,
+            self._load(start, rows, _CODE_TYPE),
+            self._load(start + 8 * rows, rows, 'd'),
+            self._load(start + 16 * rows, rows, 'd'),
+            self._load(start + 24 * rows, rows, 'd'),
+            totals=self.totals()
+        )
+
+    def close(self) -> None:
+        """Освобождает колонки и отображение файла."""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        if not self._mmap.closed:
+            self._mmap.close()
+
+    def __enter__(self) -> 'SnapshotView':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, index: int) -> Crop:
+        """Возвращает строку снимка в виде объекта Crop."""
+        return Crop(
+            name=self.names[self.name_codes[index]],
+            area=self.area[index],
+            yield_per_hectare=self.yield_per_hectare[index]
+        )
+
+
+@timed("snapshot.load")
+def load_snapshot(path: str) -> CropTable:
+    """
+    Загружает двоичный снимок в таблицу культур.
+
+    Args:
+        path: Путь к файлу снимка
+
+    Returns:
+        CropTable: Таблица культур
+
+    Raises:
+        ValueError: Если файл не является снимком или поврежден
+
+    Example:
+        >>> save_snapshot(table, "season.hrvs")
+        >>> load_snapshot("season.hrvs").totals.total_harvest
+    """
+    with SnapshotView(path) as view:
+        return view.to_table()
@@ -0,0 +1,520 @@
+"""
+Журнал упреждающей записи (write-ahead log) для таблицы культур.
+
+Журнал подписывается на изменения CropTable и дописывает каждое
+изменение (добавление, вставку, изменение, удаление строки, очистку)
+в конец файла. Запись выполняет фоновый поток: обработчик изменения
+только кодирует запись и кладет ее в буфер, поэтому окно приложения
+не ждет диска. Поток записывает все накопившиеся записи одним
+вызовом write и одним fsync (групповая фиксация).
+
+Формат записи журнала (little-endian):
+
+    CRC32 (uint32) тела записи;
+    тело: операция (uint8), длина названия (uint32), номер строки
+    (int64), площадь и урожайность (float64), название в UTF-8.
+
+Оборванная при сбое последняя запись не проходит проверку CRC и
+отбрасывается при восстановлении.
+
+Периодически журнал сжимается: фоновый поток применяет записанный
+журнал к снимку его поколения, сохраняет результат в двоичный снимок
+(src.storage.binary) следующего поколения, и записи продолжаются в
+новый пустой журнал этого поколения. Таблица в окне приложения при
+этом не копируется. Файлы прежнего поколения удаляются только после
+того, как снимок записан на диск, поэтому сбой в любой момент
+оставляет согласованную пару «снимок + журнал».
+При запуске загружается последний снимок и к нему применяются
+записи журнала.
+"""
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from ..models.crop import Crop
+from ..models.crop_table import CropTable
+from ..utils.metrics import timed
+from .binary import load_snapshot, save_snapshot
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+# Каталог журнала по умолчанию (рядом с базой сезонов)
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".harvest_accounting", "journal")
+
+# Операции журнала
+OP_INSERT = 1
+OP_UPDATE = 2
+OP_REMOVE = 3
+OP_CLEAR = 4
+
+# Контрольная сумма записи и тело записи без названия
+CHECKSUM = struct.Struct('<I')
+ENTRY = struct.Struct('<BIqdd')
+RECORD = struct.Struct('<IBIqdd')
+
+# Через сколько записей журнал сжимается в снимок
+COMPACT_ENTRIES = 100_000
+
+# Пауза перед фиксацией для накопления записей (секунды)
+COMMIT_DELAY = 0.01
+
+# Файл блокировки каталога журнала (один журнал - один процесс)
+LOCK_FILE = "journal.lock"
+
+
+class JournalLockedError(OSError):
+    """Каталог журнала уже используется другим процессом."""
+
+
+def _snapshot_path(directory: str, generation: int) -> str:
+    return os.path.join(directory, f"snapshot.{generation:06d}.hrvs")
+
+
+def _journal_path(directory: str, generation: int) -> str:
+    return os.path.join(directory, f"journal.{generation:06d}.log")
+
+
+def _fsync_directory(directory: str) -> None:
+    """Фиксирует на диске создание и переименование файлов каталога (POSIX)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Каталоги нельзя открыть (Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _lock_file(path: str):
+    """
+    Открывает файл блокировки и захватывает его без ожидания.
+
+    Блокировка снимается операционной системой при закрытии файла
+    или завершении процесса, в том числе аварийном.
+
+    Raises:
+        JournalLockedError: Если блокировку держит другой процесс
+    """
+    lock = open(path, 'a+b')
+    try:
+        if sys.platform == 'win32':
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError as e:
+        lock.close()
+        raise JournalLockedError(f"Журнал уже используется другим процессом: {path}") from e
+    return lock
+
+
+def encode_entry(op: int, index: int = 0, name: str = "", area: float = 0.0,
+                 yield_per_hectare: float = 0.0) -> bytes:
+    """
+    Кодирует одну запись журнала.
+
+    Args:
+        op: Операция (OP_INSERT, OP_UPDATE, OP_REMOVE, OP_CLEAR)
+        index: Номер строки
+        name: Название культуры
+        area: Площадь посева
+        yield_per_hectare: Урожайность
+
+    Returns:
+        bytes: Запись с контрольной суммой
+    """
+    encoded = name.encode('utf-8')
+    body = ENTRY.pack(op, len(encoded), index, area, yield_per_hectare) + encoded
+    return CHECKSUM.pack(zlib.crc32(body)) + body
+
+
+@timed("journal.replay")
+def replay(data: bytes, table: CropTable) -> int:
+    """
+    Применяет записи журнала к таблице.
+
+    Подряд идущие добавления в конец таблицы применяются пакетами
+    через extend_rows.
+
+    Args:
+        data: Содержимое файла журнала
+        table: Таблица, к которой применяются записи
+
+    Returns:
+        int: Длина корректной части журнала в байтах (после нее -
+        оборванная или поврежденная запись)
+    """
+    size = len(data)
+    head = CHECKSUM.size + ENTRY.size
+    unpack_from = RECORD.unpack_from
+    crc32 = zlib.crc32
+    view = memoryview(data)
+    names: Dict[bytes, str] = {}
+    pending: List[Tuple[str, float, float]] = []
+    append = pending.append
+    position = 0
+    length = len(table)  # Длина таблицы с учетом еще не примененных добавлений
+
+    def flush() -> None:
+        if pending:
+            table.extend_rows(pending, validate=False)
+            pending.clear()
+
+    while position + head <= size:
+        checksum, op, name_size, index, area, yield_per_hectare = unpack_from(data, position)
+        end = position + head + name_size
+        if end > size or crc32(view[position + CHECKSUM.size:end]) != checksum:
+            break
+        raw = data[end - name_size:end]
+        name = names.get(raw)
+        if name is None:
+            name = names[raw] = raw.decode('utf-8')
+
+        if op == OP_INSERT and index == length:
+            append((name, area, yield_per_hectare))
+            length += 1
+        else:
+            flush()
+            if op == OP_INSERT:
+                table.insert(index, Crop(name, area, yield_per_hectare))
+            elif op == OP_UPDATE:
+                table.update(index, Crop(name, area, yield_per_hectare))
+            elif op == OP_REMOVE:
+                table.remove(index)
+            elif op == OP_CLEAR:
+                table.clear()
+            length = len(table)
+        position = end
+
+    flush()
+    return position
+
+
+@dataclass
+class JournalStats:
+    """
+    Счетчики журнала.
+
+    Attributes:
+        entries: Количество записей, переданных журналу
+        commits: Количество групповых фиксаций (вызовов fsync)
+        bytes: Объем записанных данных
+        compactions: Количество сжатий в снимок
+    """
+    entries: int = 0
+    commits: int = 0
+    bytes: int = 0
+    compactions: int = 0
+
+
+class Journal:
+    """
+    Журнал упреждающей записи изменений таблицы культур.
+
+    Attributes:
+        directory: Каталог снимков и журналов
+        generation: Текущее поколение (номер снимка и журнала)
+        compact_entries: Через сколько записей журнал сжимается в снимок
+        stats: Счетчики журнала
+
+    Example:
+        >>> journal = Journal(DEFAULT_JOURNAL_DIR)
+        >>> table = journal.recover()
+        >>> journal.attach(table)
+        >>> ...
+        >>> journal.close()
+    """
+
+    def __init__(self, directory: str = DEFAULT_JOURNAL_DIR,
+                 compact_entries: int = COMPACT_ENTRIES,
+                 commit_delay: float = COMMIT_DELAY, durable: bool = True):
+        """
+        Инициализация журнала (файлы открываются в recover).
+
+        Args:
+            directory: Каталог снимков и журналов
+            compact_entries: Через сколько записей журнал сжимается в снимок
+            commit_delay: Пауза перед фиксацией для накопления записей
+            durable: Вызывать ли fsync при фиксации (False - только для тестов)
+        """
+        self.directory = directory
+        self.compact_entries = compact_entries
+        self.commit_delay = commit_delay
+        self.durable = durable
+        self.generation = 0
+        self.stats = JournalStats()
+        self.table: Optional[CropTable] = None
+        self._file = None
+        self._lock = None
+        self._since_compact = 0
+        self._encoded: List[bytes] = []  # Названия в UTF-8 по коду названия таблицы
+
+        # Очередь фонового потока: ('data', bytes) или ('rotate', поколение)
+        self._condition = threading.Condition()
+        self._items: list = []
+        self._queued = 0      # Номер последнего поставленного в очередь элемента
+        self._durable = 0     # Номер последнего зафиксированного элемента
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ========== ВОССТАНОВЛЕНИЕ ==========
+
+    def _generations(self) -> List[int]:
+        """Поколения, для которых в каталоге есть снимок."""
+        generations = []
+        for filename in os.listdir(self.directory):
+            parts = filename.split('.')
+            if len(parts) == 3 and parts[0] == 'snapshot' and parts[2] == 'hrvs' \
+                    and parts[1].isdigit():
+                generations.append(int(parts[1]))
+        return sorted(generations)
+
+    @timed("journal.recover")
+    def recover(self) -> CropTable:
+        """
+        Восстанавливает таблицу из последнего снимка и журнала.
+
+        Каталог журнала блокируется до close: второй процесс с тем же
+        каталогом не сможет дописывать и сжимать чужой журнал.
+        Оборванный хвост журнала отрезается, файлы прежних поколений
+        удаляются, журнал текущего поколения открывается для дозаписи.
+
+        Returns:
+            CropTable: Восстановленная таблица
+
+        Raises:
+            JournalLockedError: Если журнал открыт другим процессом
+            OSError: Если каталог журнала недоступен
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if self._lock is None:
+            self._lock = _lock_file(os.path.join(self.directory, LOCK_FILE))
+        table = CropTable()
+        self.generation = 0
+        for generation in reversed(self._generations()):
+            try:
+                table = load_snapshot(_snapshot_path(self.directory, generation))
+            except (OSError, ValueError):
+                continue  # Незавершенный снимок: берется предыдущее поколение
+            self.generation = generation
+            break
+
+        path = _journal_path(self.directory, self.generation)
+        valid = 0
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                valid = replay(f.read(), table)
+        self._file = open(path, 'ab')
+        if self._file.tell() != valid:
+            self._file.truncate(valid)
+            self._file.seek(valid)
+
+        self._remove_other_generations(self.generation)
+        self._since_compact = 0
+        return table
+
+    def _remove_other_generations(self, keep: int) -> None:
+        """Удаляет снимки и журналы всех поколений, кроме keep."""
+        for filename in os.listdir(self.directory):
+            parts = filename.split('.')
+            if len(parts) == 3 and parts[0] in ('snapshot', 'journal') \
+                    and parts[1].isdigit() and int(parts[1]) != keep:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    # ========== ЗАПИСЬ ==========
+
+    def attach(self, table: CropTable) -> None:
+        """
+        Начинает журналирование изменений таблицы.
+
+        Args:
+            table: Таблица (обычно результат recover)
+        """
+        if self._file is None:
+            raise RuntimeError("Сначала вызовите recover()")
+        self.table = table
+        self._encoded = []
+        table.subscribe(self._on_change)
+        self._thread = threading.Thread(target=self._writer, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def _encoded_names(self) -> List[bytes]:
+        """Названия в UTF-8 по коду: кодируются только новые названия таблицы."""
+        encoded, names = self._encoded, self.table.names
+        if len(encoded) < len(names):
+            encoded.extend(name.encode('utf-8') for name in names[len(encoded):])
+        return encoded
+
+    def _on_change(self, event: str, *args) -> None:
+        """Кодирование изменения таблицы в записи журнала."""
+        table = self.table
+        pack = ENTRY.pack
+        checksum = CHECKSUM.pack
+        crc32 = zlib.crc32
+        parts = []
+        if event == 'insert' or event == 'update':
+            op = OP_INSERT if event == 'insert' else OP_UPDATE
+            start = args[0]
+            stop = args[1] if event == 'insert' else start + 1
+            names = self._encoded_names()
+            for index, code, area, yield_per_hectare in zip(
+                    range(start, stop), table.name_codes[start:stop],
+                    table.area[start:stop], table.yield_per_hectare[start:stop]):
+                name = names[code]
+                body = pack(op, len(name), index, area, yield_per_hectare) + name
+                parts.append(checksum(crc32(body)))
+                parts.append(body)
+        elif event == 'remove':
+            parts.append(encode_entry(OP_REMOVE, args[0]))
+        elif event == 'clear':
+            self._encoded = []  # Коды названий после очистки назначаются заново
+            parts.append(encode_entry(OP_CLEAR))
+        else:
+            return
+
+        count = len(parts) if event in ('remove', 'clear') else len(parts) // 2
+        self.stats.entries += count
+        self._since_compact += count
+        self._enqueue(('data', b''.join(parts)))
+        if self._since_compact >= self.compact_entries:
+            self.compact()
+
+    def _enqueue(self, item: tuple) -> None:
+        """Передает элемент фоновому потоку."""
+        with self._condition:
+            if self._error is not None:
+                raise self._error
+            self._items.append(item)
+            self._queued += 1
+            self._condition.notify_all()
+
+    def compact(self) -> None:
+        """
+        Сжимает журнал: снимок текущего состояния таблицы и новый журнал.
+
+        Вызывающий поток только ставит сжатие в очередь. Снимок строит
+        фоновый поток после уже накопленных записей: к снимку текущего
+        поколения применяется его журнал, в котором к этому моменту
+        записаны ровно все изменения таблицы до вызова compact.
+        """
+        if self.table is None:
+            return
+        self.generation += 1
+        self._since_compact = 0
+        self._enqueue(('rotate', self.generation))
+
+    def flush(self) -> None:
+        """
+        Ждет, пока все переданные журналу записи будут на диске.
+
+        Raises:
+            OSError: Если фоновая запись завершилась ошибкой
+        """
+        with self._condition:
+            target = self._queued
+            while self._durable < target and self._error is None:
+                self._condition.wait()
+            if self._error is not None:
+                raise self._error
+
+    def close(self) -> None:
+        """Записывает оставшиеся записи, останавливает поток и закрывает файл."""
+        if self.table is not None:
+            self.table.unsubscribe(self._on_change)
+            self.table = None
+        if self._thread is not None:
+            with self._condition:
+                self._closing = True
+                self._condition.notify_all()
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    # ========== ФОНОВЫЙ ПОТОК ==========
+
+    def _writer(self) -> None:
+        """Групповая фиксация: все накопившиеся записи - одним write и fsync."""
+        while True:
+            with self._condition:
+                while not self._items and not self._closing:
+                    self._condition.wait()
+                if not self._items:
+                    return
+            if self.commit_delay:
+                # Короткая пауза собирает записи, пришедшие почти одновременно
+                time.sleep(self.commit_delay)
+            with self._condition:
+                items, self._items = self._items, []
+                target = self._queued
+            try:
+                self._write(items)
+            except BaseException as e:
+                with self._condition:
+                    self._error = e
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._durable = target
+                self._condition.notify_all()
+
+    def _write(self, items: list) -> None:
+        """Записывает элементы очереди и фиксирует их на диске."""
+        chunks: List[bytes] = []
+        for item in items:
+            if item[0] == 'data':
+                chunks.append(item[1])
+                continue
+            # Сжатие: сначала дописываются записи прежнего поколения
+            self._commit(chunks)
+            chunks = []
+            self._rotate(item[1])
+        self._commit(chunks)
+
+    def _commit(self, chunks: List[bytes]) -> None:
+        """Одна групповая фиксация."""
+        if not chunks:
+            return
+        data = b''.join(chunks)
+        self._file.write(data)
+        self._file.flush()
+        if self.durable:
+            os.fsync(self._file.fileno())
+        self.stats.commits += 1
+        self.stats.bytes += len(data)
+
+    def _rotate(self, generation: int) -> None:
+        """Записывает снимок поколения generation и переходит на его журнал."""
+        previous = generation - 1
+        path = _snapshot_path(self.directory, previous)
+        table = load_snapshot(path) if os.path.exists(path) else CropTable()
+        with open(_journal_path(self.directory, previous), 'rb') as f:
+            replay(f.read(), table)
+
+        save_snapshot(table, _snapshot_path(self.directory, generation), durable=self.durable)
+        journal = open(_journal_path(self.directory, generation), 'wb')
+        if self.durable:
+            _fsync_directory(self.directory)
+        self._file.close()
+        self._file = journal
+        self._remove_other_generations(generation)
+        self.stats.compactions += 1
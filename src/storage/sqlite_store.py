@@ -0,0 +1,326 @@
+"""
+Хранение сезонов в локальной базе SQLite.
+
+Содержит хранилище SeasonStore, которое сохраняет культуры по
+сезонам в одну базу с индексами по сезону и названию культуры,
+и ленивое представление сезона SeasonView, которое читает строки
+страницами по мере обращения, не загружая сезон целиком.
+"""
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models.crop import Crop
+from ..models.crop_table import CropTable
+from ..utils.metrics import timer
+
+# Путь к базе по умолчанию (в домашнем каталоге пользователя)
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".harvest_accounting", "seasons.db")
+
+# Количество строк, читаемых из базы за один запрос
+PAGE_SIZE = 4096
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS crops (
+    id INTEGER PRIMARY KEY,
+    season_id INTEGER NOT NULL REFERENCES seasons(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    area REAL NOT NULL,
+    yield_per_hectare REAL NOT NULL,
+    total_harvest REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_crops_season ON crops(season_id, id);
+CREATE INDEX IF NOT EXISTS idx_crops_season_name ON crops(season_id, name);
+CREATE INDEX IF NOT EXISTS idx_crops_name ON crops(name);
+"""
+
+
+class SeasonStore:
+    """
+    Хранилище сезонов в базе SQLite.
+
+    Добавление одной культуры - это одна вставка строки, файл базы
+    целиком не перезаписывается. Соединение привязано к потоку,
+    в котором создано хранилище.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        Открытие (или создание) базы.
+
+        Args:
+            path: Путь к файлу базы (':memory:' - база в памяти)
+        """
+        if path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Закрытие соединения с базой."""
+        self.connection.close()
+
+    def __enter__(self) -> 'SeasonStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def seasons(self) -> List[str]:
+        """
+        Возвращает названия сохраненных сезонов.
+
+        Returns:
+            List[str]: Названия сезонов по алфавиту
+        """
+        rows = self.connection.execute("SELECT name FROM seasons ORDER BY name")
+        return [name for (name,) in rows]
+
+    def _season_id(self, season: str, create: bool = False) -> Optional[int]:
+        """Возвращает идентификатор сезона, при необходимости создавая его."""
+        row = self.connection.execute(
+            "SELECT id FROM seasons WHERE name = ?", (season,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        return self.connection.execute(
+            "INSERT INTO seasons (name) VALUES (?)", (season,)
+        ).lastrowid
+
+    def save_season(self, season: str, table: CropTable,
+                    progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        Сохраняет таблицу как сезон, заменяя прежнее содержимое сезона.
+
+        Строки передаются в executemany страницами по PAGE_SIZE прямо
+        из колонок таблицы, без создания объектов Crop. Все страницы
+        записываются одной транзакцией: если progress прервет
+        сохранение исключением, прежнее содержимое сезона сохранится.
+
+        Args:
+            season: Название сезона
+            table: Таблица культур
+            progress: Функция progress(сохранено, всего), вызывается после
+                каждой страницы (может прервать сохранение исключением)
+        """
+        names = table.names
+        total = len(table)
+        with self.connection:
+            season_id = self._season_id(season, create=True)
+            self.connection.execute("DELETE FROM crops WHERE season_id = ?", (season_id,))
+            for start in range(0, total, PAGE_SIZE):
+                stop = min(start + PAGE_SIZE, total)
+                rows = (
+                    (season_id, names[code], area, yield_per_hectare, harvest)
+                    for code, area, yield_per_hectare, harvest in zip(
+                        table.name_codes[start:stop], table.area[start:stop],
+                        table.yield_per_hectare[start:stop], table.total_harvest[start:stop]
+                    )
+                )
+                self.connection.executemany(
+                    "INSERT INTO crops (season_id, name, area, yield_per_hectare, total_harvest) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                if progress is not None:
+                    progress(stop, total)
+
+    def append(self, season: str, crop: Crop) -> int:
+        """
+        Добавляет одну культуру в сезон.
+
+        Args:
+            season: Название сезона
+            crop: Культура
+
+        Returns:
+            int: Идентификатор добавленной строки
+        """
+        with self.connection:
+            season_id = self._season_id(season, create=True)
+            return self.connection.execute(
+                "INSERT INTO crops (season_id, name, area, yield_per_hectare, total_harvest) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (season_id, crop.name, crop.area, crop.yield_per_hectare, crop.total_harvest)
+            ).lastrowid
+
+    def extend(self, season: str, crops: Iterable[Crop]) -> None:
+        """
+        Добавляет несколько культур в сезон одной транзакцией.
+
+        Args:
+            season: Название сезона
+            crops: Культуры
+        """
+        with self.connection:
+            season_id = self._season_id(season, create=True)
+            self.connection.executemany(
+                "INSERT INTO crops (season_id, name, area, yield_per_hectare, total_harvest) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((season_id, crop.name, crop.area, crop.yield_per_hectare, crop.total_harvest)
+                 for crop in crops)
+            )
+
+    def extend_rows(self, season: str, rows: Iterable[Tuple[str, float, float]]) -> None:
+        """
+        Добавляет проверенные записи в сезон одной транзакцией без создания Crop.
+
+        Args:
+            season: Название сезона
+            rows: Записи (название, площадь, урожайность)
+        """
+        with self.connection:
+            season_id = self._season_id(season, create=True)
+            self.connection.executemany(
+                "INSERT INTO crops (season_id, name, area, yield_per_hectare, total_harvest) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((season_id, name, area, yield_per_hectare, area * yield_per_hectare)
+                 for name, area, yield_per_hectare in rows)
+            )
+
+    def delete_season(self, season: str) -> None:
+        """
+        Удаляет сезон вместе с культурами.
+
+        Args:
+            season: Название сезона
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM seasons WHERE name = ?", (season,))
+
+    def open_season(self, season: str) -> 'SeasonView':
+        """
+        Открывает сезон для ленивого чтения.
+
+        Args:
+            season: Название сезона
+
+        Returns:
+            SeasonView: Представление сезона
+
+        Raises:
+            KeyError: Если сезона нет в базе
+        """
+        season_id = self._season_id(season)
+        if season_id is None:
+            raise KeyError(season)
+        return SeasonView(self.connection, season_id, season)
+
+
+class SeasonView:
+    """
+    Ленивое представление сохраненного сезона.
+
+    Количество строк и итоги считаются запросами к базе, а сами
+    строки читаются страницами по PAGE_SIZE при обращении.
+
+    Attributes:
+        season: Название сезона
+    """
+
+    def __init__(self, connection: sqlite3.Connection, season_id: int, season: str):
+        self._connection = connection
+        self._season_id = season_id
+        self.season = season
+        self._length: Optional[int] = None
+        self._page_number: Optional[int] = None
+        self._page: List[Tuple[str, float, float]] = []
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._length = self._connection.execute(
+                "SELECT COUNT(*) FROM crops WHERE season_id = ?", (self._season_id,)
+            ).fetchone()[0]
+        return self._length
+
+    def __getitem__(self, index: int) -> Crop:
+        """Возвращает культуру по номеру строки, читая нужную страницу."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        page_number, offset = divmod(index, PAGE_SIZE)
+        if page_number != self._page_number:
+            self._page = self._connection.execute(
+                "SELECT name, area, yield_per_hectare FROM crops WHERE season_id = ? "
+                "ORDER BY id LIMIT ? OFFSET ?",
+                (self._season_id, PAGE_SIZE, page_number * PAGE_SIZE)
+            ).fetchall()
+            self._page_number = page_number
+        return Crop(*self._page[offset])
+
+    def iter_chunks(self, size: int = PAGE_SIZE) -> Iterator[List[Tuple[str, float, float]]]:
+        """
+        Читает строки сезона пакетами записей (название, площадь, урожайность).
+
+        Args:
+            size: Размер пакета
+
+        Yields:
+            List[Tuple[str, float, float]]: Пакет записей
+        """
+        cursor = self._connection.execute(
+            "SELECT name, area, yield_per_hectare FROM crops WHERE season_id = ? ORDER BY id",
+            (self._season_id,)
+        )
+        while True:
+            chunk = cursor.fetchmany(size)
+            if not chunk:
+                break
+            yield chunk
+
+    def __iter__(self) -> Iterator[Crop]:
+        for chunk in self.iter_chunks():
+            with timer("crop.from_rows"):
+                crops = Crop.from_rows(chunk, validate=False)[0]
+            yield from crops
+
+    def to_table(self) -> CropTable:
+        """
+        Загружает сезон целиком в колоночную таблицу.
+
+        Returns:
+            CropTable: Таблица культур сезона
+        """
+        table = CropTable()
+        for chunk in self.iter_chunks():
+            with timer("table.extend_rows"):
+                table.extend_rows(chunk, validate=False)
+        return table
+
+    def total_harvest(self) -> float:
+        """
+        Общий урожай сезона, посчитанный в базе.
+
+        Returns:
+            float: Общий урожай в тоннах
+        """
+        return self._connection.execute(
+            "SELECT TOTAL(total_harvest) FROM crops WHERE season_id = ?", (self._season_id,)
+        ).fetchone()[0]
+
+    def harvest_by_name(self) -> Dict[str, float]:
+        """
+        Итоги урожая сезона по культурам, посчитанные в базе.
+
+        Returns:
+            Dict[str, float]: Суммарный урожай по названиям культур
+        """
+        rows = self._connection.execute(
+            "SELECT name, TOTAL(total_harvest) FROM crops WHERE season_id = ? GROUP BY name",
+            (self._season_id,)
+        )
+        return dict(rows.fetchall())
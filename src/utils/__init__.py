@@ -1,7 +1,44 @@
 """
 Модуль вспомогательных функций приложения.
+
+Подмодули загружаются лениво при первом обращении к имени.
 """
-from .calculations import calculate_total_season_harvest
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
 
-__all__ = ['calculate_total_season_harvest']
+if TYPE_CHECKING:
+    from .calculations import SeasonAggregate, aggregate_season, calculate_total_season_harvest
+    from .export import export_table, open_writer
+    from .fixed_point import ExactTotals, exact_season_harvest
+    from .grouped import GroupTotals, aggregate_files, aggregate_grouped
+    from .importer import ImportReport, RowError, import_crops
+    from .numparse import parse_column, parse_number
+    from .scenarios import (Scenario, ScenarioEngine, SimulationResult, YieldDistribution,
+                            parse_scenario)
+    from .stats_cache import CultureStats, StatsCache
 
+__getattr__, __dir__, __all__ = attach(__name__, {
+    'SeasonAggregate': '.calculations',
+    'aggregate_season': '.calculations',
+    'calculate_total_season_harvest': '.calculations',
+    'export_table': '.export',
+    'open_writer': '.export',
+    'ExactTotals': '.fixed_point',
+    'exact_season_harvest': '.fixed_point',
+    'GroupTotals': '.grouped',
+    'aggregate_files': '.grouped',
+    'aggregate_grouped': '.grouped',
+    'ImportReport': '.importer',
+    'RowError': '.importer',
+    'import_crops': '.importer',
+    'parse_column': '.numparse',
+    'parse_number': '.numparse',
+    'Scenario': '.scenarios',
+    'ScenarioEngine': '.scenarios',
+    'SimulationResult': '.scenarios',
+    'YieldDistribution': '.scenarios',
+    'parse_scenario': '.scenarios',
+    'CultureStats': '.stats_cache',
+    'StatsCache': '.stats_cache',
+})
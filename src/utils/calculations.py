@@ -1,22 +1,38 @@
 """
 Модуль для расчетов урожая.
 
-Содержит функции для расчета общего урожая за сезон.
+Содержит функции для расчета общего урожая за сезон и пакетной
+агрегации (итоги, суммы по культурам, средняя урожайность).
 """
-from typing import List
+import math
+from array import array
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import Dict, List, Optional, Union
 
 from ..models.crop import Crop
+from ..models.crop_table import CropTable
+from .metrics import timed
 
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен, используется запасной путь на array
+    np = None
 
-def calculate_total_season_harvest(crops: List[Crop]) -> float:
+
+@timed("calc.total_season_harvest")
+def calculate_total_season_harvest(crops: Union[List[Crop], CropTable]) -> float:
     """
     Рассчитывает общий объем урожая за сезон для всех культур.
     
     Использует цикл для суммирования общего урожая каждой культуры
     из переданного списка.
     
+    Для CropTable суммирование идет напрямую по колонке total_harvest,
+    без создания объектов Crop для каждой строки.
+    
     Args:
-        crops: Список объектов Crop с информацией о культурах
+        crops: Список объектов Crop или колоночная таблица CropTable
     
     Returns:
         float: Общий объем урожая за сезон в тоннах
@@ -29,9 +45,159 @@ def calculate_total_season_harvest(crops: List[Crop]) -> float:
     """
     total_harvest = 0.0
     
+    if isinstance(crops, CropTable):
+        # Цикл по колонке урожая без материализации объектов
+        for value in crops.total_harvest:
+            total_harvest += value
+        return total_harvest
+    
     # Цикл для суммирования урожая всех культур
     for crop in crops:
         total_harvest += crop.total_harvest
     
     return total_harvest
 
+
+
+@dataclass
+class SeasonAggregate:
+    """
+    Результат пакетной агрегации данных за сезон.
+    
+    Attributes:
+        count: Количество записей
+        total_harvest: Общий урожай в тоннах
+        total_area: Общая площадь посева в гектарах
+        mean_yield: Средняя урожайность по записям (т/га)
+        weighted_yield: Урожайность, взвешенная по площади (т/га)
+        harvest_by_name: Суммарный урожай по названиям культур
+        area_by_name: Суммарная площадь по названиям культур
+    """
+    count: int = 0
+    total_harvest: float = 0.0
+    total_area: float = 0.0
+    mean_yield: float = 0.0
+    weighted_yield: float = 0.0
+    harvest_by_name: Dict[str, float] = field(default_factory=dict)
+    area_by_name: Dict[str, float] = field(default_factory=dict)
+
+
+@timed("calc.aggregate_season")
+def aggregate_season(crops: Union[List[Crop], CropTable],
+                     use_numpy: Optional[bool] = None) -> SeasonAggregate:
+    """
+    Рассчитывает все сводные показатели сезона за один проход.
+    
+    Данные обрабатываются по колонкам CropTable. При наличии NumPy
+    колонки оборачиваются в массивы без копирования и суммируются
+    векторно (группировка через bincount). Без NumPy используется
+    последовательное суммирование по array, поэтому общий урожай
+    совпадает с calculate_total_season_harvest бит в бит.
+    
+    Args:
+        crops: Список объектов Crop или колоночная таблица CropTable
+        use_numpy: Использовать NumPy (None - автоматически, если установлен)
+    
+    Returns:
+        SeasonAggregate: Сводные показатели сезона
+    
+    Raises:
+        RuntimeError: Если NumPy запрошен явно, но не установлен
+    """
+    table = crops if isinstance(crops, CropTable) else _table_from_crops(crops)
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise RuntimeError("NumPy не установлен")
+    
+    if not len(table):
+        return SeasonAggregate()
+    
+    if use_numpy:
+        return _aggregate_numpy(table)
+    return _aggregate_python(table)
+
+
+def _table_from_crops(crops: List[Crop]) -> CropTable:
+    """
+    Собирает таблицу из списка культур сразу по колонкам.
+
+    Колонки заполняются целиком через CropTable.from_columns, без
+    добавления строк по одной.
+    """
+    names = list(map(attrgetter('name'), crops))
+    index: Dict[str, int] = {}
+    codes = array('l', [index.setdefault(name, len(index)) for name in names])
+    return CropTable.from_columns(
+        list(index), codes,
+        array('d', map(attrgetter('area'), crops)),
+        array('d', map(attrgetter('yield_per_hectare'), crops)),
+        array('d', map(attrgetter('total_harvest'), crops))
+    )
+
+
+def _aggregate_python(table: CropTable) -> SeasonAggregate:
+    """Агрегация на array и math.fsum без сторонних зависимостей."""
+    group_harvest = [0.0] * len(table.names)
+    group_area = [0.0] * len(table.names)
+    group_count = [0] * len(table.names)
+    total_area = 0.0
+    
+    # Один проход по колонкам: суммы по группам и общая площадь
+    for code, area, harvest in zip(table.name_codes, table.area, table.total_harvest):
+        group_count[code] += 1
+        group_harvest[code] += harvest
+        group_area[code] += area
+        total_area += area
+    
+    return _build_aggregate(
+        table,
+        total_harvest=calculate_total_season_harvest(table),
+        total_area=total_area,
+        mean_yield=math.fsum(table.yield_per_hectare) / len(table),
+        group_harvest=group_harvest,
+        group_area=group_area,
+        group_count=group_count
+    )
+
+
+def _aggregate_numpy(table: CropTable) -> SeasonAggregate:
+    """Векторная агрегация на NumPy (колонки читаются без копирования)."""
+    codes = np.frombuffer(table.name_codes, dtype=np.dtype(table.name_codes.typecode))
+    area = np.frombuffer(table.area, dtype=np.float64)
+    yields = np.frombuffer(table.yield_per_hectare, dtype=np.float64)
+    harvest = np.frombuffer(table.total_harvest, dtype=np.float64)
+    groups = len(table.names)
+    
+    return _build_aggregate(
+        table,
+        total_harvest=float(harvest.sum()),
+        total_area=float(area.sum()),
+        mean_yield=float(yields.mean()),
+        group_harvest=np.bincount(codes, weights=harvest, minlength=groups).tolist(),
+        group_area=np.bincount(codes, weights=area, minlength=groups).tolist(),
+        group_count=np.bincount(codes, minlength=groups).tolist()
+    )
+
+
+def _build_aggregate(table: CropTable, total_harvest: float, total_area: float,
+                     mean_yield: float, group_harvest: List[float],
+                     group_area: List[float], group_count: List[int]) -> SeasonAggregate:
+    """
+    Собирает SeasonAggregate из посчитанных колоночных сумм.
+
+    Названия без строк (все строки культуры удалены, а код названия
+    остался в таблице) в итоги по культурам не попадают, как и в
+    RunningTotals.
+    """
+    present = [code for code, count in enumerate(group_count) if count]
+    names = table.names
+    return SeasonAggregate(
+        count=len(table),
+        total_harvest=total_harvest,
+        total_area=total_area,
+        mean_yield=mean_yield,
+        weighted_yield=total_harvest / total_area if total_area else 0.0,
+        harvest_by_name={names[code]: group_harvest[code] for code in present},
+        area_by_name={names[code]: group_area[code] for code in present}
+    )
@@ -0,0 +1,475 @@
+"""
+Потоковый экспорт культур и итогов по культурам.
+
+Поддерживаются форматы CSV, JSON Lines и XLSX, для CSV и JSON Lines -
+со сжатием gzip. Строки передаются писателю пакетами колонок и сразу
+записываются в буферизованный файл, поэтому расход памяти не зависит
+от количества строк. XLSX собирается без сторонних библиотек: листы
+пишутся потоком прямо в zip-архив.
+
+Итоги по культурам для CSV и JSON Lines записываются в соседний файл
+с суффиксом .cultures (например, season.cultures.csv.gz), а для XLSX -
+на второй лист книги.
+"""
+import csv
+import gzip
+import io
+import json
+import math
+import os
+import re
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, List, Optional, Sequence, TextIO, Tuple
+from xml.sax.saxutils import escape
+
+from ..models.crop_table import CropTable
+from ..models.totals import RunningTotals
+from .metrics import timed
+
+# Поддерживаемые форматы
+FORMATS = ('csv', 'jsonl', 'xlsx')
+
+# Колонки списка культур
+CROP_COLUMNS = ('name', 'area', 'yield_per_hectare', 'total_harvest')
+
+# Колонки итогов по культурам
+CULTURE_COLUMNS = ('name', 'count', 'area', 'total_harvest', 'yield_per_hectare')
+
+# Количество строк таблицы в одном пакете
+EXPORT_CHUNK = 8192
+
+# Размер буфера записи в байтах
+BUFFER_SIZE = 1 << 20
+
+# Уровень сжатия gzip/zip: быстрый, экспорт ограничен скоростью сжатия
+COMPRESS_LEVEL = 1
+
+CultureRow = Tuple[str, int, float, float, float]
+
+
+def detect_format(path: str) -> Tuple[str, bool]:
+    """
+    Определяет формат и сжатие по расширению файла.
+
+    Args:
+        path: Путь к файлу (например, season.csv.gz)
+
+    Returns:
+        Tuple[str, bool]: Формат из FORMATS и признак сжатия gzip
+
+    Raises:
+        ValueError: Если расширение не поддерживается
+    """
+    base, extension = os.path.splitext(path.lower())
+    compress = extension == '.gz'
+    if compress:
+        base, extension = os.path.splitext(base)
+    fmt = {'.csv': 'csv', '.tsv': 'csv', '.jsonl': 'jsonl', '.xlsx': 'xlsx'}.get(extension)
+    if fmt is None:
+        raise ValueError(f"Неподдерживаемый формат экспорта: {path}")
+    if fmt == 'xlsx' and compress:
+        raise ValueError("XLSX уже сжат, gzip для него не поддерживается")
+    return fmt, compress
+
+
+def cultures_path(path: str) -> str:
+    """
+    Путь к соседнему файлу итогов по культурам.
+
+    Args:
+        path: Путь к файлу списка культур
+
+    Returns:
+        str: Путь вида <имя>.cultures.<расширение>
+    """
+    directory, filename = os.path.split(path)
+    stem, dot, extensions = filename.partition('.')
+    return os.path.join(directory, f"{stem}.cultures{dot}{extensions}")
+
+
+def culture_rows(totals: RunningTotals) -> List[CultureRow]:
+    """
+    Итоги по культурам в порядке убывания урожая.
+
+    Args:
+        totals: Итоги таблицы
+
+    Returns:
+        List[CultureRow]: Строки (название, записей, площадь, урожай, урожайность)
+    """
+    harvest = totals.harvest_by_name()
+    area = totals.area_by_name()
+    count = totals.count_by_name()
+    return [
+        (name, count[name], area[name], harvest[name],
+         harvest[name] / area[name] if area[name] else 0.0)
+        for name in sorted(harvest, key=harvest.get, reverse=True)
+    ]
+
+
+def _open_text(path: str, compress: bool) -> TextIO:
+    """Открывает буферизованный текстовый файл для записи (при необходимости gzip)."""
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=COMPRESS_LEVEL)
+    return open(path, 'w', encoding='utf-8', newline='', buffering=BUFFER_SIZE)
+
+
+class ExportWriter(ABC):
+    """
+    Базовый потоковый писатель экспорта.
+
+    Строки культур передаются пакетами колонок через write_crops,
+    итоги по культурам - один раз через write_cultures перед close.
+
+    Attributes:
+        path: Путь к файлу списка культур
+        compress: Сжимать ли файлы gzip
+        rows: Количество записанных строк культур
+    """
+
+    def __init__(self, path: str, compress: bool = False):
+        self.path = path
+        self.compress = compress
+        self.rows = 0
+
+    @abstractmethod
+    def write_crops(self, names: Sequence[str], areas: Sequence[float],
+                    yields: Sequence[float], harvests: Sequence[float]) -> None:
+        """
+        Записывает пакет строк культур.
+
+        Args:
+            names: Колонка названий
+            areas: Колонка площадей
+            yields: Колонка урожайностей
+            harvests: Колонка общего урожая
+        """
+
+    @abstractmethod
+    def write_cultures(self, rows: Iterable[CultureRow]) -> None:
+        """
+        Записывает итоги по культурам.
+
+        Args:
+            rows: Строки итогов (см. culture_rows)
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """Завершает запись и закрывает файлы."""
+
+    def __enter__(self) -> 'ExportWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class CsvExportWriter(ExportWriter):
+    """Экспорт в CSV (файл можно снова импортировать в приложение)."""
+
+    def __init__(self, path: str, compress: bool = False):
+        super().__init__(path, compress)
+        self._delimiter = '\t' if path.lower().endswith(('.tsv', '.tsv.gz')) else ','
+        self._stream = _open_text(path, compress)
+        self._stream.write(self._delimiter.join(CROP_COLUMNS) + "\r\n")
+        self._quoted: dict = {}  # Название -> поле CSV с экранированием
+
+    def _quote(self, name: str) -> str:
+        quoted = self._quoted.get(name)
+        if quoted is None:
+            # Экранирование один раз на название, как это сделал бы csv.writer
+            buffer = io.StringIO()
+            csv.writer(buffer, delimiter=self._delimiter, lineterminator='').writerow([name])
+            quoted = self._quoted[name] = buffer.getvalue()
+        return quoted
+
+    def write_crops(self, names, areas, yields, harvests) -> None:
+        quote, d = self._quote, self._delimiter
+        self._stream.writelines(
+            f"{quote(name)}{d}{area!r}{d}{y!r}{d}{harvest!r}\r\n"
+            for name, area, y, harvest in zip(names, areas, yields, harvests)
+        )
+        self.rows += len(harvests)
+
+    def write_cultures(self, rows: Iterable[CultureRow]) -> None:
+        with _open_text(cultures_path(self.path), self.compress) as stream:
+            writer = csv.writer(stream, delimiter=self._delimiter)
+            writer.writerow(CULTURE_COLUMNS)
+            writer.writerows(rows)
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+class JsonlExportWriter(ExportWriter):
+    """
+    Экспорт в JSON Lines (один объект JSON на строку).
+
+    В JSON нет бесконечностей и NaN, поэтому такие значения не
+    записываются, а приводят к ValueError (см. _check_finite).
+    """
+
+    def __init__(self, path: str, compress: bool = False):
+        super().__init__(path, compress)
+        self._stream = _open_text(path, compress)
+        self._quoted: dict = {}  # Название -> строка JSON (названия повторяются)
+
+    def _quote(self, name: str) -> str:
+        quoted = self._quoted.get(name)
+        if quoted is None:
+            quoted = self._quoted[name] = json.dumps(name, ensure_ascii=False)
+        return quoted
+
+    def write_crops(self, names, areas, yields, harvests) -> None:
+        # Конечная сумма означает, что конечны все значения; иначе строки проверяются по одной
+        if not math.isfinite(sum(areas) + sum(yields) + sum(harvests)):
+            _check_finite(names, areas, yields, harvests)
+        quote = self._quote
+        self._stream.writelines(
+            f'{{"name": {quote(name)}, "area": {area!r}, '
+            f'"yield_per_hectare": {y!r}, "total_harvest": {harvest!r}}}\n'
+            for name, area, y, harvest in zip(names, areas, yields, harvests)
+        )
+        self.rows += len(harvests)
+
+    def write_cultures(self, rows: Iterable[CultureRow]) -> None:
+        with _open_text(cultures_path(self.path), self.compress) as stream:
+            for row in rows:
+                stream.write(json.dumps(dict(zip(CULTURE_COLUMNS, row)),
+                                        ensure_ascii=False, allow_nan=False))
+                stream.write("\n")
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+def _check_finite(names: Sequence[str], areas: Sequence[float],
+                  yields: Sequence[float], harvests: Sequence[float]) -> None:
+    """
+    Проверяет, что значения пакета можно записать числами JSON и XLSX.
+
+    Raises:
+        ValueError: Если в строке есть бесконечность или NaN
+    """
+    for name, area, y, harvest in zip(names, areas, yields, harvests):
+        if not (math.isfinite(area) and math.isfinite(y) and math.isfinite(harvest)):
+            raise ValueError(f"Значение не является конечным числом: {name!r} "
+                             f"(площадь {area!r}, урожайность {y!r}, урожай {harvest!r})")
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet2.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>'
+    '<sheet name="Культуры" sheetId="1" r:id="rId1"/>'
+    '<sheet name="Итоги" sheetId="2" r:id="rId2"/>'
+    '</sheets></workbook>'
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet2.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_XLSX_SHEET_END = '</sheetData></worksheet>'
+
+# Символы, недопустимые в XML 1.0 (управляющие символы, одиночные суррогаты)
+_XML_INVALID = re.compile('[^\t\n\r\u0020-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]')
+
+
+def _xlsx_text(value: str) -> str:
+    """
+    Ячейка XLSX со строкой (встроенная строка, без таблицы строк).
+
+    Символы, недопустимые в XML, удаляются: иначе книга не откроется.
+    """
+    return f'<c t="inlineStr"><is><t>{escape(_XML_INVALID.sub("", value))}</t></is></c>'
+
+
+def _xlsx_row(cells: Iterable[str]) -> str:
+    return f'<row>{"".join(cells)}</row>'
+
+
+class XlsxExportWriter(ExportWriter):
+    """
+    Экспорт в книгу XLSX из двух листов: «Культуры» и «Итоги».
+
+    Лист культур пишется потоком в zip-архив, ячейки с названиями
+    формируются один раз на культуру. Как и в JSON Lines, бесконечности
+    и NaN не записываются (в ячейке XLSX они недопустимы), а приводят
+    к ValueError.
+    """
+
+    def __init__(self, path: str, compress: bool = False):
+        if compress:
+            raise ValueError("XLSX уже сжат, gzip для него не поддерживается")
+        super().__init__(path, compress)
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED,
+                                    compresslevel=COMPRESS_LEVEL)
+        self._zip.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        self._zip.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        self._zip.writestr('xl/workbook.xml', _XLSX_WORKBOOK)
+        self._zip.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+        self._sheet = self._zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+        self._write(_XLSX_SHEET_START)
+        self._write(_xlsx_row(map(_xlsx_text, CROP_COLUMNS)))
+        self._cells: dict = {}  # Название -> готовая ячейка
+        self._cultures_written = False
+
+    def _write(self, text: str) -> None:
+        self._sheet.write(text.encode('utf-8'))
+
+    def _cell(self, name: str) -> str:
+        cell = self._cells.get(name)
+        if cell is None:
+            cell = self._cells[name] = _xlsx_text(name)
+        return cell
+
+    def write_crops(self, names, areas, yields, harvests) -> None:
+        if not math.isfinite(sum(areas) + sum(yields) + sum(harvests)):
+            _check_finite(names, areas, yields, harvests)
+        cell = self._cell
+        self._write("".join(
+            f'<row>{cell(name)}<c><v>{area!r}</v></c><c><v>{y!r}</v></c>'
+            f'<c><v>{harvest!r}</v></c></row>'
+            for name, area, y, harvest in zip(names, areas, yields, harvests)
+        ))
+        self.rows += len(harvests)
+
+    def _finish_crops(self) -> None:
+        if self._sheet is not None:
+            self._write(_XLSX_SHEET_END)
+            self._sheet.close()
+            self._sheet = None
+
+    def write_cultures(self, rows: Iterable[CultureRow]) -> None:
+        self._finish_crops()
+        with self._zip.open('xl/worksheets/sheet2.xml', 'w') as sheet:
+            parts = [_XLSX_SHEET_START, _xlsx_row(map(_xlsx_text, CULTURE_COLUMNS))]
+            for name, count, area, harvest, y in rows:
+                if not math.isfinite(area + harvest + y):
+                    raise ValueError(f"Итог культуры не может быть записан в XLSX: {name!r}")
+                parts.append(
+                    f'<row>{_xlsx_text(name)}<c><v>{count}</v></c><c><v>{area!r}</v></c>'
+                    f'<c><v>{harvest!r}</v></c><c><v>{y!r}</v></c></row>'
+                )
+            parts.append(_XLSX_SHEET_END)
+            sheet.write("".join(parts).encode('utf-8'))
+        self._cultures_written = True
+
+    def close(self) -> None:
+        if not self._cultures_written:
+            self.write_cultures([])
+        self._zip.close()
+
+
+_WRITERS = {
+    'csv': CsvExportWriter,
+    'jsonl': JsonlExportWriter,
+    'xlsx': XlsxExportWriter,
+}
+
+
+def open_writer(path: str, fmt: Optional[str] = None,
+                compress: Optional[bool] = None) -> ExportWriter:
+    """
+    Создает писатель экспорта.
+
+    Args:
+        path: Путь к файлу
+        fmt: Формат из FORMATS (None - по расширению файла)
+        compress: Сжимать ли gzip (None - по расширению .gz)
+
+    Returns:
+        ExportWriter: Писатель экспорта
+
+    Raises:
+        ValueError: Если формат не поддерживается
+    """
+    if fmt is None or compress is None:
+        detected, gz = detect_format(path)
+        fmt = fmt or detected
+        compress = gz if compress is None else compress
+    if fmt not in _WRITERS:
+        raise ValueError(f"Неподдерживаемый формат экспорта: {fmt}")
+    return _WRITERS[fmt](path, compress)
+
+
+@timed("export.table")
+def export_table(table: CropTable, path: str, fmt: Optional[str] = None,
+                 compress: Optional[bool] = None,
+                 progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Экспортирует таблицу культур и итоги по культурам.
+
+    Строки читаются из колонок таблицы пакетами по EXPORT_CHUNK без
+    создания объектов Crop.
+
+    Args:
+        table: Таблица культур
+        path: Путь к файлу (формат и сжатие по расширению, если не заданы)
+        fmt: Формат из FORMATS
+        compress: Сжимать ли gzip
+        progress: Функция progress(выгружено, всего), вызывается после
+            каждого пакета (может прервать экспорт исключением)
+
+    Returns:
+        int: Количество выгруженных строк
+
+    Raises:
+        ValueError: Если формат не поддерживается
+        OSError: Если файл не удалось записать
+    """
+    total = len(table)
+    names = table.names
+    with open_writer(path, fmt, compress) as writer:
+        for start in range(0, total, EXPORT_CHUNK):
+            stop = min(start + EXPORT_CHUNK, total)
+            writer.write_crops(
+                list(map(names.__getitem__, table.name_codes[start:stop])),
+                table.area[start:stop],
+                table.yield_per_hectare[start:stop],
+                table.total_harvest[start:stop]
+            )
+            if progress is not None:
+                progress(stop, total)
+        writer.write_cultures(culture_rows(table.totals))
+    return total
@@ -0,0 +1,272 @@
+"""
+Точный учет урожая в целых единицах (фиксированная точка).
+
+Площадь хранится в сотых долях гектара, урожайность - в килограммах
+с гектара, поэтому урожай строки - точное целое произведение в сотых
+долях килограмма (1 единица = 10 г). Итоги сезона - суммы целых чисел
+без ошибок округления, которые сверяются с учетной системой до
+килограмма при любом количестве строк.
+
+Колонки хранятся в array('q') и считаются встроенными функциями
+(map, sum) без создания объектов Decimal на каждую строку; Decimal
+используется только для представления итогов.
+"""
+from array import array
+from decimal import ROUND_HALF_EVEN, Decimal
+from itertools import repeat
+from operator import mul
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from ..models.crop import Crop
+from ..models.crop_table import CropTable
+
+# Единица площади: 0.01 га
+AREA_SCALE = 100
+
+# Единица урожайности: 1 кг/га (0.001 т/га)
+YIELD_SCALE = 1000
+
+# Единица урожая: 0.01 кг (произведение единиц площади и урожайности)
+HARVEST_SCALE = AREA_SCALE * YIELD_SCALE
+
+# Единиц урожая в одном килограмме
+UNITS_PER_KG = HARVEST_SCALE // 1000
+
+
+def to_units(value: Union[float, str, Decimal], scale: int) -> int:
+    """
+    Переводит значение в целые единицы с округлением до ближайшей.
+
+    Строки переводятся точно (через Decimal, допускается запятая),
+    числа с плавающей точкой - через round(value * scale). Если у
+    значения больше знаков, чем дает единица, оно округляется
+    (половина - к четному).
+
+    Args:
+        value: Значение (число или строка)
+        scale: Количество единиц в единице измерения (AREA_SCALE, YIELD_SCALE)
+
+    Returns:
+        int: Значение в целых единицах
+
+    Example:
+        >>> to_units("10,25", AREA_SCALE)
+        1025
+    """
+    if isinstance(value, str):
+        value = Decimal(value.strip().replace(',', '.'))
+    if isinstance(value, Decimal):
+        return int((value * scale).to_integral_value(ROUND_HALF_EVEN))
+    return round(value * scale)
+
+
+def harvest_units(area: Union[float, str], yield_per_hectare: Union[float, str]) -> int:
+    """
+    Точный урожай одной строки в единицах 0.01 кг.
+
+    Точный аналог Crop.calculate_total_harvest: площадь и урожайность
+    сначала переводятся в целые единицы, затем перемножаются.
+
+    Args:
+        area: Площадь посева в гектарах
+        yield_per_hectare: Урожайность в тоннах на гектар
+
+    Returns:
+        int: Урожай в единицах 0.01 кг
+    """
+    return to_units(area, AREA_SCALE) * to_units(yield_per_hectare, YIELD_SCALE)
+
+
+def columns_to_units(areas: Sequence[float], yields: Sequence[float]
+                     ) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Переводит колонки площадей и урожайностей в целые единицы.
+
+    Args:
+        areas: Колонка площадей в гектарах
+        yields: Колонка урожайностей в т/га
+
+    Returns:
+        Tuple[List[int], List[int], List[int]]: Площади, урожайности
+        и урожай строк в целых единицах
+    """
+    area_units = list(map(round, map(mul, areas, repeat(float(AREA_SCALE)))))
+    yield_units = list(map(round, map(mul, yields, repeat(float(YIELD_SCALE)))))
+    return area_units, yield_units, list(map(mul, area_units, yield_units))
+
+
+def units_to_tons(units: int) -> Decimal:
+    """
+    Переводит урожай из единиц 0.01 кг в тонны без потери точности.
+
+    Args:
+        units: Урожай в единицах 0.01 кг
+
+    Returns:
+        Decimal: Урожай в тоннах (5 знаков после запятой)
+    """
+    return Decimal(units).scaleb(-5)
+
+
+def units_to_kg(units: int) -> int:
+    """
+    Переводит урожай из единиц 0.01 кг в целые килограммы.
+
+    Округление - до ближайшего килограмма, половина - к четному.
+
+    Args:
+        units: Урожай в единицах 0.01 кг
+
+    Returns:
+        int: Урожай в килограммах
+    """
+    return _round_half_even(units, UNITS_PER_KG)
+
+
+def _round_half_even(numerator: int, denominator: int) -> int:
+    """Целочисленное деление с округлением половины к четному."""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+class ExactTotals:
+    """
+    Точные итоги таблицы культур в целых единицах.
+
+    Подписывается на изменения CropTable и поддерживает целочисленные
+    колонки площади, урожайности и урожая параллельно колонкам таблицы,
+    а также общий итог, который обновляется при каждом изменении.
+
+    Attributes:
+        table: Таблица культур
+        area_units: Колонка площадей в единицах 0.01 га
+        yield_units: Колонка урожайностей в кг/га
+        harvest_units: Колонка урожая в единицах 0.01 кг
+        total_units: Общий урожай в единицах 0.01 кг
+    """
+
+    def __init__(self, table: CropTable):
+        """
+        Перевод существующих строк и подписка на изменения таблицы.
+
+        Args:
+            table: Таблица культур
+        """
+        self.table = table
+        self.area_units = array('q')
+        self.yield_units = array('q')
+        self.harvest_units = array('q')
+        self.total_units = 0
+        self._insert(0, len(table))
+        table.subscribe(self._on_change)
+
+    def close(self) -> None:
+        """Отписывается от изменений таблицы."""
+        self.table.unsubscribe(self._on_change)
+
+    def _insert(self, start: int, stop: int) -> None:
+        """Переводит добавленные строки таблицы в целые единицы."""
+        areas, yields, harvests = columns_to_units(
+            self.table.area[start:stop], self.table.yield_per_hectare[start:stop]
+        )
+        if start < len(self.harvest_units):
+            # Вставка в середину таблицы
+            self.area_units[start:start] = array('q', areas)
+            self.yield_units[start:start] = array('q', yields)
+            self.harvest_units[start:start] = array('q', harvests)
+        else:
+            self.area_units.fromlist(areas)
+            self.yield_units.fromlist(yields)
+            self.harvest_units.fromlist(harvests)
+        self.total_units += sum(harvests)
+
+    def _on_change(self, event: str, *args) -> None:
+        """Обработка изменения таблицы."""
+        if event == 'insert':
+            self._insert(*args)
+        elif event == 'update':
+            index = args[0]
+            self.total_units -= self.harvest_units[index]
+            area = to_units(self.table.area[index], AREA_SCALE)
+            yield_per_hectare = to_units(self.table.yield_per_hectare[index], YIELD_SCALE)
+            self.area_units[index] = area
+            self.yield_units[index] = yield_per_hectare
+            self.harvest_units[index] = area * yield_per_hectare
+            self.total_units += area * yield_per_hectare
+        elif event == 'remove':
+            index = args[0]
+            self.total_units -= self.harvest_units[index]
+            del self.area_units[index]
+            del self.yield_units[index]
+            del self.harvest_units[index]
+        elif event == 'clear':
+            del self.area_units[:]
+            del self.yield_units[:]
+            del self.harvest_units[:]
+            self.total_units = 0
+
+    @property
+    def total_harvest(self) -> Decimal:
+        """Общий урожай в тоннах (точно)."""
+        return units_to_tons(self.total_units)
+
+    @property
+    def total_kg(self) -> int:
+        """Общий урожай в килограммах."""
+        return units_to_kg(self.total_units)
+
+    @property
+    def total_area(self) -> Decimal:
+        """Общая площадь в гектарах (точно)."""
+        return Decimal(sum(self.area_units)).scaleb(-2)
+
+    def harvest_units_by_name(self) -> Dict[str, int]:
+        """
+        Урожай по культурам в единицах 0.01 кг.
+
+        Returns:
+            Dict[str, int]: Урожай по названиям культур
+        """
+        by_code = [0] * len(self.table.names)
+        for code, units in zip(self.table.name_codes, self.harvest_units):
+            by_code[code] += units
+        return {
+            name: units for name, units in zip(self.table.names, by_code) if units
+        }
+
+    def harvest_kg_by_name(self) -> Dict[str, int]:
+        """
+        Урожай по культурам в килограммах.
+
+        Returns:
+            Dict[str, int]: Урожай в кг по названиям культур
+        """
+        return {name: units_to_kg(units) for name, units in self.harvest_units_by_name().items()}
+
+
+def exact_season_harvest(crops: Union[Iterable[Crop], CropTable, ExactTotals]) -> Decimal:
+    """
+    Точный общий урожай за сезон.
+
+    Точный аналог calculate_total_season_harvest: урожай каждой строки
+    считается в целых единицах и суммируется без округления. Для
+    ExactTotals суммируется уже готовая целочисленная колонка.
+
+    Args:
+        crops: Набор объектов Crop, таблица CropTable или ее точные итоги
+
+    Returns:
+        Decimal: Общий урожай в тоннах (5 знаков после запятой)
+    """
+    if isinstance(crops, ExactTotals):
+        return units_to_tons(sum(crops.harvest_units))
+    if isinstance(crops, CropTable):
+        areas, yields = crops.area, crops.yield_per_hectare
+    else:
+        crops = list(crops)
+        areas = [crop.area for crop in crops]
+        yields = [crop.yield_per_hectare for crop in crops]
+    return units_to_tons(sum(columns_to_units(areas, yields)[2]))
@@ -0,0 +1,291 @@
+"""
+Групповая агрегация истории урожая по хозяйствам и сезонам.
+
+Записи истории - кортежи (хозяйство, сезон, культура, площадь,
+урожайность). Свертка по группам (по умолчанию хозяйство × сезон ×
+культура) делится на пакеты, которые обрабатываются параллельно
+в ProcessPoolExecutor.
+
+Суммы хранятся в виде точного разложения - списка неперекрывающихся
+чисел, сумма которых в точности равна сумме значений группы. Поэтому
+частичные результаты объединяются без потери точности, а итоги не
+зависят ни от размера пакетов, ни от числа процессов и совпадают с
+однопоточным расчетом через math.fsum.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, islice, repeat
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .importer import ImportReport, iter_file_chunks
+
+# Поля записи истории в порядке следования в кортеже
+RECORD_FIELDS = ('farm', 'season', 'name', 'area', 'yield_per_hectare')
+
+# Группировка по умолчанию
+GROUP_FIELDS = ('farm', 'season', 'name')
+
+# Количество записей в одном пакете для процесса
+CHUNK_RECORDS = 250_000
+
+# Разложение сжимается, когда в нем становится больше чисел
+MAX_TERMS = 32
+
+HistoryRecord = Tuple[str, str, str, float, float]
+GroupKey = Tuple[str, ...]
+
+
+def exact_terms(values: Iterable[float]) -> List[float]:
+    """
+    Раскладывает сумму значений в точную сумму неперекрывающихся чисел.
+
+    Каждое следующее число - правильно округленный остаток точной
+    суммы после вычитания предыдущих (остаток считает math.fsum).
+    Обычно разложение состоит из одного-трех чисел.
+
+    Args:
+        values: Значения
+
+    Returns:
+        List[float]: Числа, сумма которых в точности равна сумме значений
+        (пустой список для нулевой суммы)
+
+    Example:
+        >>> exact_terms([1e16, 1.0, -1e16])
+        [1.0]
+    """
+    values = list(values)
+    terms: List[float] = []
+    while True:
+        rest = math.fsum(chain(values, [-term for term in terms]))
+        if rest == 0.0:
+            return terms
+        terms.append(rest)
+        if not math.isfinite(rest):
+            return [rest]
+
+
+@dataclass
+class GroupTotals:
+    """
+    Итоги группы записей.
+
+    Attributes:
+        count: Количество записей
+        area_terms: Точное разложение суммарной площади
+        harvest_terms: Точное разложение суммарного урожая
+    """
+    count: int = 0
+    area_terms: List[float] = field(default_factory=list, repr=False)
+    harvest_terms: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def area(self) -> float:
+        """Суммарная площадь в гектарах."""
+        return math.fsum(self.area_terms)
+
+    @property
+    def harvest(self) -> float:
+        """Суммарный урожай в тоннах."""
+        return math.fsum(self.harvest_terms)
+
+    @property
+    def yield_per_hectare(self) -> float:
+        """Средняя урожайность группы (т/га), взвешенная по площади."""
+        area = self.area
+        return self.harvest / area if area else 0.0
+
+    def merge(self, other: 'GroupTotals') -> None:
+        """
+        Добавляет к итогам итоги другой части той же группы (без потери точности).
+
+        Args:
+            other: Итоги другой части группы
+        """
+        self.count += other.count
+        self.area_terms.extend(other.area_terms)
+        self.harvest_terms.extend(other.harvest_terms)
+        if len(self.area_terms) > MAX_TERMS:
+            self.area_terms = exact_terms(self.area_terms)
+        if len(self.harvest_terms) > MAX_TERMS:
+            self.harvest_terms = exact_terms(self.harvest_terms)
+
+
+def _key_getter(indices: Sequence[int]) -> Callable[[HistoryRecord], GroupKey]:
+    """Возвращает функцию, которая строит ключ группы по записи."""
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda record: (record[index],)
+    return itemgetter(*indices)
+
+
+def _group_indices(group_by: Sequence[str]) -> List[int]:
+    """Номера полей группировки в записи."""
+    for name in group_by:
+        if name not in GROUP_FIELDS:
+            raise ValueError(f"Группировка возможна только по полям {GROUP_FIELDS}: {name!r}")
+    return [RECORD_FIELDS.index(name) for name in group_by]
+
+
+def _reduce_records(records: Iterable[HistoryRecord],
+                    indices: Sequence[int]) -> Dict[GroupKey, GroupTotals]:
+    """Сворачивает записи по группам (выполняется в процессе-исполнителе)."""
+    key_of = _key_getter(indices)
+    buckets: Dict[GroupKey, Tuple[List[float], List[float]]] = {}
+    for record in records:
+        key = key_of(record)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = ([], [])
+        area = record[3]
+        bucket[0].append(area)
+        bucket[1].append(area * record[4])
+    return {
+        key: GroupTotals(len(areas), exact_terms(areas), exact_terms(harvests))
+        for key, (areas, harvests) in buckets.items()
+    }
+
+
+def _merge_groups(target: Dict[GroupKey, GroupTotals],
+                  partial: Dict[GroupKey, GroupTotals]) -> None:
+    """Объединяет частичный результат с общим."""
+    for key, totals in partial.items():
+        existing = target.get(key)
+        if existing is None:
+            target[key] = totals
+        else:
+            existing.merge(totals)
+
+
+def _reduce_chunked(records: Iterable[HistoryRecord], indices: Sequence[int],
+                    chunk_size: int = CHUNK_RECORDS) -> Dict[GroupKey, GroupTotals]:
+    """
+    Сворачивает записи пакетами в текущем процессе.
+
+    Значения хранятся не дольше одного пакета, поэтому расход памяти
+    зависит от числа групп, а не от количества записей.
+    """
+    iterator = iter(records)
+    groups: Dict[GroupKey, GroupTotals] = {}
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return groups
+        _merge_groups(groups, _reduce_records(chunk, indices))
+
+
+def aggregate_grouped(records: Sequence[HistoryRecord],
+                      group_by: Sequence[str] = GROUP_FIELDS,
+                      workers: Optional[int] = None,
+                      chunk_size: int = CHUNK_RECORDS) -> Dict[GroupKey, GroupTotals]:
+    """
+    Групповая агрегация записей истории с параллельной сверткой.
+
+    Записи делятся на пакеты по chunk_size, каждый пакет сворачивается
+    в отдельном процессе (при workers=1 - по очереди в текущем),
+    частичные итоги объединяются точно.
+
+    Args:
+        records: Записи (хозяйство, сезон, культура, площадь, урожайность)
+        group_by: Поля группировки из GROUP_FIELDS
+        workers: Количество процессов (None - по числу ядер, 1 - без процессов)
+        chunk_size: Количество записей в пакете
+
+    Returns:
+        Dict[GroupKey, GroupTotals]: Итоги по ключам групп
+        (кортежам значений полей group_by)
+
+    Raises:
+        ValueError: Если поле группировки неизвестно
+
+    Example:
+        >>> groups = aggregate_grouped([("Север", "2024", "Пшеница", 10.0, 3.5)])
+        >>> groups[("Север", "2024", "Пшеница")].harvest
+        35.0
+    """
+    indices = _group_indices(group_by)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(records) <= chunk_size:
+        return _reduce_chunked(records, indices, chunk_size)
+
+    chunks = (records[start:start + chunk_size] for start in range(0, len(records), chunk_size))
+    groups: Dict[GroupKey, GroupTotals] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_reduce_records, chunks, repeat(indices)):
+            _merge_groups(groups, partial)
+    return groups
+
+
+def _reduce_file(source: Tuple[str, str, str], indices: Sequence[int],
+                 delimiter: Optional[str], encoding: str
+                 ) -> Tuple[Dict[GroupKey, GroupTotals], ImportReport]:
+    """Читает и сворачивает один файл истории (выполняется в процессе-исполнителе)."""
+    farm, season, path = source
+    report = ImportReport()
+    prefix = (farm, season)
+    records = (
+        prefix + row
+        for chunk, _, _ in iter_file_chunks(path, report, delimiter, encoding)
+        for row in chunk
+    )
+    groups = _reduce_chunked(records, indices)
+    # В общем отчете по нескольким файлам номер строки без файла неоднозначен
+    for error in report.errors:
+        error.source = path
+    return groups, report
+
+
+def aggregate_files(sources: Sequence[Tuple[str, str, str]],
+                    group_by: Sequence[str] = GROUP_FIELDS,
+                    workers: Optional[int] = None,
+                    delimiter: Optional[str] = None,
+                    encoding: str = 'utf-8-sig'
+                    ) -> Tuple[Dict[GroupKey, GroupTotals], ImportReport]:
+    """
+    Групповая агрегация истории, хранящейся в CSV/TSV файлах.
+
+    Каждый файл содержит культуры одного хозяйства за один сезон.
+    Файлы читаются и сворачиваются параллельно, в процессы передаются
+    только пути, а обратно - частичные итоги.
+
+    Args:
+        sources: Тройки (хозяйство, сезон, путь к файлу)
+        group_by: Поля группировки из GROUP_FIELDS
+        workers: Количество процессов (None - по числу ядер, 1 - без процессов)
+        delimiter: Разделитель колонок (None - определить автоматически)
+        encoding: Кодировка файлов
+
+    Returns:
+        Tuple[Dict[GroupKey, GroupTotals], ImportReport]: Итоги по группам
+        и общий отчет об импорте (у ошибок указан путь к файлу)
+
+    Raises:
+        ValueError: Если поле группировки неизвестно
+        OSError: Если файл не удалось прочитать
+    """
+    indices = _group_indices(group_by)
+    workers = min(workers or os.cpu_count() or 1, max(len(sources), 1))
+    args = (repeat(indices), repeat(delimiter), repeat(encoding))
+
+    if workers == 1:
+        results = map(_reduce_file, sources, *args)
+        return _merge_file_results(results)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _merge_file_results(pool.map(_reduce_file, sources, *args))
+
+
+def _merge_file_results(results: Iterable[Tuple[Dict[GroupKey, GroupTotals], ImportReport]]
+                        ) -> Tuple[Dict[GroupKey, GroupTotals], ImportReport]:
+    """Объединяет итоги и отчеты по файлам."""
+    groups: Dict[GroupKey, GroupTotals] = {}
+    report = ImportReport()
+    for partial, partial_report in results:
+        _merge_groups(groups, partial)
+        report.imported += partial_report.imported
+        for error in partial_report.errors:
+            report.add_error(error)
+        report.dropped_errors += partial_report.dropped_errors
+    return groups, report
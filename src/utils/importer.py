@@ -0,0 +1,371 @@
+"""
+Потоковый импорт культур из CSV/TSV.
+
+Содержит генераторный конвейер, который читает файл построчно,
+проверяет каждую запись через модель Crop и собирает ошибки по
+строкам, не прерывая импорт. Файл целиком в память не загружается.
+Числа принимаются в локальных форматах («3,5», «1 234,5») и с
+единицами измерения (см. numparse).
+"""
+import csv
+import math
+import os
+from dataclasses import dataclass, field
+from itertools import islice
+from operator import attrgetter, itemgetter
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+from ..models.crop import Crop, RowError
+from .metrics import timed, timer
+from .numparse import AREA_UNITS, YIELD_UNITS, parse_column, parse_number
+
+# Разделители, которые распознаются автоматически (в порядке приоритета)
+DELIMITERS = ('\t', ';', ',')
+
+# Названия колонок в порядке следования в файле
+FIELDS = ('name', 'area', 'yield_per_hectare')
+
+# Необязательная четвертая колонка (есть в выгрузке src.utils.export):
+# проверяется, что она равна произведению площади на урожайность
+HARVEST_FIELD = 'total_harvest'
+
+# Допустимое относительное расхождение общего урожая с площадью × урожайность
+HARVEST_TOLERANCE = 1e-6
+
+# Количество записей, которые создаются одним пакетом через Crop.from_rows
+CHUNK_SIZE = 4096
+
+
+@dataclass
+class ImportReport:
+    """
+    Итог импорта.
+
+    Attributes:
+        imported: Количество успешно импортированных записей
+        errors: Сохраненные ошибки (не более max_errors)
+        dropped_errors: Количество ошибок сверх лимита, которые не сохранены
+        max_errors: Максимальное количество сохраняемых ошибок
+    """
+    imported: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    dropped_errors: int = 0
+    max_errors: int = 1000
+
+    def add_error(self, error: RowError) -> None:
+        """Сохраняет ошибку, не превышая лимит хранимых ошибок."""
+        if len(self.errors) < self.max_errors:
+            self.errors.append(error)
+        else:
+            self.dropped_errors += 1
+
+    @property
+    def failed(self) -> int:
+        """Общее количество строк с ошибками."""
+        return len(self.errors) + self.dropped_errors
+
+
+def detect_delimiter(sample: str) -> str:
+    """
+    Определяет разделитель колонок по первой строке файла.
+
+    Args:
+        sample: Первая строка файла
+
+    Returns:
+        str: Разделитель (табуляция, точка с запятой или запятая)
+    """
+    for delimiter in DELIMITERS:
+        if delimiter in sample:
+            return delimiter
+    return ','
+
+
+def iter_rows(stream: TextIO, delimiter: Optional[str] = None) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Построчно читает записи из текстового потока.
+
+    Пустые строки пропускаются. Разделитель определяется по первой
+    строке, если не задан явно.
+
+    Args:
+        stream: Текстовый поток (открытый файл, sys.stdin)
+        delimiter: Разделитель колонок (None - определить автоматически)
+
+    Yields:
+        Tuple[int, List[str]]: Номер строки и список значений
+    """
+    first_line = stream.readline()
+    if not first_line:
+        return
+    if delimiter is None:
+        delimiter = detect_delimiter(first_line)
+
+    lines = _chain_first(first_line, stream)
+    reader = csv.reader(lines, delimiter=delimiter)
+    for values in reader:
+        if values and any(value.strip() for value in values):
+            yield reader.line_num, values
+
+
+def _chain_first(first_line: str, stream: TextIO) -> Iterator[str]:
+    """Возвращает уже прочитанную первую строку, затем остаток потока."""
+    yield first_line
+    yield from stream
+
+
+def _number_error(line: int, field_name: str, raw: str,
+                  number: Optional[float]) -> Optional[RowError]:
+    """Ошибка числового поля (None, если значение верно)."""
+    if number is None:
+        return RowError(line, field_name, f"не число: {raw.strip()!r}")
+    if not 0 < number < math.inf:
+        return RowError(line, field_name, "значение должно быть положительным числом")
+    return None
+
+
+def _width(values: List[str]) -> int:
+    """Количество колонок строки без пустых колонок в конце («a,1,2,»)."""
+    width = len(values)
+    while width > len(FIELDS) and not values[width - 1].strip():
+        width -= 1
+    return width
+
+
+def _width_error(line: int, width: int) -> RowError:
+    """Ошибка количества колонок (лишние колонки не отбрасываются молча)."""
+    reason = (f"ожидается {len(FIELDS)} колонки (или {len(FIELDS) + 1} с общим урожаем), "
+              f"получено {width}")
+    if width > len(FIELDS):
+        reason += "; для чисел с десятичной запятой используйте разделитель ';'"
+    return RowError(line, 'row', reason)
+
+
+def parse_row(line: int, values: List[str]) -> Union[Tuple[str, float, float], RowError]:
+    """
+    Преобразует значения строки в проверенную запись.
+
+    Проверки совпадают с Crop._validate_data, поэтому результат можно
+    передавать в Crop.from_rows без повторной валидации. Числа
+    принимаются в локальных форматах и с единицами (см. numparse).
+
+    Args:
+        line: Номер строки в файле
+        values: Значения колонок
+
+    Returns:
+        Union[Tuple[str, float, float], RowError]: Запись (название,
+        площадь, урожайность) или описание ошибки
+    """
+    records, errors = parse_rows([(line, values)])
+    return errors[0] if errors else records[0]
+
+
+def parse_rows(rows: Sequence[Tuple[int, List[str]]]
+               ) -> Tuple[List[Tuple[str, float, float]], List[RowError]]:
+    """
+    Преобразует пакет строк в проверенные записи.
+
+    Числовые колонки пакета разбираются целиком (numparse.parse_column),
+    проверки по строкам совпадают с parse_row. Строка с четвертой
+    колонкой (общий урожай, как в выгрузке) принимается, только если
+    эта колонка равна площади × урожайность: иначе колонки, скорее
+    всего, сдвинуты десятичной запятой при разделителе ','. Строки с
+    другим количеством колонок считаются ошибочными.
+
+    Args:
+        rows: Пары (номер строки, значения)
+
+    Returns:
+        Tuple[List[Tuple[str, float, float]], List[RowError]]: Корректные
+        записи (название, площадь, урожайность) и ошибки в порядке строк
+    """
+    errors: List[RowError] = []
+    widths = set(map(len, map(itemgetter(1), rows)))
+    if widths == {len(FIELDS)}:
+        complete = rows
+    else:
+        complete = []
+        for line, values in rows:
+            width = _width(values)
+            if width in (len(FIELDS), len(FIELDS) + 1):
+                complete.append((line, values))
+            else:
+                errors.append(_width_error(line, width))
+    if not complete:
+        return [], errors
+
+    columns = [values for _, values in complete]
+    names = list(map(str.strip, map(itemgetter(0), columns)))
+    areas = parse_column(list(map(itemgetter(1), columns)), AREA_UNITS)
+    yields = parse_column(list(map(itemgetter(2), columns)), YIELD_UNITS)
+
+    # Все значения верны: записи собираются целиком, без проверок по строкам
+    if not errors and widths == {len(FIELDS)} and all(names) \
+            and None not in areas and None not in yields \
+            and 0 < min(areas) and max(areas) < math.inf \
+            and 0 < min(yields) and max(yields) < math.inf:
+        return list(zip(names, areas, yields)), errors
+
+    records: List[Tuple[str, float, float]] = []
+    for (line, values), name, area, yield_per_hectare in zip(complete, names, areas, yields):
+        if not name:
+            errors.append(RowError(line, 'name', "название культуры не может быть пустым"))
+        elif area is not None and 0 < area < math.inf \
+                and yield_per_hectare is not None and 0 < yield_per_hectare < math.inf:
+            if _width(values) > len(FIELDS) and \
+                    not _harvest_matches(values[3], area, yield_per_hectare):
+                errors.append(RowError(
+                    line, HARVEST_FIELD,
+                    "не равен площади × урожайность; для чисел с десятичной "
+                    "запятой используйте разделитель ';'"))
+            else:
+                records.append((name, area, yield_per_hectare))
+        else:
+            errors.append(_number_error(line, FIELDS[1], values[1], area)
+                          or _number_error(line, FIELDS[2], values[2], yield_per_hectare))
+    errors.sort(key=attrgetter('line'))
+    return records, errors
+
+
+def _harvest_matches(raw: str, area: float, yield_per_hectare: float) -> bool:
+    """Колонка общего урожая совпадает с площадью × урожайность."""
+    harvest = parse_number(raw)
+    return harvest is not None and math.isclose(harvest, area * yield_per_hectare,
+                                                rel_tol=HARVEST_TOLERANCE)
+
+
+def iter_record_chunks(rows: Iterable[Tuple[int, List[str]]], report: ImportReport,
+                       chunk_size: int = CHUNK_SIZE) -> Iterator[List[Tuple[str, float, float]]]:
+    """
+    Проверяет записи и отдает корректные пакетами.
+
+    Строки собираются в пакеты по chunk_size и разбираются по колонкам
+    (parse_rows). Первая строка считается заголовком, только если ни
+    одно из ее числовых полей не распознается как число; первая строка
+    с одним неверным числом - ошибка данных, как и любая другая. Ошибки
+    записываются в отчет, импорт при этом продолжается.
+
+    Args:
+        rows: Пары (номер строки, значения)
+        report: Отчет, в который записываются ошибки
+        chunk_size: Максимальное количество строк в пакете
+
+    Yields:
+        List[Tuple[str, float, float]]: Пакет проверенных записей
+        (название, площадь, урожайность)
+    """
+    first = True
+    for batch in _batched(rows, chunk_size):
+        if first:
+            first = False
+            if _is_header(batch[0][1]):
+                del batch[0]
+        records, errors = parse_rows(batch)
+        for error in errors:
+            report.add_error(error)
+        if records:
+            yield records
+
+
+def _is_header(values: List[str]) -> bool:
+    """Строка - заголовок: ни площадь, ни урожайность не распознаются как числа."""
+    return len(values) >= len(FIELDS) and (
+        parse_number(values[1], AREA_UNITS) is None
+        and parse_number(values[2], YIELD_UNITS) is None
+    )
+
+
+def _batched(rows: Iterable[Tuple[int, List[str]]], size: int
+             ) -> Iterator[List[Tuple[int, List[str]]]]:
+    """Делит строки на списки не длиннее size."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_crops(rows: Iterable[Tuple[int, List[str]]], report: ImportReport) -> Iterator[Crop]:
+    """
+    Проверяет записи и отдает только корректные культуры.
+
+    Культуры создаются пакетами по CHUNK_SIZE записей через
+    Crop.from_rows (см. iter_record_chunks).
+
+    Args:
+        rows: Пары (номер строки, значения)
+        report: Отчет, в который записываются ошибки
+
+    Yields:
+        Crop: Корректные культуры
+    """
+    for chunk in iter_record_chunks(rows, report):
+        with timer("crop.from_rows"):
+            crops = Crop.from_rows(chunk, validate=False)[0]
+        yield from crops
+
+
+def iter_file_chunks(path: str, report: ImportReport, delimiter: Optional[str] = None,
+                     encoding: str = 'utf-8-sig', chunk_size: int = CHUNK_SIZE
+                     ) -> Iterator[Tuple[List[Tuple[str, float, float]], int, int]]:
+    """
+    Читает файл пакетами проверенных записей с информацией о прогрессе.
+
+    Args:
+        path: Путь к файлу
+        report: Отчет, в который записываются ошибки
+        delimiter: Разделитель колонок (None - определить автоматически)
+        encoding: Кодировка файла
+        chunk_size: Максимальный размер пакета
+
+    Yields:
+        Tuple[List[Tuple[str, float, float]], int, int]: Пакет записей,
+        количество прочитанных байт и размер файла
+    """
+    total = os.path.getsize(path)
+    with open(path, newline='', encoding=encoding) as stream:
+        for chunk in iter_record_chunks(iter_rows(stream, delimiter), report, chunk_size):
+            report.imported += len(chunk)
+            yield chunk, stream.buffer.tell(), total
+
+
+@timed("import.file")
+def import_crops(source: Union[str, TextIO], sink: Callable[[Crop], None],
+                 delimiter: Optional[str] = None, encoding: str = 'utf-8-sig',
+                 max_errors: int = 1000) -> ImportReport:
+    """
+    Импортирует культуры из CSV/TSV файла в приемник.
+
+    Корректные культуры передаются в sink по мере чтения (пакетами
+    не более CHUNK_SIZE записей), поэтому объем памяти не зависит
+    от размера файла.
+
+    Args:
+        source: Путь к файлу или открытый текстовый поток
+        sink: Функция, принимающая культуру (например, CropTable.append)
+        delimiter: Разделитель колонок (None - определить автоматически)
+        encoding: Кодировка файла
+        max_errors: Максимальное количество сохраняемых в отчете ошибок
+
+    Returns:
+        ImportReport: Итог импорта с ошибками по строкам
+    """
+    report = ImportReport(max_errors=max_errors)
+
+    if isinstance(source, str):
+        with open(source, newline='', encoding=encoding) as stream:
+            _run_import(stream, sink, delimiter, report)
+    else:
+        _run_import(source, sink, delimiter, report)
+
+    return report
+
+
+def _run_import(stream: TextIO, sink: Callable[[Crop], None],
+                delimiter: Optional[str], report: ImportReport) -> None:
+    """Пропускает поток через конвейер разбора и проверки."""
+    for crop in iter_crops(iter_rows(stream, delimiter), report):
+        sink(crop)
+        report.imported += 1
@@ -0,0 +1,366 @@
+"""
+Замеры горячих путей приложения.
+
+Содержит легковесные таймеры и счетчики, которыми размечены
+основные операции: проверка ввода, создание культур, отрисовка
+списка, расчет итогов, импорт и экспорт. По умолчанию замеры
+выключены: размеченная функция только проверяет один флаг, а
+timer() возвращает общий пустой контекст без обращения к часам.
+
+Включенные замеры копят количество вызовов и суммарное, минимальное
+и максимальное время по каждому имени. Дополнительно можно включить
+профилировщик cProfile (профилирует поток, включивший замеры) и
+трассировку памяти tracemalloc. Результаты выдаются словарем
+(snapshot), текстом (format_report) или сохраняются в JSON (dump_json).
+
+Пример:
+    >>> from src.utils import metrics
+    >>> metrics.enable()
+    >>> with metrics.timer("import.file"):
+    ...     import_crops(path, on_chunk)
+    >>> print(metrics.format_report())
+"""
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TextIO, TypeVar, Union
+
+# Переменная окружения, включающая замеры при запуске
+METRICS_ENV = "HARVEST_METRICS"
+
+# Сколько строк профиля и мест выделения памяти выводить в отчете
+REPORT_LIMIT = 20
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class Metric:
+    """
+    Накопленные замеры одной операции.
+
+    Attributes:
+        count: Количество вызовов
+        total: Суммарное время в секундах
+        min: Минимальное время вызова
+        max: Максимальное время вызова
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, elapsed: float) -> None:
+        """Учитывает один вызов."""
+        self.count += 1
+        self.total += elapsed
+        if elapsed < self.min:
+            self.min = elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def as_dict(self) -> Dict[str, float]:
+        """Замеры в виде словаря (время в миллисекундах)."""
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "min_ms": self.min * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+        }
+
+
+class _State:
+    """Глобальное состояние замеров."""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.timers: Dict[str, Metric] = {}
+        self.counters: Dict[str, int] = {}
+        self.profiler = None
+        self.profiling = False
+        self.trace_memory = False
+        self.memory: Optional[Dict[str, Any]] = None  # Отчет о памяти после остановки
+
+
+_state = _State()
+
+
+class _Timer:
+    """Контекст замера времени одной операции."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        record(self.name, time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    """Пустой контекст для выключенных замеров."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def is_enabled() -> bool:
+    """Включены ли замеры."""
+    return _state.enabled
+
+
+def enable(profile: bool = False, trace_memory: bool = False) -> None:
+    """
+    Включает замеры.
+
+    Args:
+        profile: Включить профилировщик cProfile в текущем потоке
+        trace_memory: Включить трассировку памяти tracemalloc
+    """
+    _state.enabled = True
+    if profile:
+        import cProfile
+
+        if _state.profiler is None:
+            _state.profiler = cProfile.Profile()
+        _state.profiler.enable()
+        _state.profiling = True
+    if trace_memory and not _state.trace_memory:
+        import tracemalloc
+
+        tracemalloc.start()
+        _state.trace_memory = True
+        _state.memory = None
+
+
+def disable() -> None:
+    """Выключает замеры, профилировщик и трассировку памяти (накопленное сохраняется)."""
+    _state.enabled = False
+    if _state.profiling:
+        _state.profiler.disable()
+        _state.profiling = False
+    if _state.trace_memory:
+        import tracemalloc
+
+        # Отчет о памяти нужен и после остановки трассировки
+        _state.memory = _memory_report()
+        _state.trace_memory = False
+        tracemalloc.stop()
+
+
+def reset() -> None:
+    """Удаляет накопленные замеры, профиль и отчет о памяти."""
+    with _state.lock:
+        _state.timers.clear()
+        _state.counters.clear()
+    if _state.profiler is not None:
+        _state.profiler.disable()
+        _state.profiler = None
+        if _state.profiling:
+            import cProfile
+
+            _state.profiler = cProfile.Profile()
+            _state.profiler.enable()
+    _state.memory = None
+    if _state.trace_memory:
+        import tracemalloc
+
+        tracemalloc.clear_traces()
+
+
+def record(name: str, elapsed: float) -> None:
+    """
+    Учитывает время одного вызова операции.
+
+    Args:
+        name: Имя операции
+        elapsed: Время вызова в секундах
+    """
+    with _state.lock:
+        metric = _state.timers.get(name)
+        if metric is None:
+            metric = _state.timers[name] = Metric()
+        metric.add(elapsed)
+
+
+def count(name: str, value: int = 1) -> None:
+    """
+    Увеличивает счетчик (если замеры включены).
+
+    Args:
+        name: Имя счетчика
+        value: Приращение
+    """
+    if _state.enabled:
+        with _state.lock:
+            _state.counters[name] = _state.counters.get(name, 0) + value
+
+
+def timer(name: str) -> Union[_Timer, _NullTimer]:
+    """
+    Контекст замера времени операции.
+
+    Args:
+        name: Имя операции
+
+    Returns:
+        Контекстный менеджер (пустой, если замеры выключены)
+
+    Example:
+        >>> with timer("crop.construct"):
+        ...     crop = Crop(name, area, yield_per_hectare)
+    """
+    return _Timer(name) if _state.enabled else _NULL_TIMER
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Декоратор замера времени функции.
+
+    Args:
+        name: Имя операции
+
+    Returns:
+        Callable: Декоратор
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def _memory_report() -> Dict[str, Any]:
+    """Текущая и пиковая память и крупнейшие места выделения (tracemalloc)."""
+    import tracemalloc
+
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics('lineno')[:REPORT_LIMIT]
+    return {
+        "current_kb": current / 1024,
+        "peak_kb": peak / 1024,
+        "top": [{"location": str(stat.traceback), "size_kb": stat.size / 1024,
+                 "count": stat.count} for stat in top],
+    }
+
+
+def _profile_report() -> Optional[str]:
+    """Текст профиля cProfile (самые затратные функции)."""
+    if _state.profiler is None:
+        return None
+    import io
+    import pstats
+
+    stream = io.StringIO()
+    stats = pstats.Stats(_state.profiler, stream=stream)
+    if _state.profiling:
+        # Сбор статистики останавливает профилировщик
+        _state.profiler.enable()
+    stats.sort_stats('cumulative').print_stats(REPORT_LIMIT)
+    return stream.getvalue()
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Накопленные замеры.
+
+    Returns:
+        Dict[str, Any]: Словарь с ключами enabled, timers (замеры по
+        операциям, время в мс), counters, а также memory и profile,
+        если включены трассировка памяти и профилировщик
+    """
+    with _state.lock:
+        result: Dict[str, Any] = {
+            "enabled": _state.enabled,
+            "timers": {name: metric.as_dict() for name, metric in sorted(_state.timers.items())},
+            "counters": dict(sorted(_state.counters.items())),
+        }
+    memory = _memory_report() if _state.trace_memory else _state.memory
+    if memory is not None:
+        result["memory"] = memory
+    profile = _profile_report()
+    if profile is not None:
+        result["profile"] = profile
+    return result
+
+
+def format_report(data: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Форматирует замеры в виде текста.
+
+    Args:
+        data: Замеры из snapshot (None - текущие)
+
+    Returns:
+        str: Текст отчета
+    """
+    data = snapshot() if data is None else data
+    lines = [f"{'Операция':32s} {'вызовов':>8s} {'всего, мс':>11s} "
+             f"{'среднее':>9s} {'макс.':>9s}"]
+    for name, metric in data["timers"].items():
+        lines.append(
+            f"{name:32s} {metric['count']:>8d} {metric['total_ms']:>11.2f} "
+            f"{metric['mean_ms']:>9.3f} {metric['max_ms']:>9.3f}"
+        )
+    if data["counters"]:
+        lines.append("")
+        lines.extend(f"{name:32s} {value:>8d}" for name, value in data["counters"].items())
+    memory = data.get("memory")
+    if memory:
+        lines.append("")
+        lines.append(f"Память: текущая {memory['current_kb']:.0f} КБ, "
+                     f"пиковая {memory['peak_kb']:.0f} КБ")
+        lines.extend(f"  {item['size_kb']:>10.1f} КБ  {item['location']}"
+                     for item in memory["top"])
+    if data.get("profile"):
+        lines.append("")
+        lines.append(data["profile"])
+    return "\n".join(lines)
+
+
+def dump_json(target: Union[str, TextIO]) -> None:
+    """
+    Сохраняет замеры в JSON.
+
+    Args:
+        target: Путь к файлу или текстовый поток
+    """
+    import json
+
+    if isinstance(target, str):
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(snapshot(), target, ensure_ascii=False, indent=2)
+
+
+if os.environ.get(METRICS_ENV):
+    enable()
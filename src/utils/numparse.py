@@ -0,0 +1,172 @@
+"""
+Разбор чисел в локальных форматах и с единицами измерения.
+
+Принимаются десятичная запятая («3,5»), разделители разрядов
+(«1 234,5», «1.234,5», «1,234.5») и единицы измерения после числа:
+площадь - га/ha, сотки, м²; урожайность - т/га, ц/га, кг/га (или
+просто т, ц, кг на гектар). Значения переводятся в единицы модели:
+гектары и тонны на гектар.
+
+Колонка разбирается целиком: значения склеиваются в одну строку,
+допустимые символы которой проверяются одним заранее
+скомпилированным выражением, и преобразуются через map(float) -
+встроенными функциями, с одной проверкой на всю колонку вместо
+обработки исключения для каждого значения. Только если в колонке
+есть разделители разрядов, единицы или ошибки, значения разбираются
+по одному выражением для отдельного числа.
+"""
+import re
+from typing import Dict, List, Optional, Sequence
+
+# Единицы площади: множитель перевода в гектары
+AREA_UNITS: Dict[str, float] = {
+    '': 1.0, 'га': 1.0, 'ha': 1.0, 'гектар': 1.0, 'гектара': 1.0, 'гектаров': 1.0,
+    'сот': 0.01, 'сотка': 0.01, 'сотки': 0.01, 'соток': 0.01,
+    'м2': 0.0001, 'м²': 0.0001, 'квм': 0.0001, 'm2': 0.0001, 'm²': 0.0001,
+}
+
+# Единицы урожайности: множитель перевода в тонны на гектар
+YIELD_UNITS: Dict[str, float] = {
+    '': 1.0, 'т/га': 1.0, 't/ha': 1.0, 'т': 1.0, 't': 1.0,
+    'ц/га': 0.1, 'ц': 0.1,
+    'кг/га': 0.001, 'kg/ha': 0.001, 'кг': 0.001, 'kg': 0.001,
+}
+
+# Без единиц: только число
+NO_UNITS: Dict[str, float] = {'': 1.0}
+
+# Символ, которого не бывает в колонке простых чисел
+_NOT_PLAIN = re.compile(r'[^0-9.eE+\- \t\n]')
+
+# Отдельное число: знак, цифры с разделителями разрядов, дробная часть, единица
+_VALUE = re.compile(
+    r'\s*(?P<sign>[+-]?)'
+    r"(?P<int>\d{1,3}(?P<sep>[ \u00a0\u202f'.,])\d{3}(?:(?P=sep)\d{3})*|\d*)"
+    r'(?:(?P<dec>[.,])(?P<frac>\d*))?'
+    r'(?P<exp>[eE][+-]?\d+)?'
+    r'\s*(?P<unit>[^\d\s+-].*?)?\s*'
+)
+
+# Символы, которые не влияют на запись единицы («т / га.» -> «т/га»)
+_UNIT_NOISE = str.maketrans('', '', ' .\u00a0')
+
+
+def normalize_unit(unit: str) -> str:
+    """
+    Приводит запись единицы к ключу словаря единиц.
+
+    Args:
+        unit: Единица в записи пользователя («Ц / Га.»)
+
+    Returns:
+        str: Ключ единицы («ц/га»)
+    """
+    return unit.translate(_UNIT_NOISE).lower()
+
+
+def parse_number(text: str, units: Dict[str, float] = NO_UNITS) -> Optional[float]:
+    """
+    Разбирает одно число в локальном формате с необязательной единицей.
+
+    Одиночная запятая или точка считается десятичной («1,234» - 1.234),
+    в том числе без дробной части («12,»), как и при разборе колонки
+    целиком; разделителем разрядов считается повторяющийся разделитель
+    или первый из двух разных («1.234,5»).
+
+    Args:
+        text: Запись числа («3,5», «1 234,5 ц/га»)
+        units: Допустимые единицы и множители перевода в единицы модели
+
+    Returns:
+        Optional[float]: Число в единицах модели или None, если запись
+        не является числом или единица неизвестна
+
+    Example:
+        >>> parse_number("35 ц/га", YIELD_UNITS)
+        3.5
+    """
+    match = _VALUE.fullmatch(text)
+    if match is None:
+        return None
+    integer, sep, dec, frac = match.group('int', 'sep', 'dec', 'frac')
+    if not integer and not frac:
+        return None
+    if sep:
+        if dec is None and sep in '.,' and integer.count(sep) == 1:
+            # «1,234» без дробной части: единственный разделитель - десятичный
+            integer, _, frac = integer.partition(sep)
+        elif dec == sep:
+            return None
+        else:
+            integer = integer.replace(sep, '')
+    scale = units.get(normalize_unit(match.group('unit') or ''))
+    if scale is None:
+        return None
+    number = f"{match.group('sign')}{integer or '0'}.{frac or '0'}{match.group('exp') or ''}"
+    return float(number) * scale
+
+
+def _parse_plain(text: str, count: int) -> Optional[List[float]]:
+    """
+    Преобразует склеенную колонку простых чисел целиком.
+
+    Args:
+        text: Записи чисел, разделенные переводом строки
+        count: Количество записей
+
+    Returns:
+        Optional[List[float]]: Числа или None, если в колонке есть
+        запись, которая не является простым числом
+    """
+    if '.' in text and ',' in text:
+        return None  # Разделители разрядов или обе записи дробной части
+    text = text.replace(',', '.')
+    if _NOT_PLAIN.search(text) is not None:
+        return None
+    lines = text.split('\n')
+    if len(lines) != count:
+        return None  # Перевод строки внутри значения (поле CSV в кавычках)
+    try:
+        return list(map(float, lines))
+    except ValueError:
+        return None  # В колонке есть запись с ошибкой
+
+
+def parse_column(values: Sequence[str], units: Dict[str, float] = NO_UNITS
+                 ) -> List[Optional[float]]:
+    """
+    Разбирает колонку чисел.
+
+    Колонка простых чисел (с точкой или с запятой) и колонка, где у
+    всех значений одна и та же единица, преобразуются целиком.
+    Иначе значения разбираются по одному (parse_number).
+
+    Args:
+        values: Записи чисел
+        units: Допустимые единицы и множители перевода в единицы модели
+
+    Returns:
+        List[Optional[float]]: Числа в единицах модели (None - запись,
+        которая не является числом)
+
+    Example:
+        >>> parse_column(["3,5 ц/га", "40 ц/га"], YIELD_UNITS)
+        [0.35000000000000003, 4.0]
+    """
+    if not values:
+        return []
+    text = '\n'.join(values)
+    numbers = _parse_plain(text, len(values))
+    if numbers is None and len(units) > 1:
+        # Единица первой записи; если ею заканчиваются все записи, она снимается сразу со всех
+        match = _VALUE.fullmatch(values[0])
+        unit = match.group('unit') if match else None
+        scale = units.get(normalize_unit(unit)) if unit else None
+        if scale is not None and text.endswith(unit) and \
+                text.count(unit) == text.count(unit + '\n') + 1 == len(values):
+            numbers = _parse_plain(text[:-len(unit)].replace(unit + '\n', '\n'), len(values))
+            if numbers is not None and scale != 1.0:
+                numbers = [number * scale for number in numbers]
+    if numbers is None:
+        return [parse_number(value, units) for value in values]
+    return numbers
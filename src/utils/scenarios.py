@@ -0,0 +1,385 @@
+"""
+Сценарные расчеты урожая сезона («что, если»).
+
+Сценарий задает множители урожайности по культурам (засуха -20%,
+удобрения +8% для пшеницы и т.д.). Итог сезона линеен по множителям,
+поэтому данные сезона один раз сворачиваются в урожай по культурам,
+а каждый сценарий считается по этим суммам - за время, которое
+зависит от числа культур, а не от числа участков.
+
+Метод Монте-Карло задает для культур распределения множителя:
+общий для всех участков культуры разброс (погода) и независимый
+разброс по участкам. Сумма независимых отклонений участков
+моделируется одним нормальным отклонением на культуру с дисперсией
+plot_sd² · Σ урожай², поэтому прогон тоже не перебирает участки.
+
+Прогоны делятся на пакеты с собственным начальным значением
+генератора; пакеты можно считать в нескольких процессах, результат
+от числа процессов не зависит. При установленном NumPy пакет
+считается векторно.
+"""
+import math
+import os
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from ..models.crop import Crop
+from ..models.crop_table import CropTable
+from ..models.totals import RunningTotals
+from .metrics import timed
+
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен, используется запасной путь на random
+    np = None
+
+# Количество прогонов в одном пакете
+CHUNK_RUNS = 20_000
+
+# Процентили по умолчанию для полос итога
+DEFAULT_BANDS = (5, 25, 50, 75, 95)
+
+# Параметры культуры для прогона: урожай, разброс участков, среднее, sd, минимум
+_Params = Tuple[float, float, float, float, float]
+
+
+@dataclass
+class Scenario:
+    """
+    Детерминированный сценарий: множители урожайности по культурам.
+
+    Attributes:
+        name: Название сценария
+        multipliers: Множители урожайности по названиям культур
+        default: Множитель для культур, не указанных в multipliers
+    """
+    name: str = ""
+    multipliers: Dict[str, float] = field(default_factory=dict)
+    default: float = 1.0
+
+    def multiplier(self, name: str) -> float:
+        """
+        Возвращает множитель урожайности культуры.
+
+        Args:
+            name: Название культуры
+
+        Returns:
+            float: Множитель
+        """
+        return self.multipliers.get(name, self.default)
+
+
+def _parse_factor(text: str) -> float:
+    """Множитель из записи '0.8', '-20%' или '+8%'."""
+    text = text.strip().replace(',', '.')
+    if text.endswith('%'):
+        return 1.0 + float(text[:-1]) / 100.0
+    return float(text)
+
+
+def parse_scenario(spec: str) -> Scenario:
+    """
+    Разбирает сценарий из строки.
+
+    Формат: «[название:] культура=множитель; ...», где множитель -
+    число (0.8) или изменение в процентах (-20%, +8%), а культура
+    '*' задает множитель остальных культур.
+
+    Args:
+        spec: Запись сценария
+
+    Returns:
+        Scenario: Сценарий
+
+    Raises:
+        ValueError: Если запись не удается разобрать
+
+    Example:
+        >>> parse_scenario("засуха: *=-20%; Пшеница=-10%").multiplier("Пшеница")
+        0.9
+    """
+    name, _, body = spec.rpartition(':')
+    scenario = Scenario(name=name.strip() or spec.strip())
+    for part in body.split(';'):
+        if not part.strip():
+            continue
+        culture, sep, value = part.partition('=')
+        if not sep or not culture.strip():
+            raise ValueError(f"Ожидается 'культура=множитель': {part.strip()!r}")
+        try:
+            factor = _parse_factor(value)
+        except ValueError:
+            raise ValueError(f"Некорректный множитель: {value.strip()!r}") from None
+        if culture.strip() == '*':
+            scenario.default = factor
+        else:
+            scenario.multipliers[culture.strip()] = factor
+    return scenario
+
+
+@dataclass
+class YieldDistribution:
+    """
+    Распределение множителя урожайности культуры для метода Монте-Карло.
+
+    Attributes:
+        mean: Средний множитель
+        sd: Стандартное отклонение множителя, общего для всех участков
+            культуры в одном прогоне (погода, цены на удобрения)
+        plot_sd: Стандартное отклонение множителя, независимого для
+            каждого участка
+        minimum: Нижняя граница общего множителя (урожай не бывает
+            отрицательным)
+    """
+    mean: float = 1.0
+    sd: float = 0.0
+    plot_sd: float = 0.0
+    minimum: float = 0.0
+
+
+@dataclass
+class SimulationResult:
+    """
+    Результат прогонов Монте-Карло.
+
+    Attributes:
+        totals: Итоги сезона по прогонам (по возрастанию)
+        mean: Средний итог
+        sd: Стандартное отклонение итога
+        seed: Начальное значение генератора (для повтора расчета)
+    """
+    totals: array
+    mean: float
+    sd: float
+    seed: int
+
+    @property
+    def runs(self) -> int:
+        """Количество прогонов."""
+        return len(self.totals)
+
+    def percentile(self, q: float) -> float:
+        """
+        Возвращает процентиль итога (линейная интерполяция).
+
+        Args:
+            q: Процент от 0 до 100
+
+        Returns:
+            float: Итог, который не превышен в q% прогонов
+        """
+        if not self.totals:
+            return 0.0
+        position = (len(self.totals) - 1) * min(max(q, 0.0), 100.0) / 100.0
+        low = int(position)
+        high = min(low + 1, len(self.totals) - 1)
+        fraction = position - low
+        return self.totals[low] + (self.totals[high] - self.totals[low]) * fraction
+
+    def bands(self, levels: Sequence[float] = DEFAULT_BANDS) -> Dict[float, float]:
+        """
+        Возвращает полосы итога по процентилям.
+
+        Args:
+            levels: Проценты (по умолчанию 5, 25, 50, 75, 95)
+
+        Returns:
+            Dict[float, float]: Итог по каждому проценту
+        """
+        return {level: self.percentile(level) for level in levels}
+
+
+def _simulate_chunk(params: Sequence[_Params], constant: float, runs: int, seed: int,
+                    use_numpy: bool) -> array:
+    """
+    Считает пакет прогонов.
+
+    Args:
+        params: Параметры культур со случайным множителем
+        constant: Вклад культур без разброса
+        runs: Количество прогонов
+        seed: Начальное значение генератора пакета
+        use_numpy: Считать ли векторно на NumPy
+
+    Returns:
+        array: Итоги сезона по прогонам
+    """
+    if use_numpy:
+        rng = np.random.default_rng(seed)
+        harvest, spread, mean, sd, minimum = (np.array(column) for column in zip(*params))
+        shared = rng.normal(mean, sd, size=(runs, len(params)))
+        np.maximum(shared, minimum, out=shared)
+        totals = shared @ harvest + constant
+        if spread.any():
+            totals += rng.standard_normal((runs, len(params))) @ spread
+        return array('d', totals.tolist())
+
+    gauss = random.Random(seed).gauss
+    totals = array('d', bytes(8 * runs))
+    for run in range(runs):
+        total = constant
+        for harvest, spread, mean, sd, minimum in params:
+            multiplier = gauss(mean, sd) if sd else mean
+            total += harvest * (multiplier if multiplier > minimum else minimum)
+            if spread:
+                total += spread * gauss(0.0, 1.0)
+        totals[run] = total
+    return totals
+
+
+class ScenarioEngine:
+    """
+    Расчет итога сезона по сценариям и методом Монте-Карло.
+
+    Данные сезона сворачиваются в урожай по культурам один раз при
+    создании; сумма квадратов урожая участков (нужна для разброса по
+    участкам) считается при первом обращении.
+
+    Attributes:
+        harvest_by_name: Урожай сезона по культурам
+
+    Example:
+        >>> engine = ScenarioEngine(table)
+        >>> engine.evaluate(parse_scenario("засуха: *=-20%"))
+        >>> engine.simulate(default=YieldDistribution(sd=0.1)).bands()
+    """
+
+    def __init__(self, crops: Union[List[Crop], CropTable, RunningTotals]):
+        """
+        Инициализация по данным сезона.
+
+        Args:
+            crops: Культуры, таблица культур или готовые итоги сезона
+                (по итогам нельзя задать разброс по участкам)
+        """
+        if isinstance(crops, RunningTotals):
+            self._table: Optional[CropTable] = None
+            totals = crops
+        else:
+            self._table = crops if isinstance(crops, CropTable) else CropTable(crops)
+            totals = self._table.totals
+        self.harvest_by_name: Dict[str, float] = totals.harvest_by_name()
+        self._squares: Optional[Dict[str, float]] = None
+
+    @property
+    def cultures(self) -> List[str]:
+        """Названия культур сезона."""
+        return list(self.harvest_by_name)
+
+    def _squares_by_name(self) -> Dict[str, float]:
+        """Сумма квадратов урожая участков по культурам (один проход по колонкам)."""
+        if self._squares is None:
+            if self._table is None:
+                raise ValueError("Разброс по участкам требует данных по участкам, а не итогов")
+            table = self._table
+            squares = [0.0] * len(table.names)
+            for code, harvest in zip(table.name_codes, table.total_harvest):
+                squares[code] += harvest * harvest
+            self._squares = dict(zip(table.names, squares))
+        return self._squares
+
+    def by_culture(self, scenario: Scenario) -> Dict[str, float]:
+        """
+        Урожай по культурам в сценарии.
+
+        Args:
+            scenario: Сценарий
+
+        Returns:
+            Dict[str, float]: Урожай по названиям культур
+        """
+        return {name: harvest * scenario.multiplier(name)
+                for name, harvest in self.harvest_by_name.items()}
+
+    def evaluate(self, scenario: Scenario) -> float:
+        """
+        Итог сезона в сценарии.
+
+        Args:
+            scenario: Сценарий
+
+        Returns:
+            float: Общий урожай в тоннах
+        """
+        return math.fsum(self.by_culture(scenario).values())
+
+    def evaluate_many(self, scenarios: Sequence[Scenario]) -> List[float]:
+        """
+        Итоги сезона по нескольким сценариям.
+
+        Args:
+            scenarios: Сценарии
+
+        Returns:
+            List[float]: Общий урожай по каждому сценарию
+        """
+        return [self.evaluate(scenario) for scenario in scenarios]
+
+    @timed("scenario.simulate")
+    def simulate(self, distributions: Optional[Dict[str, YieldDistribution]] = None,
+                 runs: int = 10_000, default: Optional[YieldDistribution] = None,
+                 seed: Optional[int] = None, workers: Optional[int] = 1,
+                 use_numpy: Optional[bool] = None) -> SimulationResult:
+        """
+        Прогоны Монте-Карло итога сезона.
+
+        Args:
+            distributions: Распределения множителя по названиям культур
+            runs: Количество прогонов
+            default: Распределение для культур, не указанных в distributions
+                (None - множитель 1 без разброса)
+            seed: Начальное значение генератора (None - случайное)
+            workers: Количество процессов (None - по числу ядер, 1 - без процессов)
+            use_numpy: Считать ли на NumPy (None - если установлен)
+
+        Returns:
+            SimulationResult: Итоги прогонов и их полосы
+
+        Raises:
+            ValueError: Если задан разброс по участкам, а данные - итоги
+            RuntimeError: Если NumPy запрошен явно, но не установлен
+        """
+        distributions = distributions or {}
+        default = default or YieldDistribution()
+        if use_numpy is None:
+            use_numpy = np is not None
+        elif use_numpy and np is None:
+            raise RuntimeError("NumPy не установлен")
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+
+        # Культуры без разброса дают постоянный вклад и не участвуют в прогонах
+        constant: List[float] = []
+        params: List[_Params] = []
+        for name, harvest in self.harvest_by_name.items():
+            dist = distributions.get(name, default)
+            if not dist.sd and not dist.plot_sd:
+                constant.append(harvest * max(dist.mean, dist.minimum))
+                continue
+            spread = dist.plot_sd * math.sqrt(self._squares_by_name()[name]) if dist.plot_sd else 0.0
+            params.append((harvest, spread, dist.mean, dist.sd, dist.minimum))
+        base = math.fsum(constant)
+
+        sizes = [min(CHUNK_RUNS, runs - start) for start in range(0, runs, CHUNK_RUNS)]
+        seeds = [seed + index for index in range(len(sizes))]
+        totals = array('d')
+        if not params:
+            totals.extend(repeat(base, runs))
+        elif (workers or os.cpu_count() or 1) == 1 or len(sizes) == 1:
+            for size, chunk_seed in zip(sizes, seeds):
+                totals.extend(_simulate_chunk(params, base, size, chunk_seed, use_numpy))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for chunk in pool.map(_simulate_chunk, repeat(params), repeat(base),
+                                      sizes, seeds, repeat(use_numpy)):
+                    totals.extend(chunk)
+
+        totals = array('d', sorted(totals))
+        mean = math.fsum(totals) / runs if runs else 0.0
+        variance = math.fsum((total - mean) ** 2 for total in totals) / (runs - 1) if runs > 1 else 0.0
+        return SimulationResult(totals=totals, mean=mean, sd=math.sqrt(variance), seed=seed)
@@ -0,0 +1,210 @@
+"""
+Кэш статистики по таблице культур.
+
+Содержит StatsCache, который запоминает производные показатели
+(общий урожай, показатели по культурам, топ культур, показатели по
+произвольным фильтрам) и пересчитывает их только после изменения
+данных. Каждое значение хранится вместе с версией данных, от которых
+оно зависит: показатели одной культуры зависят только от версии этой
+культуры, остальные - от версии всей таблицы.
+"""
+import heapq
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from ..models.crop_table import CropTable
+
+# Максимальное количество запомненных значений по умолчанию
+DEFAULT_MAXSIZE = 256
+
+
+@dataclass(frozen=True)
+class CultureStats:
+    """
+    Показатели набора записей (культуры или фильтра).
+
+    Attributes:
+        count: Количество записей
+        area: Суммарная площадь посева в гектарах
+        harvest: Суммарный урожай в тоннах
+        mean_yield: Средняя урожайность по записям (т/га)
+        weighted_yield: Урожайность, взвешенная по площади (т/га)
+    """
+    count: int = 0
+    area: float = 0.0
+    harvest: float = 0.0
+    mean_yield: float = 0.0
+    weighted_yield: float = 0.0
+
+
+def _stats_for_rows(table: CropTable, rows: List[int]) -> CultureStats:
+    """Считает показатели по номерам строк таблицы."""
+    if not rows:
+        return CultureStats()
+    area = math.fsum(table.area[i] for i in rows)
+    harvest = math.fsum(table.total_harvest[i] for i in rows)
+    return CultureStats(
+        count=len(rows),
+        area=area,
+        harvest=harvest,
+        mean_yield=math.fsum(table.yield_per_hectare[i] for i in rows) / len(rows),
+        weighted_yield=harvest / area if area else 0.0
+    )
+
+
+class StatsCache:
+    """
+    Запоминающий кэш статистики с вытеснением давно не используемых значений (LRU).
+
+    Attributes:
+        table: Таблица культур
+        maxsize: Максимальное количество запомненных значений
+        hits: Количество обращений, обслуженных из кэша
+        misses: Количество обращений, потребовавших пересчета
+    """
+
+    def __init__(self, table: CropTable, maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Инициализация кэша.
+
+        Args:
+            table: Таблица культур
+            maxsize: Максимальное количество запомненных значений
+        """
+        self.table = table
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[int, object]]' = OrderedDict()
+
+    def _get(self, key: Hashable, version: int, compute: Callable[[], object]):
+        """Возвращает значение из кэша или вычисляет и запоминает его."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = compute()
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Удаляет все запомненные значения."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def total_harvest(self) -> float:
+        """
+        Общий урожай за сезон.
+
+        Returns:
+            float: Общий урожай в тоннах (как calculate_total_season_harvest)
+        """
+        # Модуль расчетов (с необязательным NumPy) загружается при первом расчете
+        from .calculations import calculate_total_season_harvest
+
+        return self._get(('total',), self.table.version,
+                         lambda: calculate_total_season_harvest(self.table))
+
+    def culture_stats(self, name: str) -> CultureStats:
+        """
+        Показатели одной культуры.
+
+        Значение пересчитывается только после изменения строк этой культуры.
+
+        Args:
+            name: Название культуры
+
+        Returns:
+            CultureStats: Показатели культуры (нулевые, если культуры нет)
+        """
+        return self._get(('culture', name), self.table.culture_version(name),
+                         lambda: self._compute_where(name, None, None, None, None))
+
+    def mean_yield_by_culture(self) -> Dict[str, float]:
+        """
+        Средняя урожайность (взвешенная по площади) по культурам.
+
+        Returns:
+            Dict[str, float]: Урожайность в т/га по названиям культур
+        """
+        def compute() -> Dict[str, float]:
+            totals = self.table.totals
+            harvest = totals.harvest_by_name()
+            area = totals.area_by_name()
+            return {name: harvest[name] / area[name] for name in harvest if area[name]}
+
+        return dict(self._get(('mean_yield',), self.table.version, compute))
+
+    def top_cultures(self, n: int = 5) -> List[Tuple[str, float]]:
+        """
+        Культуры с наибольшим суммарным урожаем.
+
+        Args:
+            n: Количество культур
+
+        Returns:
+            List[Tuple[str, float]]: Пары (название, урожай) по убыванию урожая
+        """
+        def compute() -> List[Tuple[str, float]]:
+            harvest = self.table.totals.harvest_by_name()
+            return heapq.nlargest(n, harvest.items(), key=lambda item: item[1])
+
+        return list(self._get(('top', n), self.table.version, compute))
+
+    def stats_where(self, name: Optional[str] = None,
+                    min_area: Optional[float] = None, max_area: Optional[float] = None,
+                    min_yield: Optional[float] = None,
+                    max_yield: Optional[float] = None) -> CultureStats:
+        """
+        Показатели записей, попадающих под фильтр.
+
+        Границы включаются в диапазон. Если указана культура, значение
+        зависит только от версии этой культуры.
+
+        Args:
+            name: Название культуры (None - все культуры)
+            min_area: Минимальная площадь в гектарах
+            max_area: Максимальная площадь в гектарах
+            min_yield: Минимальная урожайность в т/га
+            max_yield: Максимальная урожайность в т/га
+
+        Returns:
+            CultureStats: Показатели отобранных записей
+        """
+        key = ('where', name, min_area, max_area, min_yield, max_yield)
+        version = self.table.version if name is None else self.table.culture_version(name)
+        return self._get(key, version, lambda: self._compute_where(
+            name, min_area, max_area, min_yield, max_yield))
+
+    def _compute_where(self, name: Optional[str], min_area: Optional[float],
+                       max_area: Optional[float], min_yield: Optional[float],
+                       max_yield: Optional[float]) -> CultureStats:
+        """Отбирает строки по фильтру и считает их показатели."""
+        table = self.table
+        rows = range(len(table))
+        if name is not None:
+            if name not in table.names:
+                return CultureStats()
+            code = table.names.index(name)
+            rows = [i for i, c in enumerate(table.name_codes) if c == code]
+
+        area, yields = table.area, table.yield_per_hectare
+        low_area = -math.inf if min_area is None else min_area
+        high_area = math.inf if max_area is None else max_area
+        low_yield = -math.inf if min_yield is None else min_yield
+        high_yield = math.inf if max_yield is None else max_yield
+        rows = [
+            i for i in rows
+            if low_area <= area[i] <= high_area and low_yield <= yields[i] <= high_yield
+        ]
+        return _stats_for_rows(table, rows)
@@ -0,0 +1,256 @@
+"""
+Фоновое выполнение долгих операций.
+
+Содержит исполнитель задач на пуле потоков. Задачи сообщают о
+прогрессе и промежуточных данных через очередь событий, которую
+главный поток (например, цикл Tk через after()) разбирает методом
+poll. Поддерживается отмена задач.
+"""
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class TaskCancelled(Exception):
+    """Задача была отменена."""
+
+
+class TaskContext:
+    """
+    Контекст, передаваемый в функцию задачи.
+
+    Через него задача сообщает о прогрессе, передает промежуточные
+    данные в главный поток и проверяет запрос на отмену.
+    """
+
+    def __init__(self, handle: 'TaskHandle', events: queue.Queue):
+        self._handle = handle
+        self._events = events
+
+    @property
+    def cancelled(self) -> bool:
+        """Запрошена ли отмена задачи."""
+        return self._handle.cancel_requested
+
+    def check(self) -> None:
+        """
+        Прерывает задачу, если запрошена отмена.
+
+        Raises:
+            TaskCancelled: Если задача отменена
+        """
+        if self._handle.cancel_requested:
+            raise TaskCancelled()
+
+    def progress(self, done: float, total: Optional[float] = None, message: str = "") -> None:
+        """
+        Сообщает о прогрессе выполнения.
+
+        Args:
+            done: Выполненный объем работы
+            total: Полный объем работы (None - неизвестен)
+            message: Текст для отображения пользователю
+        """
+        self._events.put((self._handle, 'progress', (done, total, message)))
+
+    def post(self, data: Any) -> None:
+        """
+        Передает промежуточные данные в главный поток.
+
+        Если главный поток еще не обработал max_pending предыдущих
+        порций, вызов ждет (обратное давление), поэтому объем данных
+        в очереди ограничен.
+
+        Args:
+            data: Данные для обработчика on_data
+
+        Raises:
+            TaskCancelled: Если задача отменена во время ожидания
+        """
+        while not self._handle.pending.acquire(timeout=0.1):
+            self.check()
+        self.check()
+        self._events.put((self._handle, 'data', data))
+
+
+class TaskHandle:
+    """
+    Описание запущенной задачи.
+
+    Attributes:
+        task_id: Номер задачи
+        name: Название задачи для отображения
+        done: Завершена ли задача (успешно, с ошибкой или отменой)
+        pending: Семафор, ограничивающий число необработанных порций данных
+    """
+
+    def __init__(self, task_id: int, name: str, max_pending: int = 8):
+        self.task_id = task_id
+        self.name = name
+        self.done = False
+        self.pending = threading.Semaphore(max_pending)
+        self._cancel = threading.Event()
+        self.on_progress: Optional[Callable[[float, Optional[float], str], None]] = None
+        self.on_data: Optional[Callable[[Any], None]] = None
+        self.on_result: Optional[Callable[[Any], None]] = None
+        self.on_error: Optional[Callable[[BaseException], None]] = None
+        self.on_cancel: Optional[Callable[[], None]] = None
+
+    @property
+    def cancel_requested(self) -> bool:
+        """Запрошена ли отмена задачи."""
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """Запрашивает отмену задачи."""
+        self._cancel.set()
+
+
+class TaskRunner:
+    """
+    Исполнитель фоновых задач на пуле потоков.
+
+    Функции задач выполняются в рабочих потоках и не должны
+    обращаться к виджетам. Все обработчики (on_progress, on_data,
+    on_result, on_error, on_cancel) вызываются только из poll,
+    то есть в потоке, который его вызывает.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Инициализация исполнителя.
+
+        Args:
+            max_workers: Количество рабочих потоков
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="harvest-task")
+        self._events: queue.Queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._active = set()
+
+    def submit(self, func: Callable[..., Any], *args,
+               name: str = "",
+               max_pending: int = 8,
+               on_progress: Optional[Callable[[float, Optional[float], str], None]] = None,
+               on_data: Optional[Callable[[Any], None]] = None,
+               on_result: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None,
+               on_cancel: Optional[Callable[[], None]] = None) -> TaskHandle:
+        """
+        Запускает задачу в фоне.
+
+        Функция вызывается как func(context, *args), где context -
+        объект TaskContext.
+
+        Args:
+            func: Функция задачи
+            *args: Дополнительные аргументы функции
+            name: Название задачи для отображения
+            max_pending: Сколько порций данных может ждать обработки
+            on_progress: Обработчик прогресса (done, total, message)
+            on_data: Обработчик промежуточных данных
+            on_result: Обработчик результата
+            on_error: Обработчик исключения
+            on_cancel: Обработчик отмены
+
+        Returns:
+            TaskHandle: Описание запущенной задачи
+        """
+        handle = TaskHandle(next(self._ids), name, max_pending)
+        handle.on_progress = on_progress
+        handle.on_data = on_data
+        handle.on_result = on_result
+        handle.on_error = on_error
+        handle.on_cancel = on_cancel
+        self._active.add(handle)
+
+        self._executor.submit(self._run, handle, func, args)
+        return handle
+
+    def _run(self, handle: TaskHandle, func: Callable[..., Any], args: tuple) -> None:
+        """Выполняет задачу в рабочем потоке и сообщает об итоге."""
+        context = TaskContext(handle, self._events)
+        try:
+            if handle.cancel_requested:
+                raise TaskCancelled()
+            result = func(context, *args)
+        except TaskCancelled:
+            self._events.put((handle, 'cancelled', None))
+        except Exception as e:
+            self._events.put((handle, 'error', e))
+        else:
+            self._events.put((handle, 'result', result))
+
+    def poll(self, max_events: int = 200) -> int:
+        """
+        Обрабатывает накопившиеся события задач.
+
+        Вызывается периодически из главного потока. Количество
+        событий за один вызов ограничено, чтобы не блокировать
+        интерфейс.
+
+        Args:
+            max_events: Максимальное количество событий за вызов
+
+        Returns:
+            int: Количество обработанных событий
+        """
+        processed = 0
+        while processed < max_events:
+            try:
+                handle, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            processed += 1
+            self._dispatch(handle, kind, payload)
+        return processed
+
+    def _dispatch(self, handle: TaskHandle, kind: str, payload: Any) -> None:
+        """Вызывает обработчик события задачи."""
+        if kind == 'progress':
+            if handle.on_progress and not handle.cancel_requested:
+                handle.on_progress(*payload)
+            return
+        if kind == 'data':
+            try:
+                if handle.on_data and not handle.cancel_requested:
+                    handle.on_data(payload)
+            finally:
+                handle.pending.release()
+            return
+
+        handle.done = True
+        self._active.discard(handle)
+        if kind == 'result' and handle.cancel_requested:
+            # Отмена запрошена, когда задача уже завершалась
+            kind = 'cancelled'
+        if kind == 'result' and handle.on_result:
+            handle.on_result(payload)
+        elif kind == 'error' and handle.on_error:
+            handle.on_error(payload)
+        elif kind == 'cancelled' and handle.on_cancel:
+            handle.on_cancel()
+
+    @property
+    def busy(self) -> bool:
+        """Есть ли незавершенные задачи."""
+        return bool(self._active)
+
+    def cancel_all(self) -> None:
+        """Запрашивает отмену всех незавершенных задач."""
+        for handle in list(self._active):
+            handle.cancel()
+
+    def shutdown(self, cancel: bool = True) -> None:
+        """
+        Останавливает исполнитель.
+
+        Args:
+            cancel: Отменить ли незавершенные задачи
+        """
+        if cancel:
+            self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=cancel)
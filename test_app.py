@@ -3,8 +3,17 @@
 
 Проверяет работу модели данных и функций расчета без GUI.
 """
-from src.models import Crop
-from src.utils import calculate_total_season_harvest
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.models import Crop, CropTable, FrozenCrop
+from src.utils import aggregate_season, calculate_total_season_harvest, import_crops
 
 
 def test_crop_creation():
@@ -82,9 +91,919 @@ def test_validation():
     except ValueError as e:
         print(f"✓ Пустое название обработано: {e}")
     
+    # NaN, бесконечность и не числа отклоняются одинаково при одиночной и пакетной проверке
+    for area in (float("nan"), float("inf"), "10", None, True):
+        try:
+            Crop("Пшеница", area, 3.5)
+            assert False, f"Должна быть ошибка для площади {area!r}"
+        except ValueError:
+            pass
+    errors = Crop.validate_columns(["a", "b", "c"], ["x", float("nan"), 1.0], [1.0, 2.0, None])
+    assert [(error.line, error.field) for error in errors] == [
+        (0, "area"), (1, "area"), (2, "yield_per_hectare")]
+    assert [error.line for error in CropTable().extend_rows([("a", None, 1.0), ("b", 2, 3)])] == [0]
+    
     print("✓ Тест пройден: валидация работает корректно\n")
 
 
+def test_crop_table():
+    """Тест колоночного хранилища культур."""
+    print("Тест 6: Колоночное хранилище CropTable...")
+    table = CropTable([
+        Crop("Пшеница", 10.0, 3.5),
+        Crop("Ячмень", 5.0, 2.8),
+        Crop("Пшеница", 8.0, 2.5)
+    ])
+    assert len(table) == 3
+    assert table.names == ["Пшеница", "Ячмень"]
+    assert list(table.name_codes) == [0, 1, 0]
+    assert table.name_at(2) == "Пшеница"
+    assert table[1] == Crop("Ячмень", 5.0, 2.8)
+    assert [crop.name for crop in table] == ["Пшеница", "Ячмень", "Пшеница"]
+    assert calculate_total_season_harvest(table) == 35.0 + 14.0 + 20.0
+    
+    table.clear()
+    assert len(table) == 0
+    assert not table
+    assert calculate_total_season_harvest(table) == 0.0
+    print("✓ Тест пройден: таблица хранит культуры по колонкам\n")
+
+
+def test_aggregate_season():
+    """Тест пакетной агрегации за сезон."""
+    print("Тест 7: Пакетная агрегация за сезон...")
+    crops = [
+        Crop("Пшеница", 10.0, 3.5),   # 35.0 т
+        Crop("Ячмень", 5.0, 2.8),     # 14.0 т
+        Crop("Пшеница", 8.0, 2.5)     # 20.0 т
+    ]
+    result = aggregate_season(crops, use_numpy=False)
+    assert result.count == 3
+    assert result.total_harvest == calculate_total_season_harvest(crops)
+    assert result.total_area == 23.0
+    assert abs(result.mean_yield - (3.5 + 2.8 + 2.5) / 3) < 1e-12
+    assert abs(result.weighted_yield - 69.0 / 23.0) < 1e-12
+    assert result.harvest_by_name == {"Пшеница": 55.0, "Ячмень": 14.0}
+    assert result.area_by_name == {"Пшеница": 18.0, "Ячмень": 5.0}
+    
+    empty = aggregate_season([], use_numpy=False)
+    assert empty.count == 0 and empty.total_harvest == 0.0
+    
+    # Культура, все строки которой удалены, в итоги не попадает
+    table = CropTable()
+    for crop in crops:
+        table.append(crop)
+    table.remove(1)
+    from src.utils.calculations import np
+    modes = [False] + ([True] if np is not None else [])
+    for use_numpy in modes:
+        removed = aggregate_season(table, use_numpy=use_numpy)
+        assert removed.harvest_by_name == {"Пшеница": 55.0}, use_numpy
+        assert removed.area_by_name == {"Пшеница": 18.0}, use_numpy
+        assert removed.harvest_by_name.keys() == table.totals.harvest_by_name().keys()
+    print(f"✓ Тест пройден: итоги по культурам {result.harvest_by_name}\n")
+
+
+def test_running_totals():
+    """Тест инкрементальных итогов таблицы."""
+    print("Тест 8: Инкрементальные итоги...")
+    table = CropTable()
+    table.append(Crop("Пшеница", 10.0, 3.5))
+    table.append(Crop("Ячмень", 5.0, 2.8))
+    table.append(Crop("Пшеница", 8.0, 2.5))
+    assert table.totals.total_harvest == 69.0
+    assert table.totals.total_area == 23.0
+    assert table.totals.harvest_by_name() == {"Пшеница": 55.0, "Ячмень": 14.0}
+    
+    old = table.update(1, Crop("Овес", 4.0, 2.0))
+    assert old.name == "Ячмень"
+    assert table.totals.harvest_by_name() == {"Пшеница": 55.0, "Овес": 8.0}
+    table.remove(0)
+    assert table.totals.total_harvest == calculate_total_season_harvest(table) == 28.0
+    assert table.totals.count == len(table) == 2
+    
+    # Компенсированное суммирование не накапливает ошибку
+    drift_table = CropTable()
+    for _ in range(10000):
+        drift_table.append(Crop("Пшеница", 0.1, 1.0))
+    for _ in range(9999):
+        drift_table.remove(len(drift_table) - 1)
+    assert drift_table.totals.total_harvest == drift_table.total_harvest[0]
+    
+    table.clear()
+    assert table.totals.total_harvest == 0.0 and table.totals.harvest_by_name() == {}
+    print("✓ Тест пройден: итоги обновляются при добавлении, изменении и удалении\n")
+
+
+def test_csv_import():
+    """Тест потокового импорта из CSV/TSV."""
+    print("Тест 9: Потоковый импорт CSV...")
+    data = io.StringIO(
+        "name;area;yield_per_hectare\n"
+        "Пшеница;10;3.5\n"
+        "\n"
+        "Ячмень;abc;2.8\n"
+        "Овес;8;2.5\n"
+        ";5;2\n"
+        "Рожь;-1;2\n"
+        "Просо;4\n"
+    )
+    table = CropTable()
+    report = import_crops(data, table.append)
+    assert report.imported == 2
+    assert [crop.name for crop in table] == ["Пшеница", "Овес"]
+    assert table.totals.total_harvest == 55.0
+    assert [(e.line, e.field) for e in report.errors] == [
+        (4, "area"), (6, "name"), (7, "area"), (8, "row")
+    ]
+    
+    tsv = io.StringIO("Пшеница\t10\t3.5\nЯчмень\t5\t2.8\n")
+    report = import_crops(tsv, table.append, max_errors=0)
+    assert report.imported == 2 and report.failed == 0
+    
+    # Первая строка - заголовок, только если ни одно ее числовое поле не число
+    first_bad = io.StringIO("Пшеница,-5,3\nОвес,2,2\n")
+    report = import_crops(first_bad, table.append)
+    assert report.imported == 1 and [(e.line, e.field) for e in report.errors] == [(1, "area")]
+    header = io.StringIO("Культура,Площадь,Урожайность\nОвес,2,2\n")
+    report = import_crops(header, table.append)
+    assert report.imported == 1 and report.failed == 0
+    first_text = io.StringIO("Пшеница,abc,3\nОвес,2,2\n")
+    report = import_crops(first_text, table.append)
+    assert report.imported == 1 and [(e.line, e.field) for e in report.errors] == [(1, "area")]
+    
+    # Переполнение при разборе дает бесконечность, а не число
+    huge = io.StringIO("Овес,2,2\nПшеница,1e400,3\n")
+    report = import_crops(huge, table.append)
+    assert report.imported == 1 and [(e.line, e.field) for e in report.errors] == [(2, "area")]
+    
+    # Лишние колонки не отбрасываются: десятичная запятая при разделителе ','
+    shifted = io.StringIO("Пшеница,3,5,2,8\nОвес,3,5,2\nРожь,2,3,6\nЯчмень,1,2,\n")
+    report = import_crops(shifted, table.append)
+    assert report.imported == 2
+    assert [(e.line, e.field) for e in report.errors] == [(1, "row"), (2, "total_harvest")]
+    assert "';'" in report.errors[0].reason
+    
+    bad = io.StringIO("a,1,1\nb,x,1\nc,y,1\n")
+    report = import_crops(bad, table.append, max_errors=1)
+    assert report.imported == 1 and report.failed == 2 and len(report.errors) == 1
+    print(f"✓ Тест пройден: ошибки собраны по строкам ({len(report.errors)} сохранено)\n")
+
+
+def test_batch_construction():
+    """Тест пакетного создания культур с проверкой по колонкам."""
+    print("Тест 10: Пакетное создание культур...")
+    rows = [
+        ("Пшеница", 10.0, 3.5),
+        ("Ячмень", -5.0, 2.8),
+        ("  ", 8.0, 0.0),
+        ("Овес", 8.0, 2.5)
+    ]
+    crops, errors = Crop.from_rows(rows)
+    assert crops == [Crop("Пшеница", 10.0, 3.5), Crop("Овес", 8.0, 2.5)]
+    assert [(e.line, e.field) for e in errors] == [
+        (1, "area"), (2, "yield_per_hectare"), (2, "name")
+    ]
+    
+    crops, errors = Crop.from_rows(rows[:1], validate=False)
+    assert crops[0].total_harvest == 35.0 and errors == []
+    
+    table = CropTable()
+    errors = table.extend_rows(rows, start=1)
+    assert [e.line for e in errors] == [2, 3, 3]
+    assert len(table) == 2
+    assert table.totals.harvest_by_name() == {"Пшеница": 35.0, "Овес": 20.0}
+    assert table.totals.total_harvest == calculate_total_season_harvest(table)
+    print(f"✓ Тест пройден: найдено ошибок {len(errors)}\n")
+
+
+def test_compact_crop():
+    """Тест компактного представления культуры."""
+    print("Тест 11: Компактное представление культуры...")
+    prefix = "Пше"
+    first = Crop(prefix + "ница", 10.0, 3.5)
+    second = Crop("".join([prefix, "ница"]), 5.0, 2.0)
+    assert not hasattr(first, "__dict__")
+    assert first.name is second.name
+    
+    frozen = FrozenCrop("Пшеница", 10.0, 3.5)
+    assert frozen.total_harvest == 35.0
+    assert str(frozen) == str(first)
+    assert len({frozen, FrozenCrop("Пшеница", 10.0, 3.5)}) == 1
+    try:
+        frozen.area = 1.0
+        assert False, "Должна быть ошибка при изменении неизменяемой культуры"
+    except AttributeError:
+        pass
+    try:
+        FrozenCrop("Пшеница", 0.0, 3.5)
+        assert False, "Должна быть ошибка для нулевой площади"
+    except ValueError:
+        pass
+    
+    crops, errors = FrozenCrop.from_rows([("Ячмень", 5.0, 2.8), ("", 1.0, 1.0)])
+    assert crops == [FrozenCrop("Ячмень", 5.0, 2.8)] and len(errors) == 1
+    print("✓ Тест пройден: культуры хранятся в __slots__, названия интернированы\n")
+
+
+def test_crop_row_format():
+    """Тест форматирования строки списка культур."""
+    print("Тест 12: Форматирование строки списка...")
+    from src.gui.crop_list import format_crop_row
+    
+    line = format_crop_row("Пшеница", 10.0, 3.5, 35.0)
+    assert line == f"{'Пшеница':20s} │   10.00 га ×   3.50 т/га =    35.00 т"
+    print(f"✓ Тест пройден: {line}\n")
+
+
+def test_background_tasks():
+    """Тест фоновых задач с прогрессом, данными и отменой."""
+    print("Тест 13: Фоновые задачи...")
+    from src.utils.tasks import TaskRunner
+    
+    def job(context, count):
+        for i in range(count):
+            context.post(i)
+            context.progress(i + 1, count)
+        return "готово"
+    
+    def wait(handle):
+        deadline = time.monotonic() + 5
+        while not handle.done and time.monotonic() < deadline:
+            runner.poll()
+            time.sleep(0.001)
+        assert handle.done
+    
+    runner = TaskRunner()
+    received, results, progress = [], [], []
+    handle = runner.submit(job, 100, max_pending=2,
+                           on_data=received.append,
+                           on_result=results.append,
+                           on_progress=lambda done, total, message: progress.append(done))
+    wait(handle)
+    assert received == list(range(100))
+    assert results == ["готово"] and progress[-1] == 100
+    
+    cancelled = []
+    handle = runner.submit(job, 10 ** 6, max_pending=1, on_cancel=lambda: cancelled.append(True))
+    handle.cancel()
+    wait(handle)
+    assert cancelled == [True] and not runner.busy
+    
+    errors = []
+    handle = runner.submit(lambda context: 1 / 0, on_error=errors.append)
+    wait(handle)
+    assert isinstance(errors[0], ZeroDivisionError)
+    runner.shutdown()
+    print("✓ Тест пройден: данные, прогресс, отмена и ошибки доставлены\n")
+
+
+def test_season_store():
+    """Тест сохранения и ленивого открытия сезона в SQLite."""
+    print("Тест 14: Хранилище сезонов SQLite...")
+    from src.storage import SeasonStore
+    
+    table = CropTable([
+        Crop("Пшеница", 10.0, 3.5),
+        Crop("Ячмень", 5.0, 2.8)
+    ])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "seasons.db")
+        with SeasonStore(path) as store:
+            store.save_season("2025", table)
+            store.append("2025", Crop("Овес", 8.0, 2.5))
+            store.save_season("2024", CropTable([Crop("Рожь", 1.0, 1.0)]))
+        
+        with SeasonStore(path) as store:
+            assert store.seasons() == ["2024", "2025"]
+            view = store.open_season("2025")
+            assert len(view) == 3
+            assert view[2] == Crop("Овес", 8.0, 2.5)
+            assert view[-3].name == "Пшеница"
+            assert view.total_harvest() == 69.0
+            assert view.harvest_by_name() == {"Пшеница": 35.0, "Ячмень": 14.0, "Овес": 20.0}
+            loaded = view.to_table()
+            assert [crop.name for crop in loaded] == ["Пшеница", "Ячмень", "Овес"]
+            assert loaded.totals.total_harvest == 69.0
+            
+            # Повторное сохранение заменяет содержимое сезона
+            store.save_season("2025", table)
+            assert len(store.open_season("2025")) == 2
+            store.extend("2025", [Crop("Рожь", 2.0, 1.5), Crop("Просо", 1.0, 1.0)])
+            assert len(store.open_season("2025")) == 4
+            # Импортированные записи дописываются без создания Crop
+            store.extend_rows("2025", [("Гречиха", 2.0, 1.25)])
+            season = store.open_season("2025")
+            assert len(season) == 5 and season[4].total_harvest == 2.5
+            store.delete_season("2024")
+            assert store.seasons() == ["2025"]
+            
+            # Прерванное сохранение не меняет прежнее содержимое сезона
+            from src.utils.tasks import TaskCancelled
+            
+            def cancel(done, total):
+                raise TaskCancelled()
+            try:
+                store.save_season("2025", CropTable([Crop("Лен", 1.0, 1.0)]), progress=cancel)
+                assert False, "Сохранение должно быть прервано"
+            except TaskCancelled:
+                pass
+            assert len(store.open_season("2025")) == 5
+    print("✓ Тест пройден: сезоны сохраняются и открываются лениво\n")
+
+
+def test_batch_cli():
+    """Тест консольного режима без графического интерфейса."""
+    print("Тест 15: Консольный режим...")
+    from src.cli import main as cli_main
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "season.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("name,area,yield_per_hectare\nПшеница,10,3.5\nЯчмень,5,2.8\nОвес,-1,2\n")
+        
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            code = cli_main(["--batch", path, "--report", "json"])
+        assert code == 0
+        summary = json.loads(output.getvalue())
+        assert summary["total_harvest"] == 49.0 and summary["errors"] == 1
+        assert list(summary["cultures"]) == ["Пшеница", "Ячмень"]
+        
+        # Консольный режим не должен загружать tkinter
+        check = ("import runpy, sys; sys.argv = ['main.py', '--batch', sys.argv[1]]; "
+                 "code = runpy.run_path('main.py', run_name='not_main')['main'](); "
+                 "assert 'tkinter' not in sys.modules; sys.exit(code)")
+        result = subprocess.run([sys.executable, "-c", check, path],
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert result.returncode == 0, result.stderr
+        assert "49.00 т" in result.stdout
+    print("✓ Тест пройден: итоги рассчитаны без tkinter\n")
+
+
+def test_lazy_imports():
+    """Тест ленивой загрузки пакетов."""
+    print("Тест 16: Ленивая загрузка пакетов...")
+    check = ("import sys; import src.utils, src.gui; "
+             "assert 'src.utils.importer' not in sys.modules; "
+             "assert 'tkinter' not in sys.modules; "
+             "from src.utils import aggregate_season; "
+             "assert 'src.utils.calculations' in sys.modules; "
+             "assert 'src.utils.importer' not in sys.modules; "
+             "assert 'aggregate_season' in dir(src.utils)")
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
+    print("✓ Тест пройден: модули загружаются при первом обращении\n")
+
+
+def test_benchmark_compare():
+    """Тест сравнения замеров с базовыми."""
+    print("Тест 17: Сравнение замеров с базовыми...")
+    from benchmarks.suite import compare, run_suite
+    
+    current = run_suite([100], ["crop_init", "total_table"], repeat=1)
+    assert set(current["results"]) == {"crop_init", "total_table"}
+    
+    baseline = {"results": {"crop_init": {"100": 0.010}, "total_table": {"100": 0.010}}}
+    current = {"results": {"crop_init": {"100": 0.015}, "total_table": {"100": 0.0105}}}
+    regressions = compare(current, baseline, tolerance=0.1)
+    assert len(regressions) == 1 and regressions[0].startswith("crop_init [100]")
+    print("✓ Тест пройден: регрессии выявлены\n")
+
+
+def test_grouped_aggregation():
+    """Тест групповой агрегации по хозяйствам и сезонам."""
+    print("Тест 18: Групповая агрегация по хозяйствам и сезонам...")
+    import math
+    from src.utils import aggregate_files, aggregate_grouped
+    
+    records = [
+        (farm, season, name, 1.0 + i % 7 / 3, 2.0 + i % 11 / 7)
+        for i, (farm, season, name) in enumerate(
+            (farm, season, name)
+            for farm in ("Север", "Юг")
+            for season in ("2023", "2024")
+            for name in ("Пшеница", "Ячмень")
+            for _ in range(50)
+        )
+    ]
+    single = aggregate_grouped(records, workers=1)
+    parallel = aggregate_grouped(records, workers=2, chunk_size=37)
+    sequential = aggregate_grouped(records, workers=1, chunk_size=37)
+    assert all(sequential[key].harvest == totals.harvest for key, totals in single.items())
+    assert len(single) == 8 and single.keys() == parallel.keys()
+    for key, totals in single.items():
+        expected = math.fsum(r[3] * r[4] for r in records if r[:3] == key)
+        assert totals.harvest == parallel[key].harvest == expected
+        assert totals.area == parallel[key].area and totals.count == parallel[key].count == 50
+    
+    by_farm = aggregate_grouped(records, group_by=("farm",), workers=2, chunk_size=64)
+    assert by_farm[("Север",)].count == 200
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "north_2024.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Пшеница,10,3.5\nЯчмень,5,2.8\nОвес,-1,2\n")
+        groups, report = aggregate_files([("Север", "2024", path)], workers=1)
+    assert groups[("Север", "2024", "Пшеница")].harvest == 35.0
+    assert report.imported == 2 and report.failed == 1
+    assert report.errors[0].source == path and str(report.errors[0]).startswith(path)
+    print("✓ Тест пройден: параллельные итоги совпадают с однопоточными\n")
+
+
+def test_stats_cache():
+    """Тест кэша статистики с инвалидацией по версиям."""
+    print("Тест 19: Кэш статистики...")
+    from src.utils import StatsCache
+    
+    table = CropTable([Crop("Пшеница", 10.0, 3.5), Crop("Ячмень", 5.0, 2.8),
+                       Crop("Пшеница", 20.0, 4.0)])
+    stats = StatsCache(table, maxsize=4)
+    
+    wheat = stats.culture_stats("Пшеница")
+    assert wheat.count == 2 and wheat.harvest == 115.0 and wheat.mean_yield == 3.75
+    assert stats.culture_stats("Пшеница") is wheat and stats.hits == 1
+    assert stats.top_cultures(1) == [("Пшеница", 115.0)]
+    assert stats.total_harvest() == 129.0
+    
+    # Изменение другой культуры не сбрасывает показатели пшеницы
+    table.append(Crop("Ячмень", 1.0, 2.0))
+    assert stats.culture_stats("Пшеница") is wheat
+    assert stats.culture_stats("Ячмень").count == 2
+    assert stats.total_harvest() == 131.0
+    
+    table.update(0, Crop("Овес", 10.0, 2.0))
+    assert stats.culture_stats("Пшеница").count == 1
+    table.remove(1)
+    assert stats.culture_stats("Ячмень").count == 1
+    table.clear()
+    assert stats.culture_stats("Пшеница").count == 0 and stats.total_harvest() == 0.0
+    
+    # Фильтры вытесняются по LRU
+    for low in range(10):
+        stats.stats_where(min_area=float(low))
+    assert len(stats) == 4
+    print("✓ Тест пройден: кэш обновляется только при изменении данных\n")
+
+
+def test_crop_index():
+    """Тест индексированных запросов к таблице культур."""
+    print("Тест 20: Индексированные запросы...")
+    from src.models import CropIndex, Range, parse_query
+    
+    table = CropTable()
+    index = CropIndex(table)
+    table.extend_rows([("Пшеница", 10.0, 3.5), ("Ячмень", 5.0, 2.8),
+                       ("Пшеница озимая", 20.0, 4.0), ("Овес", 8.0, 2.0)])
+    
+    assert list(index.by_name("Пшеница")) == [0]
+    assert index.matching("пшен") == [0, 2]
+    assert list(index.range("area", Range(5.0, 10.0))) == [1, 3, 0]
+    assert list(index.range("area", Range(5.0, 10.0, include_low=False))) == [3, 0]
+    assert index.top("total_harvest", 2) == [2, 0]
+    
+    # Индексы следуют за изменениями таблицы
+    table.append(Crop("Рожь", 50.0, 1.0))
+    table.update(1, Crop("Пшеница", 1.0, 9.0))
+    assert index.matching("пшен") == [0, 1, 2]
+    assert index.top("area", 1) == [4] and index.top("yield_per_hectare", 1) == [1]
+    table.remove(0)
+    assert list(index.by_name("Пшеница")) == [0]
+    assert list(index.range("area", Range(high=8.0))) == [0, 2]
+    
+    name, ranges = parse_query("пшен урожайность>3,5")
+    assert name == "пшен" and ranges["yield_per_hectare"] == Range(3.5, None, False, True)
+    assert index.query(name, ranges) == [0, 1]
+    assert index.query(None, {"area": Range(low=20.0)}) == [1, 3]
+    assert list(index.by_name("Кукуруза")) == []
+    
+    # Вставка в середину и удаление сдвигают номера строк без перестроения
+    table.insert(1, Crop("Овес", 30.0, 1.5))
+    table.remove(3)
+    fresh = CropIndex(table)
+    assert index.sorted_indexes["area"]._valid
+    for column in ("area", "yield_per_hectare", "total_harvest"):
+        assert list(index.ordered(column)) == list(fresh.ordered(column))
+    for name in ("Пшеница", "Ячмень", "Овес", "Рожь"):
+        assert list(index.by_name(name)) == list(fresh.by_name(name))
+    
+    # Удаления из большой таблицы откладываются и применяются без сортировки заново
+    from src.models.query import SortedIndex
+    big = CropTable()
+    big.extend_rows([(f"Поле {i % 7}", 1.0 + i / 1000, 2.0 + i / 3000) for i in range(20000)])
+    big_index = CropIndex(big)
+    for column in ("area", "yield_per_hectare", "total_harvest"):
+        big_index.ordered(column)
+    big_index.by_name("Поле 1")
+    rows_before = big_index.sorted_indexes["area"]._rows
+    rebuilds = []
+    rebuild = SortedIndex.rebuild
+    SortedIndex.rebuild = lambda self: (rebuilds.append(self.column), rebuild(self))[1]
+    try:
+        for row in range(5000, 5200):
+            big.remove(row)
+        assert big_index.sorted_indexes["area"]._rows is rows_before, "Удаление - за постоянное время"
+        big.insert(10, Crop("Поле 1", 0.5, 2.0))
+        assert list(big_index.range("area", Range(high=1.0))) == [10, 0]
+        for row in (100, 7000, 15000):
+            big.remove(row)
+            assert big_index.top("area", 1) == [len(big) - 1]
+        ordered = list(big_index.ordered("total_harvest"))
+        wheat = list(big_index.by_name("Поле 1"))
+    finally:
+        SortedIndex.rebuild = rebuild
+    assert rebuilds == []
+    fresh = CropIndex(big)
+    assert ordered == list(fresh.ordered("total_harvest")) and wheat == list(fresh.by_name("Поле 1"))
+    print("✓ Тест пройден: запросы используют индексы и учитывают изменения\n")
+
+
+def test_exact_mode():
+    """Тест точного расчета урожая в целых единицах."""
+    print("Тест 21: Точный расчет урожая...")
+    from decimal import Decimal
+    from src.utils import ExactTotals, exact_season_harvest
+    from src.utils.fixed_point import AREA_SCALE, harvest_units, to_units, units_to_kg
+    
+    assert to_units("10,25", AREA_SCALE) == 1025 and to_units(0.29, AREA_SCALE) == 29
+    assert harvest_units(0.1, 0.3) == 10 * 300
+    assert units_to_kg(250) == 2 and units_to_kg(350) == 4
+    
+    table = CropTable()
+    exact = ExactTotals(table)
+    table.extend_rows([("Пшеница", 0.1, 0.3)] * 10000)
+    # Сумма чисел с плавающей точкой расходится с учетом в последних знаках
+    assert calculate_total_season_harvest(table) != 300.0
+    assert exact.total_harvest == Decimal("300") and exact.total_kg == 300000
+    assert exact_season_harvest(table) == exact_season_harvest(exact) == Decimal("300")
+    
+    table.append(Crop("Ячмень", 10.0, 2.8))
+    table.update(0, Crop("Овес", 1.0, 2.0))
+    table.remove(1)
+    assert exact.total_kg == 300000 - 30 - 30 + 28000 + 2000
+    assert exact.harvest_kg_by_name() == {"Пшеница": 299940, "Ячмень": 28000, "Овес": 2000}
+    table.clear()
+    assert exact.total_units == 0 and len(exact.harvest_units) == 0
+    print("✓ Тест пройден: итоги сходятся до килограмма\n")
+
+
+def test_export():
+    """Тест потокового экспорта в CSV, JSON Lines и XLSX."""
+    print("Тест 22: Потоковый экспорт...")
+    import gzip
+    import zipfile
+    from src.utils import export_table
+    
+    table = CropTable([Crop("Пшеница", 10.0, 3.5), Crop('Ячмень "яровой", 1', 5.0, 2.8)])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "season.csv")
+        assert export_table(table, path) == 2
+        
+        # Выгруженный CSV снова импортируется в приложение
+        imported = []
+        report = import_crops(path, imported.append)
+        assert report.failed == 0 and imported == list(table)
+        with open(os.path.join(directory, "season.cultures.csv"), encoding="utf-8") as f:
+            assert f.read().splitlines()[1].startswith("Пшеница,1,10.0,35.0")
+        
+        path = os.path.join(directory, "season.jsonl.gz")
+        export_table(table, path)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert records[1]["name"] == 'Ячмень "яровой", 1' and records[0]["total_harvest"] == 35.0
+        
+        path = os.path.join(directory, "season.xlsx")
+        export_table(table, path)
+        with zipfile.ZipFile(path) as book:
+            sheet = book.read("xl/worksheets/sheet1.xml").decode("utf-8")
+            assert sheet.count("<row>") == 3 and "<v>35.0</v>" in sheet
+            assert "xl/worksheets/sheet2.xml" in book.namelist()
+        
+        try:
+            export_table(table, os.path.join(directory, "season.xlsx.gz"))
+            assert False, "Должна быть ошибка"
+        except ValueError:
+            pass
+        
+        # Бесконечность не является числом JSON
+        from src.utils.export import ExportWriter, JsonlExportWriter
+        with JsonlExportWriter(os.path.join(directory, "bad.jsonl")) as writer:
+            try:
+                writer.write_crops(["Пшеница"], [float("inf")], [3.5], [float("inf")])
+                assert False, "Должна быть ошибка"
+            except ValueError:
+                pass
+        try:
+            ExportWriter(path)
+            assert False, "Базовый писатель абстрактный"
+        except TypeError:
+            pass
+        
+        # В XLSX - тоже только конечные числа; недопустимые в XML символы удаляются
+        from src.utils.export import XlsxExportWriter
+        path = os.path.join(directory, "control.xlsx")
+        with XlsxExportWriter(path) as writer:
+            try:
+                writer.write_crops(["Пшеница"], [float("nan")], [3.5], [float("nan")])
+                assert False, "Должна быть ошибка"
+            except ValueError:
+                pass
+            writer.write_crops(["Овес\x01\x0b"], [1.0], [2.0], [2.0])
+        with zipfile.ZipFile(path) as book:
+            sheet = book.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        assert "<t>Овес</t>" in sheet
+        import xml.dom.minidom
+        xml.dom.minidom.parseString(sheet)
+        
+        path = os.path.join(directory, "season.tsv.gz")
+        export_table(table, path)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert f.readline().split("\t")[:2] == ["name", "area"]
+    print("✓ Тест пройден: экспорт во все форматы\n")
+
+
+def test_binary_snapshot():
+    """Тест двоичных снимков таблицы культур."""
+    print("Тест 23: Двоичные снимки...")
+    from src.storage import SnapshotView, load_snapshot, save_snapshot
+    
+    table = CropTable([Crop("Пшеница", 10.0, 3.5), Crop("Ячмень", 5.0, 2.8),
+                       Crop("Пшеница", 2.5, 4.0)])
+    table.remove(1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "season.hrvs")
+        save_snapshot(table, path)
+        
+        loaded = load_snapshot(path)
+        assert list(loaded) == list(table) and loaded.names == table.names
+        assert loaded.totals.total_harvest == table.totals.total_harvest
+        assert loaded.totals.count_by_name() == {"Пшеница": 2}
+        loaded.append(Crop("Овес", 1.0, 2.0))
+        assert loaded.totals.count == 3 and loaded.name_at(2) == "Овес"
+        
+        # Колонки представления читаются из файла без копирования
+        with SnapshotView(path) as view:
+            assert len(view) == 2 and view[1] == table[1]
+            assert sum(view.total_harvest) == 45.0
+            assert view.harvest_by_name() == {"Пшеница": 45.0}
+        
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 8)
+        try:
+            load_snapshot(path)
+            assert False, "Должна быть ошибка"
+        except ValueError:
+            pass
+    print("✓ Тест пройден: сохранение и загрузка снимка\n")
+
+
+def test_metrics():
+    """Тест замеров горячих путей."""
+    print("Тест 24: Замеры и профилирование...")
+    from src.utils import metrics
+    
+    table = CropTable([Crop("Пшеница", 10.0, 3.5)])
+    metrics.reset()
+    calculate_total_season_harvest(table)
+    assert metrics.snapshot()["timers"] == {}, "Выключенные замеры не копятся"
+    
+    metrics.enable(profile=True, trace_memory=True)
+    try:
+        calculate_total_season_harvest(table)
+        calculate_total_season_harvest(table)
+        with metrics.timer("test.block"):
+            import_crops(io.StringIO("Овес,1,2\n"), [].append)
+        metrics.count("test.rows", 5)
+    finally:
+        metrics.disable()
+    
+    data = metrics.snapshot()
+    assert data["timers"]["calc.total_season_harvest"]["count"] == 2
+    assert data["timers"]["crop.from_rows"]["count"] == data["timers"]["import.file"]["count"] == 1
+    assert data["timers"]["test.block"]["total_ms"] >= data["timers"]["crop.from_rows"]["total_ms"]
+    assert data["counters"] == {"test.rows": 5}
+    assert data["memory"]["peak_kb"] > 0 and "function calls" in data["profile"]
+    
+    stream = io.StringIO()
+    metrics.dump_json(stream)
+    assert json.loads(stream.getvalue())["counters"]["test.rows"] == 5
+    assert "calc.total_season_harvest" in metrics.format_report()
+    metrics.reset()
+    assert metrics.snapshot() == {"enabled": False, "timers": {}, "counters": {}}
+    print("✓ Тест пройден: замеры, профиль и отчет\n")
+
+
+def test_command_history():
+    """Тест изменения, удаления и отмены через журнал команд."""
+    print("Тест 25: Журнал отмены и повтора...")
+    from src.models import CommandHistory, CropIndex, Range
+    from src.utils import ExactTotals
+    
+    table = CropTable()
+    index = CropIndex(table)
+    exact = ExactTotals(table)
+    history = CommandHistory(table, limit=10)
+    for crop in (Crop("Пшеница", 10.0, 3.5), Crop("Ячмень", 5.0, 2.8), Crop("Овес", 4.0, 2.0)):
+        history.add(crop)
+    original = list(table)
+    
+    history.edit(1, Crop("Рожь", 6.0, 3.0))
+    history.remove(0)
+    assert [crop.name for crop in table] == ["Рожь", "Овес"]
+    assert table.totals.count_by_name() == {"Рожь": 1, "Овес": 1}
+    assert index.range("area", Range(low=5.0)).tolist() == [0]
+    assert exact.total_kg == 26000
+    
+    assert history.undo().description == "удаление «Пшеница»"
+    assert history.undo() is not None and history.can_redo
+    assert list(table) == original
+    assert abs(table.totals.total_harvest - 57.0) < 1e-9 and exact.total_kg == 57000
+    assert index.by_name("Ячмень").tolist() == [1]
+    
+    history.redo()
+    assert table[1].name == "Рожь" and table.totals.harvest_by_name()["Рожь"] == 18.0
+    history.remove(2)
+    assert not history.can_redo, "Новая команда очищает повтор"
+    
+    table.clear()
+    assert not history.can_undo and history.undo() is None
+    print("✓ Тест пройден: изменение, удаление, отмена и повтор\n")
+
+
+def test_ingest_service():
+    """Тест сетевого приема записей от терминалов."""
+    print("Тест 26: Сервер приема записей...")
+    import asyncio
+    from src.service import IngestClient, IngestServer, run_load
+    
+    async def scenario():
+        table = CropTable()
+        async with IngestServer(table, port=0, max_pending=2) as server:
+            report = await run_load(server.host, server.port, 2000, connections=4,
+                                    batch_size=100, invalid_share=0.05)
+            assert report.accepted + report.rejected == 2000 and report.rejected > 0
+            assert len(table) == report.accepted == server.stats.accepted
+            
+            async with IngestClient(server.host, server.port) as client:
+                response = await client.send([("Пшеница", 10.0, 3.5), ("Овес", 0.0, 2.0)], "csv")
+                assert response["accepted"] == 1 and response["rejected"] == 1
+                assert "area" in response["errors"][0]
+                response = await client.send_frame(b"XML 2\n{}")
+                assert "error" in response
+        return table, report
+    
+    table, report = asyncio.run(scenario())
+    assert len(table) == report.accepted + 1 and table.name_at(-1) == "Пшеница"
+    assert abs(table.totals.total_harvest - calculate_total_season_harvest(list(table))) < 1e-6
+    print("✓ Тест пройден: параллельный прием, проверка и ошибки протокола\n")
+
+
+def test_journal():
+    """Тест журнала упреждающей записи."""
+    print("Тест 27: Журнал изменений...")
+    from src.models.history import CommandHistory
+    from src.storage import Journal
+    
+    with tempfile.TemporaryDirectory() as directory:
+        journal = Journal(directory, durable=False)
+        table = journal.recover()
+        journal.attach(table)
+        history = CommandHistory(table)
+        history.add(Crop("Пшеница", 10.0, 3.5))
+        history.add(Crop("Ячмень", 5.0, 2.8))
+        history.edit(0, Crop("Овес", 4.0, 2.0))
+        history.remove(1)
+        history.undo()
+        table.extend_rows([("Рожь", 1.0, 2.0), ("Рожь", 3.0, 2.0)])
+        journal.flush()
+        assert journal.stats.entries == 7 and journal.stats.commits >= 1
+        journal.close()
+        
+        # Оборванная последняя запись отбрасывается
+        path = os.path.join(directory, "journal.000000.log")
+        size = os.path.getsize(path)
+        with open(path, "ab") as f:
+            f.write(b"\x00\x01\x02")
+        journal = Journal(directory, compact_entries=3, durable=False)
+        restored = journal.recover()
+        assert list(restored) == list(table) and os.path.getsize(path) == size
+        assert restored.totals.total_harvest == table.totals.total_harvest
+        
+        # Сжатие: снимок нового поколения и пустой журнал
+        journal.attach(restored)
+        restored.clear()
+        restored.extend_rows([("Овес", 2.0, 2.0)] * 3)
+        journal.flush()
+        journal.close()
+        assert journal.stats.compactions == 1
+        assert sorted(os.listdir(directory)) == [
+            "journal.000001.log", "journal.lock", "snapshot.000001.hrvs"]
+        reader = Journal(directory)
+        restored = reader.recover()
+        assert len(restored) == 3 and restored.totals.total_harvest == 12.0
+        assert list(restored) == [Crop("Овес", 2.0, 2.0)] * 3, "Коды названий после очистки"
+        
+        # Каталог журнала занят, пока журнал открыт
+        from src.storage import JournalLockedError
+        try:
+            Journal(directory).recover()
+            assert False, "Журнал уже открыт"
+        except JournalLockedError:
+            pass
+        reader.close()
+        
+        # Следующее сжатие строится из снимка и журнала; длинное название не обрезается
+        journal = Journal(directory, compact_entries=2, durable=False)
+        restored = journal.recover()
+        journal.attach(restored)
+        long_name = "П" * 40000
+        restored.append(Crop(long_name, 1.0, 1.0))
+        restored.update(0, Crop("Ячмень", 1.0, 1.0))
+        journal.flush()
+        journal.close()
+        assert sorted(os.listdir(directory)) == [
+            "journal.000002.log", "journal.lock", "snapshot.000002.hrvs"]
+        reader = Journal(directory)
+        again = reader.recover()
+        reader.close()
+        assert list(again) == list(restored) and again.name_at(3) == long_name
+    print("✓ Тест пройден: восстановление, обрыв записи и сжатие\n")
+
+
+def test_scenarios():
+    """Тест сценарных расчетов и метода Монте-Карло."""
+    print("Тест 28: Сценарии урожая...")
+    from src.utils.scenarios import ScenarioEngine, YieldDistribution, parse_scenario
+    
+    table = CropTable([Crop("Пшеница", 10.0, 3.0), Crop("Овес", 5.0, 2.0),
+                       Crop("Пшеница", 2.0, 5.0)])
+    engine = ScenarioEngine(table)
+    drought = parse_scenario("засуха: *=-20%; Пшеница=+8%")
+    assert drought.name == "засуха" and drought.default == 0.8
+    assert abs(engine.evaluate(drought) - (40.0 * 1.08 + 10.0 * 0.8)) < 1e-9
+    assert engine.evaluate_many([parse_scenario("*=1")]) == [50.0]
+    try:
+        parse_scenario("Пшеница")
+        assert False, "Должна быть ошибка"
+    except ValueError:
+        pass
+    
+    # Без разброса все прогоны равны итогу сезона
+    result = engine.simulate(runs=100, seed=1)
+    assert result.runs == 100 and result.percentile(5) == result.percentile(95) == 50.0
+    
+    dist = {"Пшеница": YieldDistribution(sd=0.1, plot_sd=0.1)}
+    result = engine.simulate(dist, runs=2000, seed=7)
+    bands = result.bands((5, 50, 95))
+    assert bands[5] < bands[50] < bands[95] and abs(result.mean - 50.0) < 1.0
+    assert list(engine.simulate(dist, runs=2000, seed=7).totals) == list(result.totals)
+    try:
+        ScenarioEngine(table.totals).simulate(dist, runs=10)
+        assert False, "Должна быть ошибка"
+    except ValueError:
+        pass
+    print("✓ Тест пройден: сценарии, полосы итога и воспроизводимость\n")
+
+
+def test_numparse():
+    """Тест разбора чисел в локальных форматах и с единицами."""
+    print("Тест 29: Локальные форматы чисел...")
+    from src.utils.importer import ImportReport, iter_record_chunks, iter_rows
+    from src.utils.numparse import AREA_UNITS, YIELD_UNITS, parse_column, parse_number
+    
+    assert parse_number("3,5") == 3.5 and parse_number("1 234,5") == 1234.5
+    assert parse_number("1\u00a0234,5") == 1234.5 and parse_number("1.234,5") == 1234.5
+    assert parse_number("1,234.5") == 1234.5 and parse_number("1,234,567") == 1234567.0
+    assert parse_number("35 ц/га", YIELD_UNITS) == 3.5 and parse_number("2500 кг", YIELD_UNITS) == 2.5
+    assert parse_number("3,5 Т / Га.", YIELD_UNITS) == 3.5 and parse_number("50 сот", AREA_UNITS) == 0.5
+    for text in ("", "abc", "inf", "nan", "12 34", "1,234,5", "5 га"):
+        assert parse_number(text) is None, text
+    assert parse_number("3,5 лет", YIELD_UNITS) is None
+    
+    # Колонка разбирается целиком и по одному значению одинаково
+    values = ["3,5", "10", "0,25", " 7,0 "]
+    assert parse_column(values) == [parse_number(value) for value in values]
+    assert parse_column(["40 ц/га", "35 ц/га"], YIELD_UNITS) == [4.0, 3.5]
+    assert parse_column(["1 234,5", "x", "2.5"], AREA_UNITS) == [1234.5, None, 2.5]
+    assert parse_column(["12,", "3 га"], AREA_UNITS) == [12.0, 3.0]
+    
+    # Результат разбора строки не зависит от соседних строк пакета
+    from src.utils.importer import parse_rows
+    clean, _ = parse_rows([(1, ["A", "12,", "3"]), (2, ["B", "1", "2"])])
+    mixed, errors = parse_rows([(1, ["A", "12,", "3"]), (2, ["B", "x", "2"])])
+    assert clean[0] == mixed[0] == ("A", 12.0, 3.0) and [e.line for e in errors] == [2]
+    
+    data = "Культура;Площадь;Урожайность\nПшеница;1 200,5;35 ц/га\nОвес;12,5 га;2,8\nРожь;много;3\n"
+    report = ImportReport()
+    records = [record for chunk in iter_record_chunks(iter_rows(io.StringIO(data)), report)
+               for record in chunk]
+    assert records == [("Пшеница", 1200.5, 3.5), ("Овес", 12.5, 2.8)]
+    assert report.failed == 1 and report.errors[0].line == 4 and report.errors[0].field == "area"
+    print("✓ Тест пройден: десятичная запятая, разряды и единицы\n")
+
+
 def main():
     """Запуск всех тестов."""
     print("=" * 50)
@@ -98,6 +1017,30 @@ def main():
         test_multiple_crops()
         test_total_season_harvest()
         test_validation()
+        test_crop_table()
+        test_aggregate_season()
+        test_running_totals()
+        test_csv_import()
+        test_batch_construction()
+        test_compact_crop()
+        test_crop_row_format()
+        test_background_tasks()
+        test_season_store()
+        test_batch_cli()
+        test_lazy_imports()
+        test_benchmark_compare()
+        test_grouped_aggregation()
+        test_stats_cache()
+        test_crop_index()
+        test_exact_mode()
+        test_export()
+        test_binary_snapshot()
+        test_metrics()
+        test_command_history()
+        test_ingest_service()
+        test_journal()
+        test_scenarios()
+        test_numparse()
         
         print("=" * 50)
         print("✓ Все тесты пройдены успешно!")